@@ -0,0 +1,32 @@
+"""adds uuid array for the record ids of labeling sessions
+
+Revision ID: 0b6d2e8f1a47
+Revises: f610beab9323
+Create Date: 2026-10-18 15:21:09.306718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0b6d2e8f1a47"
+down_revision = "f610beab9323"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # replaces the json list in session_record_ids, existing sessions are collected
+    # again on their next use
+    op.add_column(
+        "user_sessions",
+        sa.Column(
+            "record_ids", sa.ARRAY(postgresql.UUID(as_uuid=True)), nullable=True
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("user_sessions", "record_ids")
@@ -0,0 +1,96 @@
+"""adds record data versions & run state for incremental labeling function runs
+
+Revision ID: 3c91d5a7e2b4
+Revises: 0b6d2e8f1a47
+Create Date: 2026-10-19 09:12:40.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "3c91d5a7e2b4"
+down_revision = "0b6d2e8f1a47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # existing records get version 0 without a table rewrite (constant default),
+    # new records take the next value of the sequence
+    op.execute("CREATE SEQUENCE record_data_version_seq")
+    op.add_column(
+        "record",
+        sa.Column(
+            "data_version", sa.BigInteger(), server_default="0", nullable=False
+        ),
+    )
+    op.execute(
+        """
+        ALTER TABLE record
+        ALTER COLUMN data_version SET DEFAULT nextval('record_data_version_seq');
+
+        CREATE OR REPLACE FUNCTION record_data_version_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF NEW.data IS DISTINCT FROM OLD.data THEN
+                NEW.data_version := nextval('record_data_version_seq');
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER record_data_version_update
+        BEFORE UPDATE OF data ON record
+        FOR EACH ROW EXECUTE FUNCTION record_data_version_trigger();
+        """
+    )
+    op.create_index(
+        "ix_record_project_id_data_version",
+        "record",
+        ["project_id", "data_version"],
+        unique=False,
+    )
+
+    op.create_table(
+        "information_source_run_state",
+        sa.Column(
+            "information_source_id", postgresql.UUID(as_uuid=True), nullable=False
+        ),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=True),
+        # hash of source code, lookup lists, tokenizer & labels of the run
+        sa.Column("run_key", sa.String(), nullable=True),
+        # highest record data version the run has seen
+        sa.Column("data_version", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["information_source_id"], ["information_source.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("information_source_id"),
+    )
+    op.create_index(
+        op.f("ix_information_source_run_state_project_id"),
+        "information_source_run_state",
+        ["project_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_information_source_run_state_project_id"),
+        table_name="information_source_run_state",
+    )
+    op.drop_table("information_source_run_state")
+    op.drop_index("ix_record_project_id_data_version", table_name="record")
+    op.execute(
+        """
+        DROP TRIGGER IF EXISTS record_data_version_update ON record;
+        DROP FUNCTION IF EXISTS record_data_version_trigger();
+        """
+    )
+    op.drop_column("record", "data_version")
+    op.execute("DROP SEQUENCE IF EXISTS record_data_version_seq")
@@ -0,0 +1,59 @@
+"""ensures the unique key of data slice record associations
+
+Revision ID: a1e5d7c3f962
+Revises: f3c8a6d2b917
+Create Date: 2026-10-20 16:25:44.093817
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "a1e5d7c3f962"
+down_revision = "f3c8a6d2b917"
+branch_labels = None
+depends_on = None
+
+CONSTRAINT_NAME = "uq_data_slice_record_association_data_slice_id_record_id"
+
+
+def upgrade():
+    # the batched slice refresh inserts with ON CONFLICT (data_slice_id, record_id)
+    # databases created from the initial revision have the primary key for it,
+    # any other database gets the key here (duplicates are removed first)
+    op.execute(
+        f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1
+                FROM pg_constraint c
+                WHERE c.conrelid = 'data_slice_record_association'::REGCLASS
+                    AND c.contype IN ('p', 'u')
+                    AND (
+                        SELECT array_agg(a.attname::TEXT ORDER BY a.attname)
+                        FROM pg_attribute a
+                        WHERE a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey)
+                    ) = ARRAY['data_slice_id', 'record_id']
+            ) THEN
+                DELETE FROM data_slice_record_association a
+                USING data_slice_record_association b
+                WHERE a.data_slice_id = b.data_slice_id
+                    AND a.record_id = b.record_id
+                    AND a.ctid > b.ctid;
+
+                ALTER TABLE data_slice_record_association
+                ADD CONSTRAINT {CONSTRAINT_NAME} UNIQUE (data_slice_id, record_id);
+            END IF;
+        END $$;
+        """
+    )
+
+
+def downgrade():
+    op.execute(
+        f"""
+        ALTER TABLE data_slice_record_association
+        DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}
+        """
+    )
@@ -0,0 +1,95 @@
+"""adds per project knowledge base versions maintained by triggers
+
+Revision ID: a7d41e9c5b20
+Revises: 3c91d5a7e2b4
+Create Date: 2026-10-19 11:40:05.512807
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "a7d41e9c5b20"
+down_revision = "3c91d5a7e2b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "knowledge_base_version",
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        # raised with every change of the project's lookup lists or terms
+        sa.Column("version", sa.BigInteger(), server_default="0", nullable=False),
+        # s3 object of the last uploaded knowledge base source
+        sa.Column("object_name", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("project_id"),
+    )
+
+    # statement level, bulk term imports raise the version once per project
+    # every writer (managers, label renames, project imports) is covered this way
+    # the join skips projects that are deleted in the same statement (cascades)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION knowledge_base_version_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO knowledge_base_version (project_id, version)
+                SELECT DISTINCT c.project_id, 1
+                FROM old_rows c
+                INNER JOIN project p
+                    ON c.project_id = p.id
+                ORDER BY c.project_id
+                ON CONFLICT (project_id) DO UPDATE
+                SET version = knowledge_base_version.version + 1;
+            ELSE
+                INSERT INTO knowledge_base_version (project_id, version)
+                SELECT DISTINCT c.project_id, 1
+                FROM new_rows c
+                INNER JOIN project p
+                    ON c.project_id = p.id
+                ORDER BY c.project_id
+                ON CONFLICT (project_id) DO UPDATE
+                SET version = knowledge_base_version.version + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    for table_name in ["knowledge_base", "knowledge_term"]:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table_name}_version_insert
+            AFTER INSERT ON {table_name}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_version_trigger();
+
+            CREATE TRIGGER {table_name}_version_update
+            AFTER UPDATE ON {table_name}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_version_trigger();
+
+            CREATE TRIGGER {table_name}_version_delete
+            AFTER DELETE ON {table_name}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_version_trigger();
+            """
+        )
+
+
+def downgrade():
+    for table_name in ["knowledge_base", "knowledge_term"]:
+        op.execute(
+            f"""
+            DROP TRIGGER IF EXISTS {table_name}_version_insert ON {table_name};
+            DROP TRIGGER IF EXISTS {table_name}_version_update ON {table_name};
+            DROP TRIGGER IF EXISTS {table_name}_version_delete ON {table_name};
+            """
+        )
+    op.execute("DROP FUNCTION IF EXISTS knowledge_base_version_trigger()")
+    op.drop_table("knowledge_base_version")
@@ -0,0 +1,111 @@
+"""adds per project data change log for search count caching
+
+Revision ID: b5e2c8d14f07
+Revises: a7d41e9c5b20
+Create Date: 2026-10-19 13:22:51.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "b5e2c8d14f07"
+down_revision = "a7d41e9c5b20"
+branch_labels = None
+depends_on = None
+
+# tables the search filters read from
+WATCHED_TABLES = [
+    "record",
+    "record_label_association",
+    "attribute",
+    "comment_data",
+    "data_slice_record_association",
+]
+
+
+def upgrade():
+    op.execute("CREATE SEQUENCE project_data_change_seq")
+    # append only, concurrent writers of a project never wait for each other
+    op.create_table(
+        "project_data_change",
+        sa.Column(
+            "id",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('project_data_change_seq')"),
+            nullable=False,
+        ),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_project_data_change_project_id_id",
+        "project_data_change",
+        ["project_id", "id"],
+        unique=False,
+    )
+
+    # statement level, a bulk write adds one row per project
+    # the join skips projects that are deleted in the same statement (cascades)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION project_data_change_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO project_data_change (project_id)
+                SELECT DISTINCT c.project_id
+                FROM old_rows c
+                INNER JOIN project p
+                    ON c.project_id = p.id;
+            ELSE
+                INSERT INTO project_data_change (project_id)
+                SELECT DISTINCT c.project_id
+                FROM new_rows c
+                INNER JOIN project p
+                    ON c.project_id = p.id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    for table_name in WATCHED_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table_name}_data_change_insert
+            AFTER INSERT ON {table_name}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION project_data_change_trigger();
+
+            CREATE TRIGGER {table_name}_data_change_update
+            AFTER UPDATE ON {table_name}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION project_data_change_trigger();
+
+            CREATE TRIGGER {table_name}_data_change_delete
+            AFTER DELETE ON {table_name}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION project_data_change_trigger();
+            """
+        )
+
+
+def downgrade():
+    for table_name in WATCHED_TABLES:
+        op.execute(
+            f"""
+            DROP TRIGGER IF EXISTS {table_name}_data_change_insert ON {table_name};
+            DROP TRIGGER IF EXISTS {table_name}_data_change_update ON {table_name};
+            DROP TRIGGER IF EXISTS {table_name}_data_change_delete ON {table_name};
+            """
+        )
+    op.execute("DROP FUNCTION IF EXISTS project_data_change_trigger()")
+    op.drop_index(
+        "ix_project_data_change_project_id_id", table_name="project_data_change"
+    )
+    op.drop_table("project_data_change")
+    op.execute("DROP SEQUENCE IF EXISTS project_data_change_seq")
@@ -0,0 +1,59 @@
+"""scopes the record data version lock to the project
+
+Revision ID: b8d3e5f1a274
+Revises: a1e5d7c3f962
+Create Date: 2026-10-21 10:14:36.552081
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b8d3e5f1a274"
+down_revision = "a1e5d7c3f962"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # writers hold a shared advisory lock of their project until commit and take the
+    # version only after it, a labeling function run waits for them with the
+    # exclusive lock (controller/payload/incremental.py) instead of locking record
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_data_version_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' OR NEW.data IS DISTINCT FROM OLD.data THEN
+                PERFORM pg_advisory_xact_lock_shared(
+                    hashtext('record_data_version'), hashtext(NEW.project_id::TEXT)
+                );
+                NEW.data_version := nextval('record_data_version_seq');
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER record_data_version_insert
+        BEFORE INSERT ON record
+        FOR EACH ROW EXECUTE FUNCTION record_data_version_trigger();
+        """
+    )
+
+
+def downgrade():
+    op.execute(
+        """
+        DROP TRIGGER IF EXISTS record_data_version_insert ON record;
+
+        CREATE OR REPLACE FUNCTION record_data_version_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF NEW.data IS DISTINCT FROM OLD.data THEN
+                NEW.data_version := nextval('record_data_version_seq');
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
@@ -0,0 +1,44 @@
+"""adds superseded knowledge base objects kept for queued runs
+
+Revision ID: c4f2a8e6d193
+Revises: b8d3e5f1a274
+Create Date: 2026-10-21 13:52:08.640317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "c4f2a8e6d193"
+down_revision = "b8d3e5f1a274"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # queued runs can still hold access links to a replaced source, the objects are
+    # deleted after a retention time (controller/knowledge_base/util.py)
+    op.create_table(
+        "knowledge_base_superseded_object",
+        sa.Column("object_name", sa.String(), nullable=False),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("superseded_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("object_name"),
+    )
+    op.create_index(
+        "ix_knowledge_base_superseded_object_project_id_superseded_at",
+        "knowledge_base_superseded_object",
+        ["project_id", "superseded_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_knowledge_base_superseded_object_project_id_superseded_at",
+        table_name="knowledge_base_superseded_object",
+    )
+    op.drop_table("knowledge_base_superseded_object")
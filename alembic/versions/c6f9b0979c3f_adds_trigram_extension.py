@@ -0,0 +1,40 @@
+"""adds trigram extension for the indexed text search
+
+Revision ID: c6f9b0979c3f
+Revises: f8c313f63a36
+Create Date: 2026-10-18 10:12:41.518203
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c6f9b0979c3f"
+down_revision = "f8c313f63a36"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the per project indexes themselves are created by the gateway
+    # (service/search/text_index.py) since they depend on the attributes
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+def downgrade():
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            index_name TEXT;
+        BEGIN
+            FOR index_name IN
+                SELECT indexname FROM pg_indexes
+                WHERE LEFT(indexname, 15) = 'ix_record_trgm_'
+            LOOP
+                EXECUTE 'DROP INDEX IF EXISTS ' || quote_ident(index_name);
+            END LOOP;
+        END $$;
+        """
+    )
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm")
@@ -0,0 +1,41 @@
+"""shares the trigram text indexes across projects
+
+Revision ID: d2a9f4c6e831
+Revises: b5e2c8d14f07
+Create Date: 2026-10-20 09:31:17.204655
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d2a9f4c6e831"
+down_revision = "b5e2c8d14f07"
+branch_labels = None
+depends_on = None
+
+DROP_TRIGRAM_INDEXES = """
+    DO $$
+    DECLARE
+        index_name TEXT;
+    BEGIN
+        FOR index_name IN
+            SELECT indexname FROM pg_indexes
+            WHERE LEFT(indexname, 15) = 'ix_record_trgm_'
+        LOOP
+            EXECUTE 'DROP INDEX IF EXISTS ' || quote_ident(index_name);
+        END LOOP;
+    END $$;
+    """
+
+
+def upgrade():
+    # project_id as leading gin column, one index per attribute name instead of one
+    # per project & attribute. The gateway recreates them (service/search/text_index.py)
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.execute(DROP_TRIGRAM_INDEXES)
+
+
+def downgrade():
+    op.execute(DROP_TRIGRAM_INDEXES)
+    op.execute("DROP EXTENSION IF EXISTS btree_gin")
@@ -0,0 +1,194 @@
+"""refreshes the record label summary from a queue of changed records
+
+Revision ID: e4b7c1d9a352
+Revises: d2a9f4c6e831
+Create Date: 2026-10-20 11:06:52.318420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "e4b7c1d9a352"
+down_revision = "d2a9f4c6e831"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE SEQUENCE record_label_summary_dirty_seq")
+    # append only without unique key or foreign key, queueing a record never waits
+    # for (or locks against) other transactions writing the same record
+    op.create_table(
+        "record_label_summary_dirty",
+        sa.Column(
+            "id",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('record_label_summary_dirty_seq')"),
+            nullable=False,
+        ),
+        sa.Column("record_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # the triggers only queue the records, the gateway refreshes the summary in short
+    # transactions (service/search/label_summary.py) so long imports hold no summary
+    # row locks. Placeholder rows are inserted & locked in record_id order
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_label_summary_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO record_label_summary_dirty (record_id)
+                SELECT DISTINCT record_id FROM new_rows;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO record_label_summary_dirty (record_id)
+                SELECT DISTINCT record_id FROM old_rows;
+            ELSE
+                INSERT INTO record_label_summary_dirty (record_id)
+                SELECT record_id FROM new_rows
+                UNION
+                SELECT record_id FROM old_rows;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    __replace_refresh_function("ORDER BY r.id")
+    # backfill of existing labels, queued per project & refreshed by the gateway in
+    # LABEL_SUMMARY_REFRESH_BATCH sized transactions
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            p_id UUID;
+        BEGIN
+            FOR p_id IN SELECT id FROM project ORDER BY id LOOP
+                INSERT INTO record_label_summary_dirty (record_id)
+                SELECT DISTINCT record_id
+                FROM record_label_association
+                WHERE project_id = p_id
+                ORDER BY record_id;
+            END LOOP;
+        END $$;
+        """
+    )
+
+
+def downgrade():
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_label_summary_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM refresh_record_label_summary(
+                    ARRAY(SELECT DISTINCT record_id FROM new_rows)
+                );
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM refresh_record_label_summary(
+                    ARRAY(SELECT DISTINCT record_id FROM old_rows)
+                );
+            ELSE
+                PERFORM refresh_record_label_summary(
+                    ARRAY(
+                        SELECT record_id FROM new_rows
+                        UNION
+                        SELECT record_id FROM old_rows
+                    )
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    __replace_refresh_function("")
+    # the synchronous triggers take over, queued records are refreshed per project
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            p_id UUID;
+        BEGIN
+            FOR p_id IN SELECT id FROM project ORDER BY id LOOP
+                PERFORM refresh_record_label_summary(
+                    ARRAY(
+                        SELECT DISTINCT d.record_id
+                        FROM record_label_summary_dirty d
+                        INNER JOIN record r
+                            ON r.id = d.record_id
+                        WHERE r.project_id = p_id
+                    )
+                );
+            END LOOP;
+        END $$;
+        """
+    )
+    op.drop_table("record_label_summary_dirty")
+    op.execute("DROP SEQUENCE IF EXISTS record_label_summary_dirty_seq")
+
+
+def __replace_refresh_function(insert_order: str) -> None:
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION refresh_record_label_summary(record_ids UUID[])
+        RETURNS VOID AS $$
+        BEGIN
+            -- locked placeholder rows serialize concurrent refreshes of a record,
+            -- the statements below see everything committed before the lock
+            INSERT INTO record_label_summary (record_id, project_id)
+            SELECT r.id, r.project_id
+            FROM record r
+            WHERE r.id = ANY(record_ids)
+            {insert_order}
+            ON CONFLICT DO NOTHING;
+
+            PERFORM 1
+            FROM record_label_summary
+            WHERE record_id = ANY(record_ids)
+            ORDER BY record_id
+            FOR UPDATE;
+
+            DELETE FROM record_label_summary rls
+            WHERE rls.record_id = ANY(record_ids)
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM record_label_association rla
+                    WHERE rla.record_id = rls.record_id
+                );
+
+            UPDATE record_label_summary rls
+            SET label_keys = agg.label_keys,
+                source_keys = agg.source_keys,
+                min_confidence = agg.min_confidence,
+                max_confidence = agg.max_confidence
+            FROM (
+                SELECT
+                    rla.record_id,
+                    COALESCE(array_agg(
+                        DISTINCT rla.source_type || ':' || rla.labeling_task_label_id
+                    ) FILTER (WHERE rla.labeling_task_label_id IS NOT NULL), '{{}}')
+                        label_keys,
+                    COALESCE(array_agg(
+                        DISTINCT rla.source_type || ':' || rla.source_id
+                    ) FILTER (WHERE rla.source_id IS NOT NULL), '{{}}') source_keys,
+                    MIN(rla.confidence) FILTER (
+                        WHERE rla.source_type = 'WEAK_SUPERVISION'
+                    ) min_confidence,
+                    MAX(rla.confidence) FILTER (
+                        WHERE rla.source_type = 'WEAK_SUPERVISION'
+                    ) max_confidence
+                FROM record_label_association rla
+                WHERE rla.record_id = ANY(record_ids)
+                GROUP BY rla.record_id
+            ) agg
+            WHERE rls.record_id = agg.record_id;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
@@ -0,0 +1,47 @@
+"""stores labeling session record ids per position
+
+Revision ID: f3c8a6d2b917
+Revises: e4b7c1d9a352
+Create Date: 2026-10-20 14:48:03.771592
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "f3c8a6d2b917"
+down_revision = "e4b7c1d9a352"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # windows are read by primary key range, no array is detoasted as a whole
+    op.create_table(
+        "user_session_record",
+        sa.Column("session_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("record_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["session_id"], ["user_sessions.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("session_id", "position"),
+    )
+    # null until the record ids are collected, existing sessions are collected
+    # again on their next use
+    op.add_column(
+        "user_sessions", sa.Column("record_count", sa.Integer(), nullable=True)
+    )
+    # record_ids & session_record_ids stay until the UserSessions model of the model
+    # submodule no longer maps them, they are dropped in a later revision
+    # their content isn't read anymore
+    op.execute(
+        "UPDATE user_sessions SET record_ids = NULL, session_record_ids = NULL"
+    )
+
+
+def downgrade():
+    op.drop_column("user_sessions", "record_count")
+    op.drop_table("user_session_record")
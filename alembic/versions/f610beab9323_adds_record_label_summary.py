@@ -0,0 +1,177 @@
+"""adds per record label summary maintained by triggers
+
+Revision ID: f610beab9323
+Revises: c6f9b0979c3f
+Create Date: 2026-10-18 14:03:27.912514
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "f610beab9323"
+down_revision = "c6f9b0979c3f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "record_label_summary",
+        sa.Column("record_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=True),
+        # "<source_type>:<labeling_task_label_id>"
+        sa.Column("label_keys", sa.ARRAY(sa.String()), nullable=True),
+        # "<source_type>:<source_id>"
+        sa.Column("source_keys", sa.ARRAY(sa.String()), nullable=True),
+        # weak supervision confidences
+        sa.Column("min_confidence", sa.Float(), nullable=True),
+        sa.Column("max_confidence", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["record_id"], ["record.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("record_id"),
+    )
+    op.create_index(
+        op.f("ix_record_label_summary_project_id"),
+        "record_label_summary",
+        ["project_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_record_label_summary_label_keys",
+        "record_label_summary",
+        ["label_keys"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_record_label_summary_source_keys",
+        "record_label_summary",
+        ["source_keys"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+    # every writer of record_label_association (gateway, weak supervision service,
+    # cascades of label & task deletions) keeps the summary current this way
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION refresh_record_label_summary(record_ids UUID[])
+        RETURNS VOID AS $$
+        BEGIN
+            -- locked placeholder rows serialize concurrent refreshes of a record,
+            -- the statements below see everything committed before the lock
+            INSERT INTO record_label_summary (record_id, project_id)
+            SELECT r.id, r.project_id
+            FROM record r
+            WHERE r.id = ANY(record_ids)
+            ON CONFLICT DO NOTHING;
+
+            PERFORM 1
+            FROM record_label_summary
+            WHERE record_id = ANY(record_ids)
+            ORDER BY record_id
+            FOR UPDATE;
+
+            DELETE FROM record_label_summary rls
+            WHERE rls.record_id = ANY(record_ids)
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM record_label_association rla
+                    WHERE rla.record_id = rls.record_id
+                );
+
+            UPDATE record_label_summary rls
+            SET label_keys = agg.label_keys,
+                source_keys = agg.source_keys,
+                min_confidence = agg.min_confidence,
+                max_confidence = agg.max_confidence
+            FROM (
+                SELECT
+                    rla.record_id,
+                    COALESCE(array_agg(
+                        DISTINCT rla.source_type || ':' || rla.labeling_task_label_id
+                    ) FILTER (WHERE rla.labeling_task_label_id IS NOT NULL), '{}')
+                        label_keys,
+                    COALESCE(array_agg(
+                        DISTINCT rla.source_type || ':' || rla.source_id
+                    ) FILTER (WHERE rla.source_id IS NOT NULL), '{}') source_keys,
+                    MIN(rla.confidence) FILTER (
+                        WHERE rla.source_type = 'WEAK_SUPERVISION'
+                    ) min_confidence,
+                    MAX(rla.confidence) FILTER (
+                        WHERE rla.source_type = 'WEAK_SUPERVISION'
+                    ) max_confidence
+                FROM record_label_association rla
+                WHERE rla.record_id = ANY(record_ids)
+                GROUP BY rla.record_id
+            ) agg
+            WHERE rls.record_id = agg.record_id;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION record_label_summary_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM refresh_record_label_summary(
+                    ARRAY(SELECT DISTINCT record_id FROM new_rows)
+                );
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM refresh_record_label_summary(
+                    ARRAY(SELECT DISTINCT record_id FROM old_rows)
+                );
+            ELSE
+                PERFORM refresh_record_label_summary(
+                    ARRAY(
+                        SELECT record_id FROM new_rows
+                        UNION
+                        SELECT record_id FROM old_rows
+                    )
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER record_label_summary_insert
+        AFTER INSERT ON record_label_association
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_label_summary_trigger();
+
+        CREATE TRIGGER record_label_summary_update
+        AFTER UPDATE ON record_label_association
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_label_summary_trigger();
+
+        CREATE TRIGGER record_label_summary_delete
+        AFTER DELETE ON record_label_association
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_label_summary_trigger();
+        """
+    )
+    # existing records are backfilled through the refresh queue (e4b7c1d9a352)
+
+
+def downgrade():
+    op.execute(
+        """
+        DROP TRIGGER IF EXISTS record_label_summary_insert ON record_label_association;
+        DROP TRIGGER IF EXISTS record_label_summary_update ON record_label_association;
+        DROP TRIGGER IF EXISTS record_label_summary_delete ON record_label_association;
+        DROP FUNCTION IF EXISTS record_label_summary_trigger();
+        DROP FUNCTION IF EXISTS refresh_record_label_summary(UUID[]);
+        """
+    )
+    op.drop_index(
+        "ix_record_label_summary_source_keys", table_name="record_label_summary"
+    )
+    op.drop_index(
+        "ix_record_label_summary_label_keys", table_name="record_label_summary"
+    )
+    op.drop_index(
+        op.f("ix_record_label_summary_project_id"), table_name="record_label_summary"
+    )
+    op.drop_table("record_label_summary")
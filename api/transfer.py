@@ -1,9 +1,10 @@
 import logging
 import traceback
 import time
-from typing import Optional
+import json
+from typing import Iterator, Optional
 from starlette.endpoints import HTTPEndpoint
-from starlette.responses import PlainTextResponse, JSONResponse
+from starlette.responses import PlainTextResponse, JSONResponse, StreamingResponse
 from controller.embedding.manager import recreate_embeddings
 
 from controller.transfer.cognition import (
@@ -113,7 +114,22 @@ class FileExport(HTTPEndpoint):
         except exceptions.AccessDeniedException:
             return JSONResponse({"error": "Access denied"}, status_code=403)
         result = transfer_manager.export_records(project_id, num_samples)
-        return JSONResponse(result)
+        if result is None:
+            return JSONResponse(result)
+        # same body as JSONResponse(json_string), but without building it in memory
+        return StreamingResponse(
+            stream_as_json_string(result), media_type="application/json"
+        )
+
+
+def stream_as_json_string(pieces: Iterator[str]) -> Iterator[str]:
+    # errors after the response started can't change the status anymore. They are
+    # raised on purpose, the server then aborts the chunked body and clients see an
+    # incomplete response instead of a truncated 200
+    yield '"'
+    for piece in pieces:
+        yield json.dumps(piece, ensure_ascii=False)[1:-1]
+    yield '"'
 
 
 class KnowledgeBaseExport(HTTPEndpoint):
@@ -40,6 +40,8 @@ from starlette.applications import Starlette
 from starlette.routing import Route, Mount
 
 from controller.project.manager import check_in_deletion_projects
+from controller.payload import container_pool
+from service.search import label_summary, text_index
 from route_prefix import (
     PREFIX_ORGANIZATION,
     PREFIX_PROJECT,
@@ -156,3 +158,6 @@ clean_up.clean_up_disk()
 
 session.start_session_cleanup_thread()
 log_storage.start_persist_thread()
+container_pool.start_pool_thread()
+text_index.start_index_thread()
+label_summary.start_refresh_thread()
@@ -22,6 +22,7 @@ from submodules.model import daemon
 
 from controller.task_master import manager as task_master_manager
 from submodules.model.enums import TaskType
+from service.search import text_index
 from . import util
 from sqlalchemy import sql
 
@@ -137,6 +138,8 @@ def delete_attribute(project_id: str, attribute_id: str) -> None:
         attribute.delete(project_id, attribute_id, with_commit=True)
         if is_usable and not is_text_attribute:
             request_reupload_docbins(project_id)
+        if is_usable and is_text_attribute:
+            daemon.run_without_db_token(text_index.sync_text_indexes)
         notification.send_organization_update(
             project_id=project_id, message=f"calculate_attribute:deleted:{attribute_id}"
         )
@@ -369,6 +372,8 @@ def __calculate_user_attribute_all_records(
         with_commit=True,
         finished_at=sql.func.now(),
     )
+    if attribute_item.data_type == DataTypes.TEXT.value:
+        daemon.run_without_db_token(text_index.sync_text_indexes)
 
     notification.send_organization_update(
         project_id, f"calculate_attribute:finished:{attribute_id}"
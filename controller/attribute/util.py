@@ -1,4 +1,3 @@
-import time
 from typing import Any, List
 import uuid
 import docker
@@ -7,7 +6,6 @@ import os
 import pytz
 
 import datetime
-from dateutil import parser
 
 from submodules.model.business_objects import (
     attribute,
@@ -16,20 +14,18 @@ from submodules.model.business_objects import (
     project,
     tokenization,
 )
+from submodules.model import enums
 from submodules.model.models import Attribute
 from submodules.s3 import controller as s3
-from util import notification
+from util import container_log_stream, notification
 from controller.knowledge_base import util as knowledge_base
-from submodules.model import enums
-from submodules.model import daemon
+from controller.payload import run_scheduler
 
 client = docker.from_env()
 image = os.getenv("AC_EXEC_ENV_IMAGE")
 exec_env_network = os.getenv("LF_NETWORK")
 __tz = pytz.timezone("Europe/Berlin")
 
-__containers_running = {}
-
 
 def add_log_to_attribute_logs(
     project_id: str, attribute_id: str, log: str, append_to_logs: bool = True
@@ -86,7 +82,6 @@ def run_attribute_calculation_exec_env(
 
     prefixed_function_name = f"{attribute_id}_fn"
     prefixed_payload = f"{attribute_id}_payload.json"
-    prefixed_knowledge_base = f"{attribute_id}_knowledge"
     project_item = project.get(project_id)
     org_id = str(project_item.organization_id)
 
@@ -95,64 +90,87 @@ def run_attribute_calculation_exec_env(
         project_id + "/" + prefixed_function_name,
         attribute_item.source_code,
     )
-    s3.put_object(
-        org_id,
-        project_id + "/" + prefixed_knowledge_base,
-        knowledge_base.build_knowledge_base_from_project(project_id),
+    knowledge_base_object = knowledge_base.get_knowledge_base_object(
+        org_id, project_id
     )
     command = [
         s3.create_access_link(org_id, project_id + "/" + doc_bin),
         s3.create_access_link(org_id, project_id + "/" + prefixed_function_name),
-        s3.create_access_link(org_id, project_id + "/" + prefixed_knowledge_base),
+        s3.create_access_link(org_id, knowledge_base_object),
         project_item.tokenizer_blank,
         s3.create_file_upload_link(org_id, project_id + "/" + prefixed_payload),
         attribute_item.data_type,
     ]
 
-    container_name = str(uuid.uuid4())
-    container = client.containers.create(
-        image=image,
-        command=command,
-        auto_remove=True,
-        detach=True,
-        network=exec_env_network,
-    )
-    set_progress(project_id, attribute_item, 0.05)
-    __containers_running[container_name] = True
-    daemon.run_without_db_token(
-        read_container_logs_thread,
-        project_id,
-        container_name,
-        str(attribute_item.id),
-        container,
+    priority = (
+        run_scheduler.PRIORITY_BULK
+        if doc_bin == "docbin_full"
+        else run_scheduler.PRIORITY_INTERACTIVE
     )
-    container.start()
-    attribute_item.logs = [
-        line.decode("utf-8").strip("\n")
-        for line in container.logs(
-            stream=True, stdout=True, stderr=True, timestamps=True
+    with run_scheduler.run_slot(org_id, "attribute_calculation", priority):
+        container = client.containers.create(
+            image=image,
+            command=command,
+            name=str(uuid.uuid4()),
+            auto_remove=True,
+            detach=True,
+            network=exec_env_network,
+            **run_scheduler.container_limits(),
         )
-        if "progress" not in line.decode("utf-8")
-    ]
-    del __containers_running[container_name]
+        set_progress(project_id, attribute_item, 0.05)
+        container.start()
+        attribute_item.logs = container_log_stream.consume_output(
+            container_log_stream.follow_container_output(container),
+            on_progress=lambda progress: set_progress(
+                project_id, attribute_item, progress * 0.8 + 0.05
+            ),
+            on_logs=lambda logs: extend_logs(project_id, attribute_item, logs),
+            should_stop=lambda: __is_deleted_or_failed(project_id, attribute_id),
+        )
+        is_stopped = __is_deleted_or_failed(project_id, attribute_id)
+        if is_stopped:
+            __kill_container(container)
 
-    try:
-        payload = s3.get_object(org_id, project_id + "/" + prefixed_payload)
-        calculated_attributes = json.loads(payload)
-    except Exception:
-        print("Could not grab data from s3 -- attribute calculation")
-        calculated_attributes = {}
+    calculated_attributes = {}
+    if not is_stopped:
+        try:
+            payload = s3.get_object(org_id, project_id + "/" + prefixed_payload)
+            calculated_attributes = json.loads(payload)
+        except Exception:
+            print("Could not grab data from s3 -- attribute calculation")
 
     if not doc_bin == "docbin_full":
         # sample records docbin should be deleted after calculation
         s3.delete_object(org_id, project_id + "/" + doc_bin)
     s3.delete_object(org_id, project_id + "/" + prefixed_function_name)
     s3.delete_object(org_id, project_id + "/" + prefixed_payload)
+    if is_stopped:
+        return calculated_attributes
     set_progress(project_id, attribute_item, 0.9)
 
     return calculated_attributes
 
 
+def __is_deleted_or_failed(project_id: str, attribute_id: str) -> bool:
+    # read past the session's identity map, the state is changed by other requests
+    row = general.execute_first(
+        f"""
+        SELECT state
+        FROM attribute
+        WHERE project_id = '{project_id}' AND id = '{attribute_id}'
+        """
+    )
+    return not row or row[0] == enums.AttributeState.FAILED.value
+
+
+def __kill_container(container: Any) -> None:
+    try:
+        container.kill()
+    except docker.errors.APIError:
+        # already exited (auto_remove)
+        pass
+
+
 def extend_logs(
     project_id: str,
     attribute: Attribute,
@@ -174,67 +192,6 @@ def extend_logs(
     )
 
 
-def read_container_logs_thread(
-    project_id: str,
-    name: str,
-    attribute_id: str,
-    docker_container: Any,
-) -> None:
-    ctx_token = general.get_ctx_token()
-    # needs to be refetched since it is not thread safe
-    attribute_item = attribute.get(project_id, attribute_id)
-    previous_progress = -1
-    last_timestamp = None
-    c = 0
-    while name in __containers_running:
-        time.sleep(1)
-        c += 1
-        if c > 100:
-            ctx_token = general.remove_and_refresh_session(ctx_token, True)
-        attribute_item = attribute.get(project_id, attribute_id)
-        if not attribute_item:
-            break
-        if attribute_item.state == enums.AttributeState.FAILED.value:
-            break
-        if name not in __containers_running:
-            break
-        try:
-            # timestamps included to filter out logs that have already been read
-            log_lines = docker_container.logs(
-                stdout=True,
-                stderr=True,
-                timestamps=True,
-                since=last_timestamp,
-            )
-        except Exception:
-            # failsafe for containers that shut down during the read
-            break
-        current_logs = [
-            ll
-            for ll in str(log_lines.decode("utf-8")).split("\n")
-            if len(ll.strip()) > 0
-        ]
-        if len(current_logs) == 0:
-            continue
-        last_entry = current_logs[-1]
-        last_timestamp_str = last_entry.split(" ")[0]
-        last_timestamp = parser.parse(last_timestamp_str).replace(
-            tzinfo=None
-        ) + datetime.timedelta(seconds=1)
-        non_progress_logs = [ll for ll in current_logs if "progress" not in ll]
-        progress_logs = [ll for ll in current_logs if "progress" in ll]
-        if len(non_progress_logs) > 0:
-            extend_logs(project_id, attribute_item, non_progress_logs)
-        if len(progress_logs) == 0:
-            continue
-        last_entry = float(progress_logs[-1].split("progress: ")[1].strip())
-        if previous_progress == last_entry:
-            continue
-        previous_progress = last_entry
-        set_progress(project_id, attribute_item, last_entry * 0.8 + 0.05)
-    general.remove_and_refresh_session(ctx_token)
-
-
 def set_progress(
     project_id: str,
     attribute: Attribute,
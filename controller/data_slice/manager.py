@@ -1,6 +1,11 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
-from submodules.model import DataSlice
+import os
+import traceback
+from contextlib import contextmanager
+from threading import Lock
+
+from submodules.model import DataSlice, daemon
 from submodules.model import enums
 from submodules.model.business_objects import general, data_slice, embedding
 import uuid
@@ -8,6 +13,14 @@ from service.search import search
 from controller.data_slice import neural_search_connector
 from submodules.model.enums import SliceTypes
 from controller.labeling_access_link import manager as link_manager
+from util import notification
+
+# records written to (or removed from) a static slice per transaction
+SLICE_ASSOCIATION_BATCH_SIZE = int(os.getenv("SLICE_ASSOCIATION_BATCH_SIZE", "10000"))
+
+# refreshes of one slice run in sequence
+__slice_locks = {}  # {data_slice_id: [Lock, running & waiting refreshes]}
+__THREAD_LOCK = Lock()
 
 
 def get_all_data_slices(
@@ -32,29 +45,169 @@ def count_items(project_id: str, data_slice_id: str) -> int:
 
 
 def __create_data_slice_record_associations(
-    project_id: str, data_slice_id: str, filter_data: List[Dict[str, Any]]
+    project_id: str,
+    data_slice_id: str,
+    filter_data: List[Dict[str, Any]],
+    in_background: bool = True,
+    is_update: bool = False,
 ) -> None:
-    count_sql: str = search.generate_count_sql(project_id, filter_data)
-    count: int = general.execute_distinct_count(count_sql)
-
-    if count > 10000:
-        raise Exception("Too many records for static slice.")
-
-    data_slice.delete_associations(project_id, data_slice_id, with_commit=True)
-    insert_statement: str = (
-        search.generate_data_slice_record_associations_insert_statement(
-            project_id, filter_data, data_slice_id
-        )
-    )
-    general.execute(insert_statement)
+    # the filter is stored right away, the count once the associations are written
     data_slice.update_data_slice(
         project_id,
         data_slice_id,
         filter_data=filter_data,
-        count=count,
-        count_sql=count_sql,
+        count_sql=search.generate_count_sql(project_id, filter_data),
         with_commit=True,
     )
+    if in_background:
+        daemon.run_without_db_token(
+            __refresh_data_slice_record_associations_in_background,
+            project_id,
+            str(data_slice_id),
+            filter_data,
+            is_update,
+        )
+    else:
+        __refresh_data_slice_record_associations(
+            project_id, str(data_slice_id), filter_data, is_update
+        )
+
+
+def __refresh_data_slice_record_associations_in_background(
+    project_id: str,
+    data_slice_id: str,
+    filter_data: List[Dict[str, Any]],
+    is_update: bool,
+) -> None:
+    ctx_token = general.get_ctx_token()
+    try:
+        __refresh_data_slice_record_associations(
+            project_id, data_slice_id, filter_data, is_update
+        )
+    except Exception:
+        print(traceback.format_exc(), flush=True)
+        general.rollback()
+    finally:
+        general.remove_and_refresh_session(ctx_token)
+
+
+def __refresh_data_slice_record_associations(
+    project_id: str,
+    data_slice_id: str,
+    filter_data: List[Dict[str, Any]],
+    is_update: bool,
+) -> None:
+    # walks the filter result in record id order and brings each id range of the
+    # slice up to date, so only the delta to the previous filter is written
+    with __slice_lock(data_slice_id):
+        expected = general.execute_distinct_count(
+            search.generate_count_sql(project_id, filter_data)
+        )
+        after_record_id = None
+        processed = 0
+        while True:
+            batch_sql = search.generate_record_id_batch_sql(
+                project_id, filter_data, after_record_id, SLICE_ASSOCIATION_BATCH_SIZE
+            )
+            record_ids = [str(row[0]) for row in general.execute_all(batch_sql)]
+            is_last = len(record_ids) < SLICE_ASSOCIATION_BATCH_SIZE
+            last_record_id = None if is_last else record_ids[-1]
+            __sync_association_range(
+                project_id, data_slice_id, record_ids, after_record_id, last_record_id
+            )
+            processed += len(record_ids)
+            # synced ranges plus the not yet synced associations of the old filter
+            count = processed
+            if last_record_id:
+                count += __count_associations_after(
+                    project_id, data_slice_id, last_record_id
+                )
+            # same transaction as the batch, the count always matches the slice
+            data_slice.update_data_slice(
+                project_id, data_slice_id, count=count, with_commit=True
+            )
+            if is_last:
+                break
+            after_record_id = last_record_id
+            notification.send_organization_update(
+                project_id,
+                f"data_slice_progress:{data_slice_id}:"
+                f"{min(processed / max(expected, 1), 1):.2f}",
+            )
+    if is_update:
+        link_manager.set_changed_for(
+            project_id, enums.LinkTypes.DATA_SLICE, data_slice_id
+        )
+    notification.send_organization_update(
+        project_id, f"data_slice_updated:{data_slice_id}"
+    )
+
+
+def __sync_association_range(
+    project_id: str,
+    data_slice_id: str,
+    record_ids: List[str],
+    after_record_id: Optional[str],
+    last_record_id: Optional[str],
+) -> None:
+    # record_ids are all filter matches in (after_record_id, last_record_id], without
+    # last_record_id the range is open-ended (last batch)
+    range_condition = ""
+    if after_record_id:
+        range_condition += f" AND record_id > '{after_record_id}'"
+    if last_record_id:
+        range_condition += f" AND record_id <= '{last_record_id}'"
+    id_array = "ARRAY[" + ", ".join(f"'{r}'" for r in record_ids) + "]::UUID[]"
+    general.execute(
+        f"""
+        DELETE FROM data_slice_record_association
+        WHERE project_id = '{project_id}'
+            AND data_slice_id = '{data_slice_id}'
+            {range_condition}
+            AND NOT record_id = ANY({id_array})
+        """
+    )
+    if not record_ids:
+        return
+    general.execute(
+        f"""
+        INSERT INTO data_slice_record_association (data_slice_id, record_id, project_id)
+        SELECT '{data_slice_id}', UNNEST({id_array}), '{project_id}'
+        ON CONFLICT (data_slice_id, record_id) DO NOTHING
+        """
+    )
+
+
+def __count_associations_after(
+    project_id: str, data_slice_id: str, record_id: str
+) -> int:
+    return general.execute_first(
+        f"""
+        SELECT COUNT(*)
+        FROM data_slice_record_association
+        WHERE project_id = '{project_id}'
+            AND data_slice_id = '{data_slice_id}'
+            AND record_id > '{record_id}'
+        """
+    )[0]
+
+
+@contextmanager
+def __slice_lock(data_slice_id: str) -> Iterator[None]:
+    # entries are removed once no refresh of the slice runs or waits anymore
+    with __THREAD_LOCK:
+        if data_slice_id not in __slice_locks:
+            __slice_locks[data_slice_id] = [Lock(), 0]
+        entry = __slice_locks[data_slice_id]
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with __THREAD_LOCK:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del __slice_locks[data_slice_id]
 
 
 def create_data_slice(
@@ -66,6 +219,7 @@ def create_data_slice(
     static: bool,
     slice_type: Optional[str] = None,
     info: Optional[Dict[str, Any]] = None,
+    in_background: bool = True,
 ) -> DataSlice:
 
     if slice_type is None:
@@ -87,7 +241,7 @@ def create_data_slice(
     )
     if static:
         __create_data_slice_record_associations(
-            project_id, data_slice_item.id, filter_data
+            project_id, data_slice_item.id, filter_data, in_background
         )
         link_manager.generate_data_slice_access_link(
             project_id, user_id, data_slice_item.id
@@ -103,9 +257,8 @@ def update_data_slice(
     static: bool,
 ) -> None:
     if static:
-        __create_data_slice_record_associations(project_id, data_slice_id, filter_data)
-        link_manager.set_changed_for(
-            project_id, enums.LinkTypes.DATA_SLICE, data_slice_id
+        __create_data_slice_record_associations(
+            project_id, data_slice_id, filter_data, is_update=True
         )
 
     data_slice.update_data_slice(
@@ -152,6 +305,8 @@ def create_outlier_slice(project_id: str, user_id: str, embedding_id: str) -> Da
         static=True,
         slice_type=SliceTypes.STATIC_OUTLIER.value,
         info=info,
+        # the outlier scores are written to the associations right after
+        in_background=False,
     )
     data_slice.update_data_slice_record_association_outlier_scores(
         project_id, data_slice_item.id, outlier_ids, outlier_scores, with_commit=True
@@ -1,5 +1,25 @@
-from submodules.model.business_objects import knowledge_base, knowledge_term
+from typing import List, Tuple
+
+import os
 import re
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+
+from submodules.model.business_objects import general, knowledge_base, knowledge_term
+from submodules.s3 import controller as s3
+from util import sql_helper
+
+# number of projects whose generated knowledge base source is kept in memory
+KNOWLEDGE_BASE_CACHE_SIZE = int(os.getenv("KNOWLEDGE_BASE_CACHE_SIZE", "20"))
+# replaced knowledge base objects are kept this long, runs queued before the change
+# still hold access links to them
+KNOWLEDGE_BASE_OBJECT_RETENTION = int(
+    os.getenv("KNOWLEDGE_BASE_OBJECT_RETENTION", "24")
+)  # hours
+
+__source_cache = OrderedDict()  # {project_id: (version, source, sha256)}
+__THREAD_LOCK = Lock()
 
 
 def find_free_name(project_id: str, counter: int = 0) -> str:
@@ -18,8 +38,127 @@ def create_knowledge_base_if_not_existing(name: str, project_id: str) -> None:
 
 
 def build_knowledge_base_from_project(project_id: str) -> str:
+    return __get_cached_source(str(project_id))[0]
+
+
+def get_knowledge_base_object(org_id: str, project_id: str) -> str:
+    """Returns the s3 object name of the project's knowledge base source.
+
+    Objects are content addressed, so unchanged lookup lists are uploaded once and
+    reused by all following runs. Don't delete them after a run, others may still
+    use them. Replaced objects are removed KNOWLEDGE_BASE_OBJECT_RETENTION hours
+    later.
+    """
+    project_id = str(project_id)
+    knowledge_base_source, source_hash = __get_cached_source(project_id)
+    object_name = f"{project_id}/knowledge_base_{source_hash}"
+    if not s3.object_exists(org_id, object_name):
+        s3.put_object(org_id, object_name, knowledge_base_source)
+    for expired_object_name in __swap_object_name(project_id, object_name):
+        s3.delete_object(org_id, expired_object_name)
+    return object_name
+
+
+def __get_version(project_id: str) -> int:
+    # raised by triggers with every lookup list or term change, in any process
+    version = general.execute_first(
+        f"""
+        SELECT version
+        FROM knowledge_base_version
+        WHERE project_id = '{project_id}'
+        """
+    )
+    return version[0] if version else 0
+
+
+def __swap_object_name(project_id: str, object_name: str) -> List[str]:
+    # stores the current object & returns the replaced objects past their retention,
+    # own transaction so the caller's session isn't committed
+    parameters = {
+        "project_id": project_id,
+        "object_name": object_name,
+        "retention": f"{KNOWLEDGE_BASE_OBJECT_RETENTION} hours",
+    }
+    with sql_helper.raw_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            INSERT INTO knowledge_base_version (project_id)
+            VALUES (%(project_id)s)
+            ON CONFLICT (project_id) DO NOTHING
+            """,
+            parameters,
+        )
+        cursor.execute(
+            """
+            SELECT object_name
+            FROM knowledge_base_version
+            WHERE project_id = %(project_id)s
+            FOR UPDATE
+            """,
+            parameters,
+        )
+        previous_object_name = cursor.fetchone()[0]
+        if previous_object_name != object_name:
+            cursor.execute(
+                """
+                UPDATE knowledge_base_version
+                SET object_name = %(object_name)s
+                WHERE project_id = %(project_id)s
+                """,
+                parameters,
+            )
+            if previous_object_name:
+                cursor.execute(
+                    """
+                    INSERT INTO knowledge_base_superseded_object (
+                        object_name, project_id, superseded_at
+                    )
+                    VALUES (%(previous_object_name)s, %(project_id)s, NOW())
+                    ON CONFLICT (object_name) DO UPDATE
+                    SET superseded_at = EXCLUDED.superseded_at
+                    """,
+                    {**parameters, "previous_object_name": previous_object_name},
+                )
+        # the current object can be a replaced one again (reverted lookup lists)
+        cursor.execute(
+            """
+            DELETE FROM knowledge_base_superseded_object
+            WHERE project_id = %(project_id)s
+                AND (
+                    object_name = %(object_name)s
+                    OR superseded_at < NOW() - %(retention)s::INTERVAL
+                )
+            RETURNING object_name
+            """,
+            parameters,
+        )
+        expired = [row[0] for row in cursor.fetchall() if row[0] != object_name]
+    return expired
+
+
+def __get_cached_source(project_id: str) -> Tuple[str, str]:
+    version = __get_version(project_id)
+    with __THREAD_LOCK:
+        cached = __source_cache.get(project_id)
+        if cached and cached[0] == version:
+            __source_cache.move_to_end(project_id)
+            return cached[1:]
+
+    # a change during the build is stored with the older version, the next call
+    # reads the newer version and rebuilds
+    knowledge_base_source = __build_knowledge_base_source(project_id)
+    source_hash = hashlib.sha256(knowledge_base_source.encode("utf-8")).hexdigest()
+    with __THREAD_LOCK:
+        __source_cache[project_id] = (version, knowledge_base_source, source_hash)
+        __source_cache.move_to_end(project_id)
+        while len(__source_cache) > KNOWLEDGE_BASE_CACHE_SIZE:
+            __source_cache.popitem(last=False)
+    return knowledge_base_source, source_hash
+
+
+def __build_knowledge_base_source(project_id: str) -> str:
     knowledge_bases_dict = {}
-    knowledge_base_source: str = ""
 
     for knowledge_base_item in knowledge_base.get_all_by_project_id(project_id):
         knowledge_bases_dict[resolve_name_as_variable(knowledge_base_item.name)] = []
@@ -30,16 +169,18 @@ def build_knowledge_base_from_project(project_id: str) -> str:
         # use here knowledge base name in standard format (underscore and )
         knowledge_bases_dict[resolve_name_as_variable(knowledge_base_name)].append(term)
 
+    # parts are joined once at the end, repeated concatenation is quadratic
+    parts = []
     for knowledge_base_item, values in knowledge_bases_dict.items():
-        knowledge_base_source += f"\n{knowledge_base_item} = [\n"
+        parts.append(f"\n{knowledge_base_item} = [\n")
         for value in values:
             # e.g. "You're too good to me"
             value: str = value.replace("'", "\\'")
             # safety net: knowledge entries are single line, linebreaks can only come through extraction task auto generation which now should remove linebreaks
             value = value.replace("\n", " ").replace("\r", "")
-            knowledge_base_source += f"\t'{value}',\n"
-        knowledge_base_source += "]"
-    return knowledge_base_source
+            parts.append(f"\t'{value}',\n")
+        parts.append("]")
+    return "".join(parts)
 
 
 def resolve_name_as_variable(name: str, prefix: str = "_") -> str:
@@ -0,0 +1,191 @@
+from typing import Any, Iterator, List, Optional
+
+import os
+import time
+import uuid
+import datetime
+import traceback
+from threading import Lock
+
+import docker
+
+from submodules.model import daemon
+from controller.payload import run_scheduler
+
+client = docker.from_env()
+exec_env_network = os.getenv("LF_NETWORK")
+
+# number of pre-started workers kept per exec env image, 0 disables the pool
+POOL_SIZE = int(os.getenv("EXEC_ENV_POOL_SIZE", "0"))
+# seconds an unused worker is kept before it is removed
+POOL_IDLE_TIMEOUT = int(os.getenv("EXEC_ENV_POOL_IDLE_TIMEOUT", "600"))
+POOLED_IMAGES = [
+    image
+    for image in [os.getenv("LF_EXEC_ENV_IMAGE"), os.getenv("ML_EXEC_ENV_IMAGE")]
+    if image
+]
+
+# workers are kept alive with a no-op process, the exec env entrypoint itself is
+# only started once a payload is handed over (docker exec)
+__IDLE_ENTRYPOINT = ["tail", "-f", "/dev/null"]
+__POOL_LABEL = "refinery.exec_env_pool"
+__EVICTION_INTERVAL = 60  # seconds
+
+__idle_workers = {}  # {image: List[Dict[str, Any]]} -> {"container", "idle_since"}
+__workers_starting = {}  # {image: int}
+__entrypoints = {}  # {image: List[str]}
+__THREAD_LOCK = Lock()
+
+
+def is_enabled() -> bool:
+    return POOL_SIZE > 0
+
+
+def start_pool_thread() -> None:
+    if not is_enabled():
+        return
+    __remove_orphaned_workers()
+    for image in POOLED_IMAGES:
+        daemon.run_without_db_token(__fill_pool, image)
+    daemon.run_without_db_token(__evict_idle_workers_loop)
+
+
+def acquire_worker(image: str) -> Optional[Any]:
+    """Returns a running worker for the image or None if the pool can't serve one.
+
+    A worker is handed out exactly once. After the run it is removed with
+    release_worker, so no file system state or process leaks into the next run.
+    """
+    if not is_enabled() or image not in POOLED_IMAGES:
+        return None
+    worker = None
+    stale = []
+    with __THREAD_LOCK:
+        workers = __idle_workers.get(image, [])
+        while workers:
+            candidate = workers.pop(0)["container"]
+            if __is_running(candidate):
+                worker = candidate
+                break
+            stale.append(candidate)
+    for container in stale:
+        __remove_container(container)
+    # refill in the background so the next run finds a started worker again
+    daemon.run_without_db_token(__fill_pool, image)
+    return worker
+
+
+def release_worker(worker: Any) -> None:
+    daemon.run_without_db_token(__remove_container, worker)
+
+
+def stream_exec(worker: Any, image: str, command: List[str]) -> Iterator[str]:
+    # lines are prefixed with a timestamp to match container.logs(timestamps=True)
+    exec_item = client.api.exec_create(
+        worker.id, cmd=__get_entrypoint(image) + command, stdout=True, stderr=True
+    )
+    buffer = b""
+    for chunk in client.api.exec_start(exec_item["Id"], stream=True):
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield __with_timestamp(line)
+    if buffer:
+        yield __with_timestamp(buffer)
+
+
+def __with_timestamp(line: bytes) -> str:
+    now = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return f"{now} {line.decode('utf-8').strip()}"
+
+
+def __get_entrypoint(image: str) -> List[str]:
+    if image not in __entrypoints:
+        entrypoint = client.images.get(image).attrs["Config"].get("Entrypoint")
+        __entrypoints[image] = list(entrypoint) if entrypoint else []
+    return __entrypoints[image]
+
+
+def __fill_pool(image: str) -> None:
+    with __THREAD_LOCK:
+        missing = (
+            POOL_SIZE
+            - len(__idle_workers.get(image, []))
+            - __workers_starting.get(image, 0)
+        )
+        if missing <= 0:
+            return
+        __workers_starting[image] = __workers_starting.get(image, 0) + missing
+
+    for _ in range(missing):
+        try:
+            container = client.containers.run(
+                image=image,
+                entrypoint=__IDLE_ENTRYPOINT,
+                name=f"exec-env-pool-{uuid.uuid4()}",
+                detach=True,
+                auto_remove=True,
+                network=exec_env_network,
+                labels={__POOL_LABEL: "true"},
+                **run_scheduler.container_limits(),
+            )
+            with __THREAD_LOCK:
+                __idle_workers.setdefault(image, []).append(
+                    {"container": container, "idle_since": time.time()}
+                )
+        except Exception:
+            print(traceback.format_exc(), flush=True)
+        finally:
+            with __THREAD_LOCK:
+                __workers_starting[image] -= 1
+
+
+def __evict_idle_workers_loop() -> None:
+    while True:
+        time.sleep(__EVICTION_INTERVAL)
+        try:
+            __evict_idle_workers()
+        except Exception:
+            print(traceback.format_exc(), flush=True)
+
+
+def __evict_idle_workers() -> None:
+    # evicted workers aren't replaced directly, the next acquire refills the pool
+    threshold = time.time() - POOL_IDLE_TIMEOUT
+    to_remove = []
+    with __THREAD_LOCK:
+        for image, workers in __idle_workers.items():
+            to_remove += [
+                w["container"] for w in workers if w["idle_since"] < threshold
+            ]
+            __idle_workers[image] = [
+                w for w in workers if w["idle_since"] >= threshold
+            ]
+    for container in to_remove:
+        __remove_container(container)
+
+
+def __remove_orphaned_workers() -> None:
+    # workers of a previous gateway process can't be handed out anymore
+    for container in client.containers.list(
+        all=True, filters={"label": __POOL_LABEL}
+    ):
+        __remove_container(container)
+
+
+def __is_running(container: Any) -> bool:
+    try:
+        container.reload()
+    except docker.errors.NotFound:
+        return False
+    return container.status == "running"
+
+
+def __remove_container(container: Any) -> None:
+    try:
+        container.remove(force=True)
+    except docker.errors.NotFound:
+        pass
+    except docker.errors.APIError:
+        # auto_remove can already be in progress
+        pass
@@ -0,0 +1,152 @@
+from typing import List, Optional
+
+import os
+import hashlib
+import traceback
+
+from submodules.model.business_objects import general, labeling_task_label
+from submodules.model.business_objects.tokenization import get_doc_bin_progress
+from submodules.model.models import InformationSource
+from submodules.s3 import controller as s3
+from util import sql_helper
+
+# labeling functions only run on records changed since the last successful run of the
+# same code (+ lookup lists, labels & tokenizer), "false" always runs all records
+INCREMENTAL_RUNS = os.getenv("LF_INCREMENTAL_RUNS", "true").lower() == "true"
+# above this share of changed records a full run is cheaper than a partial docbin
+MAX_CHANGED_SHARE = 0.5
+# milliseconds a run waits for in-flight record writes before it falls back to a
+# full run
+DATA_VERSION_LOCK_TIMEOUT = int(os.getenv("LF_DATA_VERSION_LOCK_TIMEOUT", "2000"))
+
+
+def build_run_key(
+    project_id: str,
+    information_source_item: InformationSource,
+    knowledge_base_source: str,
+    tokenizer: str,
+) -> str:
+    run_key = hashlib.sha256()
+    for part in [
+        information_source_item.source_code,
+        knowledge_base_source,
+        str(tokenizer),
+        __label_key(project_id, str(information_source_item.labeling_task_id)),
+    ]:
+        run_key.update(part.encode("utf-8"))
+        run_key.update(b"\0")
+    return run_key.hexdigest()
+
+
+def __label_key(project_id: str, labeling_task_id: str) -> str:
+    # renamed or deleted labels invalidate previous results
+    labels = labeling_task_label.get_label_ids_by_names(labeling_task_id, project_id)
+    return ",".join(f"{name}:{labels[name]}" for name in sorted(labels))
+
+
+def get_data_version(project_id: str) -> Optional[int]:
+    """Highest record data version that covers every committed record change of the
+    project.
+
+    Waits for in-flight record writes of the project (they could still hold lower
+    versions), None if they don't finish within DATA_VERSION_LOCK_TIMEOUT.
+    """
+    try:
+        with sql_helper.raw_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"SET LOCAL lock_timeout = '{DATA_VERSION_LOCK_TIMEOUT}ms'")
+            # conflicts with the shared lock the record_data_version_trigger takes
+            # for the writing transactions of the project, other projects don't wait
+            cursor.execute(
+                """
+                SELECT pg_advisory_xact_lock(
+                    hashtext('record_data_version'), hashtext(%s)
+                )""",
+                (str(project_id),),
+            )
+            cursor.execute(
+                """
+                SELECT CASE WHEN is_called THEN last_value ELSE 0 END
+                FROM record_data_version_seq"""
+            )
+            return cursor.fetchone()[0]
+    except Exception:
+        print(traceback.format_exc(), flush=True)
+        return None
+
+
+def get_changed_record_ids(
+    project_id: str, source_id: str, run_key: str
+) -> Optional[List[str]]:
+    """Returns the records added or modified since the last successful run.
+
+    None means a full run is needed (no usable previous state, tokenization still
+    running or too many changes).
+    """
+    if not INCREMENTAL_RUNS or get_doc_bin_progress(project_id):
+        return None
+    state = general.execute_first(
+        f"""
+        SELECT run_key, data_version
+        FROM information_source_run_state
+        WHERE information_source_id = '{source_id}'
+        """
+    )
+    if not state or state[0] != run_key:
+        return None
+    record_count = general.execute_first(
+        f"SELECT COUNT(*) FROM record WHERE project_id = '{project_id}'"
+    )[0]
+    max_changed = int(record_count * MAX_CHANGED_SHARE)
+    changed = [
+        row[0]
+        for row in general.execute_all(
+            f"""
+            SELECT id::TEXT
+            FROM record
+            WHERE project_id = '{project_id}' AND data_version > {int(state[1])}
+            LIMIT {max_changed + 1}
+            """
+        )
+    ]
+    if len(changed) > max_changed:
+        return None
+    return changed
+
+
+def store_state(
+    org_id: str, project_id: str, source_id: str, run_key: str, data_version: int
+) -> None:
+    general.execute(
+        f"""
+        INSERT INTO information_source_run_state (
+            information_source_id, project_id, run_key, data_version, updated_at
+        )
+        VALUES ('{source_id}', '{project_id}', '{run_key}', {int(data_version)}, NOW())
+        ON CONFLICT (information_source_id) DO UPDATE
+        SET run_key = EXCLUDED.run_key,
+            data_version = EXCLUDED.data_version,
+            updated_at = EXCLUDED.updated_at
+        """
+    )
+    general.commit()
+    __remove_legacy_state(org_id, project_id, source_id)
+
+
+def remove_state(org_id: str, project_id: str, source_id: str) -> None:
+    # e.g. after failed runs since the stored results don't match the state anymore
+    general.execute(
+        f"""
+        DELETE FROM information_source_run_state
+        WHERE information_source_id = '{source_id}'
+        """
+    )
+    general.commit()
+    __remove_legacy_state(org_id, project_id, source_id)
+
+
+def __remove_legacy_state(org_id: str, project_id: str, source_id: str) -> None:
+    # states were stored as per record hashes in s3 before
+    state_object = f"{project_id}/{source_id}_incremental_state"
+    if s3.object_exists(org_id, state_object):
+        s3.delete_object(org_id, state_object)
@@ -1,15 +1,18 @@
 import os
 import re
 from sqlalchemy.orm.attributes import flag_modified
-from typing import Any, Tuple, Dict, List
+from typing import Any, Iterable, Iterator, Optional, Tuple, Dict, List
 
 import pytz
 import json
 import docker
+import ijson
+import itertools
+import math
+import queue
+import requests
 import traceback
 
-# from datetime import datetime
-from dateutil import parser
 import datetime
 
 from exceptions.exceptions import PayloadSchedulerError
@@ -18,7 +21,6 @@ from submodules.model.business_objects import (
     information_source,
     embedding,
     labeling_task,
-    labeling_task_label,
     record,
     record_label_association,
     general,
@@ -43,26 +45,53 @@ from submodules.model.business_objects.tokenization import (
 from submodules.model.models import (
     InformationSource,
     InformationSourceStatisticsExclusion,
-    RecordLabelAssociation,
     InformationSourcePayload,
 )
 from util import notification
 from submodules.s3 import controller as s3
 from controller.knowledge_base import util as knowledge_base
 from controller.misc import config_service
+from controller.payload import container_pool, incremental, run_scheduler
 from util.notification import create_notification
-from util.miscellaneous_functions import chunk_dict
+from util import container_log_stream, sql_helper
+from util.miscellaneous_functions import chunk_items, chunk_list
 from controller.weak_supervision import weak_supervision_service as weak_supervision
-import time
 import uuid
 
-__containers_running = {}
-
 client = docker.from_env()
 __tz = pytz.timezone("Europe/Berlin")
 lf_exec_env_image = os.getenv("LF_EXEC_ENV_IMAGE")
 ml_exec_env_image = os.getenv("ML_EXEC_ENV_IMAGE")
 exec_env_network = os.getenv("LF_NETWORK")
+# labeling function runs over more than LF_SHARD_SIZE records are split into up to
+# LF_MAX_SHARDS containers running in parallel, 1 disables sharding
+# every shard takes its own run slot, so a run never has more shards than its
+# organization has slots (RUN_MAX_CONCURRENT_PER_ORG)
+LF_SHARD_SIZE = int(os.getenv("LF_SHARD_SIZE", "50000"))
+LF_MAX_SHARDS = int(
+    os.getenv("LF_MAX_SHARDS", str(run_scheduler.RUN_MAX_CONCURRENT_PER_ORG))
+)
+
+# column order of the tuples written by add_data_classification & add_data_extraction
+RECORD_LABEL_ASSOCIATION_COPY_COLUMNS = [
+    "id",
+    "project_id",
+    "record_id",
+    "labeling_task_label_id",
+    "source_type",
+    "source_id",
+    "return_type",
+    "confidence",
+    "created_by",
+    "created_at",
+]
+RECORD_LABEL_ASSOCIATION_TOKEN_COPY_COLUMNS = [
+    "id",
+    "project_id",
+    "record_label_association_id",
+    "token_index",
+    "is_beginning_token",
+]
 
 
 def create_payload(
@@ -225,6 +254,7 @@ def create_payload(
             )
 
         payload_item = information_source.get_payload(project_id, payload_id)
+        org_id = organization.get_id_by_project_id(project_id)
         try:
             create_notification(
                 enums.NotificationType.INFORMATION_SOURCE_STARTED,
@@ -232,17 +262,37 @@ def create_payload(
                 project_id,
                 information_source_item.name,
             )
-            run_container(
-                payload_item,
-                project_id,
-                image,
-                information_source_item.type,
-                add_file_name,
-                input_data,
+            output_objects = [str(payload_id)]
+            incremental_run = __prepare_incremental_run(
+                project_id, information_source_item
             )
-            # recollect to prevent detached instance error
-            payload_item = information_source.get_payload(project_id, payload_id)
-            has_error = update_records(payload_item, project_id)
+            record_ids = incremental_run["record_ids"] if incremental_run else None
+            if record_ids is not None and len(record_ids) == 0:
+                __keep_previous_results(project_id, payload_item)
+                has_error = False
+            else:
+                output_objects = run_container(
+                    payload_item,
+                    project_id,
+                    image,
+                    information_source_item.type,
+                    add_file_name,
+                    input_data,
+                    record_ids=record_ids,
+                )
+                # recollect to prevent detached instance error
+                payload_item = information_source.get_payload(project_id, payload_id)
+                has_error = update_records(
+                    payload_item, project_id, record_ids, output_objects
+                )
+            if incremental_run:
+                __update_incremental_state(
+                    org_id,
+                    project_id,
+                    str(information_source_item.id),
+                    incremental_run,
+                    has_error,
+                )
             if has_error:
                 tmp_log_store = payload_item.logs
                 berlin_now = datetime.datetime.now(__tz)
@@ -290,8 +340,8 @@ def create_payload(
             )
         general.commit()
 
-        org_id = organization.get_id_by_project_id(project_id)
-        s3.delete_object(org_id, project_id + "/" + str(payload_id))
+        for output_object in output_objects:
+            s3.delete_object(org_id, project_id + "/" + output_object)
 
         if payload_item.state == enums.PayloadState.FINISHED.value:
             try:
@@ -323,6 +373,69 @@ def create_payload(
     return payload
 
 
+def __prepare_incremental_run(
+    project_id: str, information_source_item: InformationSource
+) -> Optional[Dict[str, Any]]:
+    if (
+        not incremental.INCREMENTAL_RUNS
+        or information_source_item.type
+        != enums.InformationSourceType.LABELING_FUNCTION.value
+    ):
+        return None
+    knowledge_base_source = knowledge_base.build_knowledge_base_from_project(
+        project_id
+    )
+    run_key = incremental.build_run_key(
+        project_id,
+        information_source_item,
+        knowledge_base_source,
+        project.get(project_id).tokenizer_blank,
+    )
+    # taken before the run reads any record, later changes count for the next run
+    data_version = incremental.get_data_version(project_id)
+    if data_version is None:
+        return None
+    return {
+        "run_key": run_key,
+        "data_version": data_version,
+        # None -> full run
+        "record_ids": incremental.get_changed_record_ids(
+            project_id, str(information_source_item.id), run_key
+        ),
+    }
+
+
+def __update_incremental_state(
+    org_id: str,
+    project_id: str,
+    source_id: str,
+    incremental_run: Dict[str, Any],
+    has_error: bool,
+) -> None:
+    if has_error:
+        incremental.remove_state(org_id, project_id, source_id)
+    else:
+        incremental.store_state(
+            org_id,
+            project_id,
+            source_id,
+            incremental_run["run_key"],
+            incremental_run["data_version"],
+        )
+
+
+def __keep_previous_results(
+    project_id: str, information_source_payload: InformationSourcePayload
+) -> None:
+    berlin_now = datetime.datetime.now(__tz)
+    information_source_payload.logs = [
+        berlin_now.strftime("%Y-%m-%dT%H:%M:%S")
+        + " No records changed since the last run, results of the previous run are kept."
+    ]
+    information_source_payload.finished_at = datetime.datetime.now()
+    set_payload_progress(project_id, information_source_payload, 0.9)
+
+
 def run_container(
     information_source_payload: InformationSourcePayload,
     project_id: str,
@@ -330,12 +443,14 @@ def run_container(
     information_source_type: str,
     add_file_name: str,
     input_data: Dict[str, Any],
-) -> None:
+    record_ids: Optional[List[str]] = None,
+) -> List[str]:
+    # returns the names of the output objects, one per shard
     project_item = project.get(project_id)
     payload_id = str(information_source_payload.id)
     prefixed_input_name = f"{payload_id}_input"
     prefixed_function_name = f"{payload_id}_fn"
-    prefixed_knowledge_base = f"{payload_id}_knowledge"
+    prefixed_doc_bin = f"{payload_id}_doc_bin.json"
     org_id = organization.get_id_by_project_id(project_id)
     s3.put_object(
         org_id,
@@ -344,70 +459,202 @@ def run_container(
     )
 
     volumes = None
+    shards = None
+    doc_bins = []
+    output_objects = [payload_id]
     if information_source_type == enums.InformationSourceType.ACTIVE_LEARNING.value:
         s3.put_object(org_id, project_id + "/" + prefixed_input_name, input_data)
-        command = [
-            s3.create_access_link(org_id, project_id + "/" + prefixed_input_name),
-            s3.create_access_link(org_id, project_id + "/" + prefixed_function_name),
-            s3.create_access_link(org_id, project_id + "/" + add_file_name),
-            s3.create_file_upload_link(org_id, project_id + "/" + payload_id),
+        commands = [
+            [
+                s3.create_access_link(org_id, project_id + "/" + prefixed_input_name),
+                s3.create_access_link(
+                    org_id, project_id + "/" + prefixed_function_name
+                ),
+                s3.create_access_link(org_id, project_id + "/" + add_file_name),
+                s3.create_file_upload_link(org_id, project_id + "/" + payload_id),
+            ]
         ]
         inference_dir = get_inference_dir()
         if inference_dir:
             volumes = [f"{os.path.join(inference_dir, project_id)}:/inference"]
     else:
-        s3.put_object(
-            org_id,
-            project_id + "/" + prefixed_knowledge_base,
-            knowledge_base.build_knowledge_base_from_project(project_id),
+        knowledge_base_object = knowledge_base.get_knowledge_base_object(
+            org_id, project_id
         )
+        shards = __get_shards(project_id, record_ids)
+        if shards:
+            doc_bins = [
+                f"{payload_id}_doc_bin_{idx}.json" for idx in range(len(shards))
+            ]
+            output_objects = [
+                f"{payload_id}_shard_{idx}" for idx in range(len(shards))
+            ]
+            shard_record_ids = shards
+        elif record_ids is not None:
+            # incremental run, only the changed records are passed to the exec env
+            doc_bins = [prefixed_doc_bin]
+            shard_record_ids = [record_ids]
+        else:
+            # full run, the container reads the project's prepared docbin_full
+            shard_record_ids = []
+        for doc_bin, doc_bin_record_ids in zip(doc_bins, shard_record_ids):
+            s3.put_object(
+                org_id,
+                project_id + "/" + doc_bin,
+                get_doc_bin_table_to_json(
+                    project_id=project_id,
+                    missing_columns=record.get_missing_columns_str(project_id),
+                    record_ids=doc_bin_record_ids,
+                ),
+            )
         progress = get_doc_bin_progress(project_id)
-        command = [
-            s3.create_access_link(org_id, project_id + "/" + "docbin_full"),
-            s3.create_access_link(org_id, project_id + "/" + prefixed_function_name),
-            s3.create_access_link(org_id, project_id + "/" + prefixed_knowledge_base),
-            progress,
-            project_item.tokenizer_blank,
-            s3.create_file_upload_link(org_id, project_id + "/" + payload_id),
+        commands = [
+            [
+                s3.create_access_link(org_id, project_id + "/" + doc_bin),
+                s3.create_access_link(
+                    org_id, project_id + "/" + prefixed_function_name
+                ),
+                s3.create_access_link(org_id, knowledge_base_object),
+                progress,
+                project_item.tokenizer_blank,
+                s3.create_file_upload_link(org_id, project_id + "/" + output_object),
+            ]
+            for doc_bin, output_object in zip(
+                doc_bins or ["docbin_full"], output_objects
+            )
         ]
     information_source_payload.progress = 0.0
     general.commit()
-    container_name = str(uuid.uuid4())
-    container = client.containers.create(
-        image=image,
-        command=command,
-        name=container_name,
-        detach=True,
-        auto_remove=True,
-        network=exec_env_network,
-        volumes=volumes,
-    )
     set_payload_progress(project_id, information_source_payload, 0.05)
-    __containers_running[container_name] = True
-    daemon.run_without_db_token(
-        read_container_logs_thread,
-        project_id,
-        container_name,
-        payload_id,
-        container,
-    )
-    container.start()
-    # final log preparation
-    information_source_payload.logs = [
-        line.decode("utf-8").strip("\n")
-        for line in container.logs(
-            stream=True, stdout=True, stderr=True, timestamps=True
+    # only the container execution takes a slot, preparation & result processing
+    # of other runs can happen in parallel
+    if shards:
+        # every shard container waits for its own slot
+        log_lines = __stream_sharded_output(
+            org_id, image, commands, [len(shard) for shard in shards]
         )
-        if "progress" not in line.decode("utf-8")
-    ]
-    del __containers_running[container_name]
+        information_source_payload.logs = __consume_container_output(
+            project_id, information_source_payload, log_lines
+        )
+    else:
+        with run_scheduler.run_slot(org_id, "payload"):
+            log_lines = __stream_exec_env_output(image, commands[0], volumes)
+            information_source_payload.logs = __consume_container_output(
+                project_id, information_source_payload, log_lines
+            )
 
     information_source_payload.finished_at = datetime.datetime.now()
     set_payload_progress(project_id, information_source_payload, 0.9)
 
     s3.delete_object(org_id, project_id + "/" + prefixed_input_name)
     s3.delete_object(org_id, project_id + "/" + prefixed_function_name)
-    s3.delete_object(org_id, project_id + "/" + prefixed_knowledge_base)
+    for doc_bin in doc_bins:
+        s3.delete_object(org_id, project_id + "/" + doc_bin)
+    return output_objects
+
+
+def __get_shards(
+    project_id: str, record_ids: Optional[List[str]]
+) -> Optional[List[List[str]]]:
+    # None -> one container for all records
+    max_shards = min(LF_MAX_SHARDS, run_scheduler.RUN_MAX_CONCURRENT_PER_ORG)
+    if max_shards < 2:
+        return None
+    if record_ids is None:
+        sql = f"""
+        SELECT id::TEXT
+        FROM record
+        WHERE project_id = '{project_id}'
+        ORDER BY id
+        """
+        record_ids = [row[0] for row in general.execute_all(sql)]
+    shard_count = min(max_shards, math.ceil(len(record_ids) / LF_SHARD_SIZE))
+    if shard_count < 2:
+        return None
+    return list(chunk_list(record_ids, math.ceil(len(record_ids) / shard_count)))
+
+
+def __stream_exec_env_output(
+    image: str, command: List[str], volumes: Optional[List[str]]
+) -> Iterator[str]:
+    # pool workers can't carry run specific mounts, these runs use a one-shot container
+    worker = container_pool.acquire_worker(image) if not volumes else None
+    if worker:
+        try:
+            yield from container_pool.stream_exec(worker, image, command)
+        finally:
+            container_pool.release_worker(worker)
+    else:
+        container = client.containers.create(
+            image=image,
+            command=command,
+            name=str(uuid.uuid4()),
+            detach=True,
+            auto_remove=True,
+            network=exec_env_network,
+            volumes=volumes,
+            **run_scheduler.container_limits(),
+        )
+        container.start()
+        yield from container_log_stream.follow_container_output(container)
+
+
+def __stream_sharded_output(
+    org_id: str, image: str, commands: List[List[str]], shard_sizes: List[int]
+) -> Iterator[str]:
+    # runs all shards in parallel and merges their output into one stream
+    # progress of the shards is combined (weighted by records) into one progress line
+    events = queue.Queue()
+    for idx, command in enumerate(commands):
+        daemon.run_without_db_token(
+            __forward_shard_output, events, org_id, idx, image, command
+        )
+    shard_progress = [0.0] * len(commands)
+    total = sum(shard_sizes)
+    running = len(commands)
+    while running > 0:
+        idx, line = events.get()
+        if line is None:
+            running -= 1
+            continue
+        timestamp, _, message = line.partition(" ")
+        if "progress" not in message:
+            yield f"{timestamp} [shard {idx + 1}/{len(commands)}] {message}"
+            continue
+        try:
+            shard_progress[idx] = float(message.split("progress: ")[1].strip())
+        except (IndexError, ValueError):
+            continue
+        progress = sum(p * n for p, n in zip(shard_progress, shard_sizes)) / total
+        yield f"{timestamp} progress: {round(progress, 4)}"
+
+
+def __forward_shard_output(
+    events: queue.Queue, org_id: str, idx: int, image: str, command: List[str]
+) -> None:
+    # a failed shard doesn't upload its output, update_records reports that as error
+    try:
+        with run_scheduler.run_slot(org_id, "payload_shard"):
+            for line in __stream_exec_env_output(image, command, None):
+                events.put((idx, line))
+    except Exception:
+        print(traceback.format_exc(), flush=True)
+    finally:
+        events.put((idx, None))
+
+
+def __consume_container_output(
+    project_id: str,
+    information_source_payload: InformationSourcePayload,
+    log_lines: Iterator[str],
+) -> List[str]:
+    return container_log_stream.consume_output(
+        log_lines,
+        on_progress=lambda progress: set_payload_progress(
+            project_id, information_source_payload, progress, factor=0.8
+        ),
+        on_logs=lambda logs: extend_logs(project_id, information_source_payload, logs),
+    )
 
 
 def set_payload_progress(
@@ -447,67 +694,6 @@ def extend_logs(
     )
 
 
-def read_container_logs_thread(
-    project_id: str,
-    name: str,
-    payload_id: str,
-    docker_container: Any,
-):
-    ctx_token = general.get_ctx_token()
-    # needs to be refetched since it is not thread safe
-    information_source_payload = information_source.get_payload(project_id, payload_id)
-    previous_progress = -1
-    last_timestamp = None
-    c = 0
-    while name in __containers_running:
-        time.sleep(1)
-        c += 1
-        if c > 100:
-            ctx_token = general.remove_and_refresh_session(ctx_token, True)
-            information_source_payload = information_source.get_payload(
-                project_id, payload_id
-            )
-        if name not in __containers_running:
-            break
-        try:
-            log_lines = docker_container.logs(
-                stdout=True,
-                stderr=True,
-                timestamps=True,
-                since=last_timestamp,
-            )
-        except Exception:
-            # failsafe for containers that shut down during the read
-            break
-        current_logs = [
-            log
-            for log in str(log_lines.decode("utf-8")).split("\n")
-            if len(log.strip()) > 0
-        ]
-
-        if len(current_logs) == 0:
-            continue
-        last_entry = current_logs[-1]
-        last_timestamp_str = last_entry.split(" ")[0]
-        last_timestamp = parser.parse(last_timestamp_str).replace(
-            tzinfo=None
-        ) + datetime.timedelta(seconds=1)
-        non_progress_logs = [log for log in current_logs if "progress" not in log]
-        progress_logs = [log for log in current_logs if "progress" in log]
-        if len(non_progress_logs) > 0:
-            extend_logs(project_id, information_source_payload, non_progress_logs)
-        if len(progress_logs) == 0:
-            continue
-        last_entry = float(progress_logs[-1].split("progress: ")[1].strip())
-        if previous_progress == last_entry:
-            continue
-        previous_progress = last_entry
-        set_payload_progress(
-            project_id, information_source_payload, last_entry, factor=0.8
-        )
-    general.remove_and_refresh_session(ctx_token)
-
-
 def get_inference_dir() -> str:
     if config_service.get_config_value("is_managed"):
         return os.getenv("INFERENCE_DIR")
@@ -515,9 +701,15 @@ def get_inference_dir() -> str:
 
 
 def update_records(
-    information_source_payload: InformationSourcePayload, project_id: str
+    information_source_payload: InformationSourcePayload,
+    project_id: str,
+    record_ids: Optional[List[str]] = None,
+    output_objects: Optional[List[str]] = None,
 ) -> bool:
     org_id = organization.get_id_by_project_id(project_id)
+    if not output_objects:
+        output_objects = [str(information_source_payload.id)]
+    output_object_names = [str(project_id) + "/" + o for o in output_objects]
     tmp_log_store = information_source_payload.logs
 
     if information_source_payload.state == enums.PayloadState.FAILED.value:
@@ -534,13 +726,7 @@ def update_records(
         flag_modified(information_source_payload, "logs")
         general.commit()
         return True
-    try:
-        output_data = json.loads(
-            s3.get_object(
-                org_id, str(project_id) + "/" + str(information_source_payload.id)
-            )
-        )
-    except Exception:
+    if not all(s3.object_exists(org_id, name) for name in output_object_names):
         berlin_now = datetime.datetime.now(__tz)
         tmp_log_store.append(
             " ".join(
@@ -556,6 +742,11 @@ def update_records(
         return True
 
     berlin_now = datetime.datetime.now(__tz)
+    if record_ids is not None:
+        tmp_log_store.append(
+            berlin_now.strftime("%Y-%m-%dT%H:%M:%S")
+            + f" Incremental run over {len(record_ids)} changed records, results of the other records are kept."
+        )
     tmp_log_store.append(
         berlin_now.strftime("%Y-%m-%dT%H:%M:%S") + " Writing results to the database."
     )
@@ -563,22 +754,41 @@ def update_records(
     information_source: InformationSource = (
         information_source_payload.informationSource  # backref resolves in camelCase
     )
-    if information_source.return_type == enums.InformationSourceReturnType.YIELD.value:
-        has_errors = add_data_extraction(
-            information_source_payload,
-            project_id,
-            information_source.labeling_task_id,
-            tmp_log_store,
-            output_data,
-        )
-    else:
-        has_errors = add_data_classification(
-            information_source_payload,
-            project_id,
-            information_source.labeling_task_id,
-            tmp_log_store,
-            output_data,
+    # results are parsed record by record from the s3 stream, so the full output is never in memory
+    # shard outputs are chained so all of them are written in one transaction
+    output_data = itertools.chain.from_iterable(
+        __stream_output_data(org_id, name) for name in output_object_names
+    )
+    try:
+        if (
+            information_source.return_type
+            == enums.InformationSourceReturnType.YIELD.value
+        ):
+            has_errors = add_data_extraction(
+                information_source_payload,
+                project_id,
+                information_source.labeling_task_id,
+                tmp_log_store,
+                output_data,
+                record_ids,
+            )
+        else:
+            has_errors = add_data_classification(
+                information_source_payload,
+                project_id,
+                information_source.labeling_task_id,
+                tmp_log_store,
+                output_data,
+                record_ids,
+            )
+    except ijson.JSONError:
+        print(traceback.format_exc(), flush=True)
+        berlin_now = datetime.datetime.now(__tz)
+        tmp_log_store.append(
+            berlin_now.strftime("%Y-%m-%dT%H:%M:%S")
+            + " Code execution exited with errors. Please check the logs."
         )
+        has_errors = True
     berlin_now = datetime.datetime.now(__tz)
     if has_errors:
         tmp_log_store.append(
@@ -595,61 +805,75 @@ def update_records(
     return has_errors
 
 
+def __stream_output_data(org_id: str, object_name: str) -> Iterator[Tuple[str, Any]]:
+    with requests.get(s3.create_access_link(org_id, object_name), stream=True) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        yield from ijson.kvitems(r.raw, "", use_float=True)
+
+
 def add_data_classification(
     information_source_payload: InformationSourcePayload,
     project_id: str,
     labeling_task_id: str,
     tmp_log_store: List[str],
-    output_data: Any,
+    output_data: Iterable[Tuple[str, Any]],
+    record_ids: Optional[List[str]] = None,
 ) -> bool:
-    record_label_associations = []
     labels_valid = {}
+    # label name -> label id, used for all lookups instead of querying each label
     labels_in_task = get_label_ids_by_names(labeling_task_id, project_id)
-    my_chunks = chunk_dict(output_data)
     has_errors = False
-    for chunk in my_chunks:
-        valid_record_ids = record.get_ids_by_keys(chunk)
-        valid_record_ids = set([x[0] for x in valid_record_ids])
-        for idx, (record_id, lf_result) in enumerate(chunk.items()):
-            if record_id not in valid_record_ids:
-                # not an error since this is a failsaive to prevend deleted records from erroring out
-                continue
-            confidence, label_name = lf_result
-            if __check_label_errors(
-                label_name, labels_in_task, tmp_log_store, labels_valid
-            ):
-                has_errors = True
-                continue
-            if not isinstance(label_name, str):
-                raise TypeError(
-                    f"Expected String, but Label name is of type {type(label_name)}"
-                )
-
-            label = labeling_task_label.get_by_name(
-                project_id, labeling_task_id, label_name
-            )
+    created_at = datetime.datetime.now()
+    with sql_helper.raw_connection() as connection:
+        cursor = connection.cursor()
+        __delete_source_associations(
+            cursor, project_id, information_source_payload.source_id, record_ids
+        )
+        for chunk in chunk_items(output_data):
+            record_label_associations = []
+            valid_record_ids = record.get_ids_by_keys(chunk)
+            valid_record_ids = set([x[0] for x in valid_record_ids])
+            for idx, (record_id, lf_result) in enumerate(chunk.items()):
+                if record_id not in valid_record_ids:
+                    # not an error since this is a failsaive to prevend deleted records from erroring out
+                    continue
+                confidence, label_name = lf_result
+                if __check_label_errors(
+                    label_name, labels_in_task, tmp_log_store, labels_valid
+                ):
+                    has_errors = True
+                    continue
+                if not isinstance(label_name, str):
+                    raise TypeError(
+                        f"Expected String, but Label name is of type {type(label_name)}"
+                    )
 
-            if label is not None:
                 record_label_associations.append(
-                    RecordLabelAssociation(
-                        project_id=project_id,
-                        record_id=record_id,
-                        labeling_task_label_id=label.id,
-                        source_type=enums.LabelSource.INFORMATION_SOURCE.value,
-                        source_id=information_source_payload.source_id,
-                        return_type=enums.InformationSourceReturnType.RETURN.value,
-                        confidence=confidence,
-                        created_by=information_source_payload.created_by,
+                    (
+                        str(uuid.uuid4()),
+                        project_id,
+                        record_id,
+                        labels_in_task[label_name],
+                        enums.LabelSource.INFORMATION_SOURCE.value,
+                        information_source_payload.source_id,
+                        enums.InformationSourceReturnType.RETURN.value,
+                        confidence,
+                        information_source_payload.created_by,
+                        created_at,
                     )
                 )
-
-    record_label_association.delete_by_source_id(
-        project_id, information_source_payload.source_id
-    )
-    if not has_errors:
-        general.add_all(record_label_associations, with_commit=True)
-    else:
-        general.commit()
+            if not has_errors:
+                sql_helper.copy_rows(
+                    cursor,
+                    "record_label_association",
+                    RECORD_LABEL_ASSOCIATION_COPY_COLUMNS,
+                    record_label_associations,
+                )
+        if has_errors:
+            __discard_written_associations(
+                connection, project_id, information_source_payload.source_id, record_ids
+            )
     return has_errors
 
 
@@ -658,62 +882,112 @@ def add_data_extraction(
     project_id: str,
     labeling_task_id: str,
     tmp_log_store: List[str],
-    output_data: Any,
+    output_data: Iterable[Tuple[str, Any]],
+    record_ids: Optional[List[str]] = None,
 ) -> bool:
-    record_label_associations = []
     labels_valid = {}
+    # label name -> label id, used for all lookups instead of querying each label
     labels_in_task = get_label_ids_by_names(labeling_task_id, project_id)
     has_errors = False
-    my_chunks = chunk_dict(output_data)
-    for chunk in my_chunks:
-        max_token_num = get_max_token(chunk.keys(), labeling_task_id, project_id)
-        for idx, (record_id, lf_results) in enumerate(chunk.items()):
-            if record_id not in max_token_num:
-                # not an error since this is a failsaive to prevend deleted records from erroring out
-                continue
-            for lf_result in lf_results:
-                if __check_extraction_errors(
-                    max_token_num,
-                    record_id,
-                    lf_result,
-                    labels_in_task,
-                    tmp_log_store,
-                    labels_valid,
-                ):
-                    has_errors = True
+    created_at = datetime.datetime.now()
+    with sql_helper.raw_connection() as connection:
+        cursor = connection.cursor()
+        __delete_source_associations(
+            cursor, project_id, information_source_payload.source_id, record_ids
+        )
+        for chunk in chunk_items(output_data):
+            record_label_associations = []
+            record_label_association_tokens = []
+            max_token_num = get_max_token(chunk.keys(), labeling_task_id, project_id)
+            for idx, (record_id, lf_results) in enumerate(chunk.items()):
+                if record_id not in max_token_num:
+                    # not an error since this is a failsaive to prevend deleted records from erroring out
                     continue
-                confidence, label_name, token_idx_start, token_idx_end = lf_result
-
-                tokens = record_label_association.create_token_objects(
-                    project_id, token_idx_start, token_idx_end
+                for lf_result in lf_results:
+                    if __check_extraction_errors(
+                        max_token_num,
+                        record_id,
+                        lf_result,
+                        labels_in_task,
+                        tmp_log_store,
+                        labels_valid,
+                    ):
+                        has_errors = True
+                        continue
+                    confidence, label_name, token_idx_start, token_idx_end = lf_result
+
+                    association_id = str(uuid.uuid4())
+                    record_label_associations.append(
+                        (
+                            association_id,
+                            project_id,
+                            record_id,
+                            labels_in_task[label_name],
+                            enums.LabelSource.INFORMATION_SOURCE.value,
+                            information_source_payload.source_id,
+                            enums.InformationSourceReturnType.YIELD.value,
+                            confidence,
+                            information_source_payload.created_by,
+                            created_at,
+                        )
+                    )
+                    record_label_association_tokens += [
+                        (
+                            str(uuid.uuid4()),
+                            project_id,
+                            association_id,
+                            token_idx,
+                            token_idx == token_idx_start,
+                        )
+                        for token_idx in range(token_idx_start, token_idx_end)
+                    ]
+            if not has_errors:
+                sql_helper.copy_rows(
+                    cursor,
+                    "record_label_association",
+                    RECORD_LABEL_ASSOCIATION_COPY_COLUMNS,
+                    record_label_associations,
                 )
-
-                label = labeling_task_label.get_by_name(
-                    project_id, labeling_task_id, label_name
+                sql_helper.copy_rows(
+                    cursor,
+                    "record_label_association_token",
+                    RECORD_LABEL_ASSOCIATION_TOKEN_COPY_COLUMNS,
+                    record_label_association_tokens,
                 )
+        if has_errors:
+            __discard_written_associations(
+                connection, project_id, information_source_payload.source_id, record_ids
+            )
+    return has_errors
 
-                record_label_associations.append(
-                    RecordLabelAssociation(
-                        project_id=project_id,
-                        record_id=record_id,
-                        source_type=enums.LabelSource.INFORMATION_SOURCE.value,
-                        source_id=information_source_payload.source_id,
-                        labeling_task_label_id=label.id,
-                        return_type=enums.InformationSourceReturnType.YIELD.value,
-                        tokens=tokens,
-                        confidence=confidence,
-                        created_by=information_source_payload.created_by,
-                    )
-                )
 
-    record_label_association.delete_by_source_id(
-        project_id, information_source_payload.source_id
-    )
-    if not has_errors:
-        general.add_all(record_label_associations, with_commit=True)
+def __delete_source_associations(
+    cursor: Any, project_id: str, source_id: str, record_ids: Optional[List[str]]
+) -> None:
+    # delete and COPY share one transaction so readers never see a half written source
+    # record_ids limits the delete to the records of an incremental run
+    if record_ids is None:
+        cursor.execute(
+            """
+            DELETE FROM record_label_association
+            WHERE project_id = %s AND source_id = %s""",
+            (str(project_id), str(source_id)),
+        )
     else:
-        general.commit()
-    return has_errors
+        cursor.execute(
+            """
+            DELETE FROM record_label_association
+            WHERE project_id = %s AND source_id = %s AND record_id = ANY(%s::UUID[])""",
+            (str(project_id), str(source_id), record_ids),
+        )
+
+
+def __discard_written_associations(
+    connection: Any, project_id: str, source_id: str, record_ids: Optional[List[str]]
+) -> None:
+    # nothing of an erroneous run is written, results of previous runs are still removed
+    connection.rollback()
+    __delete_source_associations(connection.cursor(), project_id, source_id, record_ids)
 
 
 def __check_extraction_errors(
@@ -756,7 +1030,7 @@ def __check_extraction_errors(
 
 def __check_label_errors(
     label_name: str,
-    labels_in_task: List[str],
+    labels_in_task: Dict[str, str],
     tmp_log_store: List[Any],
     labels_valid: Dict[str, bool],
 ) -> bool:
@@ -875,7 +1149,6 @@ def run_labeling_function_exec_env(
 
     prefixed_function_name = f"{information_source_id}_fn"
     prefixed_payload = f"{information_source_id}_payload.json"
-    prefixed_knowledge_base = f"{information_source_id}_knowledge"
     project_item = project.get(project_id)
     org_id = str(project_item.organization_id)
 
@@ -885,10 +1158,8 @@ def run_labeling_function_exec_env(
         information_source_item.source_code,
     )
 
-    s3.put_object(
-        org_id,
-        project_id + "/" + prefixed_knowledge_base,
-        knowledge_base.build_knowledge_base_from_project(project_id),
+    knowledge_base_object = knowledge_base.get_knowledge_base_object(
+        org_id, project_id
     )
 
     tokenization_progress = get_doc_bin_progress(project_id)
@@ -896,26 +1167,39 @@ def run_labeling_function_exec_env(
     command = [
         s3.create_access_link(org_id, project_id + "/" + prefixed_doc_bin),
         s3.create_access_link(org_id, project_id + "/" + prefixed_function_name),
-        s3.create_access_link(org_id, project_id + "/" + prefixed_knowledge_base),
+        s3.create_access_link(org_id, knowledge_base_object),
         tokenization_progress,
         project_item.tokenizer_blank,
         s3.create_file_upload_link(org_id, project_id + "/" + prefixed_payload),
     ]
 
-    container = client.containers.run(
-        image=lf_exec_env_image,
-        command=command,
-        remove=True,
-        detach=True,
-        network=exec_env_network,
-    )
-
-    container_logs = [
-        line.decode("utf-8").strip("\n")
-        for line in container.logs(
-            stream=True, stdout=True, stderr=True, timestamps=True
-        )
-    ]
+    with run_scheduler.run_slot(
+        org_id, "labeling_function_sample", run_scheduler.PRIORITY_INTERACTIVE
+    ):
+        # sample runs are the latency sensitive ones, a warm worker skips the start up
+        worker = container_pool.acquire_worker(lf_exec_env_image)
+        if worker:
+            try:
+                container_logs = list(
+                    container_pool.stream_exec(worker, lf_exec_env_image, command)
+                )
+            finally:
+                container_pool.release_worker(worker)
+        else:
+            container = client.containers.run(
+                image=lf_exec_env_image,
+                command=command,
+                remove=True,
+                detach=True,
+                network=exec_env_network,
+                **run_scheduler.container_limits(),
+            )
+            container_logs = [
+                line.decode("utf-8").strip("\n")
+                for line in container.logs(
+                    stream=True, stdout=True, stderr=True, timestamps=True
+                )
+            ]
 
     code_has_errors = False
 
@@ -932,6 +1216,5 @@ def run_labeling_function_exec_env(
         s3.delete_object(org_id, project_id + "/" + prefixed_doc_bin)
     s3.delete_object(org_id, project_id + "/" + prefixed_function_name)
     s3.delete_object(org_id, project_id + "/" + prefixed_payload)
-    s3.delete_object(org_id, project_id + "/" + prefixed_knowledge_base)
 
     return calculated_labels, container_logs, code_has_errors
@@ -0,0 +1,126 @@
+from typing import Any, Dict, Iterator, Optional
+
+import os
+import time
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition
+
+# runs started at the same time over all organizations / per organization
+# interactive runs can use RUN_INTERACTIVE_RESERVE additional slots on both levels
+# so they never wait for bulk runs only
+RUN_MAX_CONCURRENT = int(os.getenv("RUN_MAX_CONCURRENT", "4"))
+RUN_MAX_CONCURRENT_PER_ORG = int(os.getenv("RUN_MAX_CONCURRENT_PER_ORG", "2"))
+RUN_INTERACTIVE_RESERVE = int(os.getenv("RUN_INTERACTIVE_RESERVE", "1"))
+# docker limits for every exec env container, e.g. "1.5" cpus and "2g" memory
+EXEC_ENV_CPU_LIMIT = os.getenv("EXEC_ENV_CPU_LIMIT")
+EXEC_ENV_MEMORY_LIMIT = os.getenv("EXEC_ENV_MEMORY_LIMIT")
+
+PRIORITY_INTERACTIVE = 0  # e.g. 10 record samples, someone waits for the response
+PRIORITY_BULK = 1  # full payload & attribute calculation runs
+
+__WAIT_TIME_HISTORY = 100
+
+__queued = {}  # {ticket: Dict[str, Any]}
+__running = {}  # {ticket: Dict[str, Any]}
+__wait_times = deque(maxlen=__WAIT_TIME_HISTORY)
+__ticket_counter = itertools.count()
+__CONDITION = Condition()
+
+
+def container_limits() -> Dict[str, Any]:
+    # keyword arguments for client.containers.create / run
+    limits = {}
+    if EXEC_ENV_CPU_LIMIT:
+        limits["nano_cpus"] = int(float(EXEC_ENV_CPU_LIMIT) * 1e9)
+    if EXEC_ENV_MEMORY_LIMIT:
+        limits["mem_limit"] = EXEC_ENV_MEMORY_LIMIT
+    return limits
+
+
+@contextmanager
+def run_slot(
+    org_id: str, run_type: str, priority: int = PRIORITY_BULK
+) -> Iterator[None]:
+    """Blocks until the run is allowed to start and frees the slot afterwards.
+
+    Waiting runs start in order of priority, then arrival. A run whose organization
+    is already at its cap doesn't block runs of other organizations.
+    """
+    ticket = next(__ticket_counter)
+    entry = {
+        "org_id": str(org_id),
+        "run_type": run_type,
+        "priority": priority,
+        "queued_at": time.time(),
+    }
+    with __CONDITION:
+        __queued[ticket] = entry
+        try:
+            __CONDITION.wait_for(lambda: __next_startable() == ticket)
+        except BaseException:
+            del __queued[ticket]
+            __CONDITION.notify_all()
+            raise
+        del __queued[ticket]
+        entry["started_at"] = time.time()
+        __wait_times.append(entry["started_at"] - entry["queued_at"])
+        __running[ticket] = entry
+        # the next waiting run might fit into the remaining slots as well
+        __CONDITION.notify_all()
+    try:
+        yield
+    finally:
+        with __CONDITION:
+            del __running[ticket]
+            __CONDITION.notify_all()
+
+
+def get_queue_stats(org_id: Optional[str] = None) -> Dict[str, Any]:
+    now = time.time()
+    with __CONDITION:
+        queued = [
+            e for e in __queued.values() if not org_id or e["org_id"] == str(org_id)
+        ]
+        running = [
+            e for e in __running.values() if not org_id or e["org_id"] == str(org_id)
+        ]
+        wait_times = list(__wait_times)
+    return {
+        "running": len(running),
+        "queued": len(queued),
+        "queuedByType": {
+            run_type: len([e for e in queued if e["run_type"] == run_type])
+            for run_type in {e["run_type"] for e in queued}
+        },
+        "longestWaitSeconds": round(
+            max((now - e["queued_at"] for e in queued), default=0), 2
+        ),
+        # over the last started runs of all organizations
+        "averageWaitSeconds": round(
+            sum(wait_times) / len(wait_times) if wait_times else 0, 2
+        ),
+        "maxConcurrent": RUN_MAX_CONCURRENT,
+        "maxConcurrentPerOrg": RUN_MAX_CONCURRENT_PER_ORG,
+    }
+
+
+def __next_startable() -> Optional[int]:
+    # caller needs to hold __CONDITION
+    for ticket, entry in sorted(
+        __queued.items(), key=lambda item: (item[1]["priority"], item[0])
+    ):
+        if __has_capacity(entry):
+            return ticket
+    return None
+
+
+def __has_capacity(entry: Dict[str, Any]) -> bool:
+    reserve = 0
+    if entry["priority"] == PRIORITY_INTERACTIVE:
+        reserve = RUN_INTERACTIVE_RESERVE
+    if len(__running) >= RUN_MAX_CONCURRENT + reserve:
+        return False
+    org_running = len([e for e in __running.values() if e["org_id"] == entry["org_id"]])
+    return org_running < RUN_MAX_CONCURRENT_PER_ORG + reserve
@@ -23,7 +23,7 @@ from controller.task_master import manager as task_master_manager
 from submodules.model.enums import TaskType, RecordTokenizationScope
 from submodules.model.business_objects import util as db_util
 from submodules.s3 import controller as s3
-from service.search import search
+from service.search import search, text_index
 from controller.auth import kratos
 from submodules.model.util import sql_alchemy_to_dict
 
@@ -145,6 +145,7 @@ def delete_project(project_id: str) -> None:
 def __background_cleanup(org_id: str, project_id: str) -> None:
     __delete_project_data_from_minio(org_id, project_id)
     __delete_project_data_from_inference_dir(project_id)
+    text_index.sync_text_indexes()
 
 
 def __delete_project_data_from_minio(org_id, project_id: str) -> None:
@@ -228,12 +229,20 @@ def get_confusion_matrix(
 
 
 def resolve_request_huddle_data(
-    project_id: str, user_id: str, data_id: str, huddle_type: str
+    project_id: str,
+    user_id: str,
+    data_id: str,
+    huddle_type: str,
+    position: Optional[int] = None,
 ) -> HuddleData:
     huddle = HuddleData(huddle_type=huddle_type, start_pos=-1, can_edit=True)
     if huddle_type == enums.LinkTypes.SESSION.value:
         session = search.resolve_labeling_session(project_id, user_id, data_id)
-        huddle.record_ids = session.session_record_ids
+        (
+            huddle.record_ids,
+            huddle.record_offset,
+            huddle.record_count,
+        ) = search.get_session_record_window(str(session.id), position)
         if __no_huddle_id(data_id):
             data_id = session.id
     else:
@@ -263,6 +272,7 @@ def resolve_request_huddle_data(
                 source_id,
                 huddle.allowed_task,
             )
+        huddle.record_count = len(huddle.record_ids)
     huddle.huddle_id = data_id
     huddle.checked_at = db_util.get_db_now()
     return huddle
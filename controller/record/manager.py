@@ -5,7 +5,6 @@ from fast_api.types import ExtendedSearch
 from submodules.model import Record, Attribute
 from submodules.model.business_objects import (
     record,
-    user_session,
     embedding,
     attribute,
     general,
@@ -25,6 +24,9 @@ from util.miscellaneous_functions import chunk_list
 import time
 import traceback
 
+# most similar records requested from the neural search at once
+SIMILARITY_SEARCH_MAX_LIMIT = int(os.getenv("SIMILARITY_SEARCH_MAX_LIMIT", "10000"))
+
 
 def get_record(project_id: str, record_id: str) -> Record:
     return record.get(project_id, record_id)
@@ -37,34 +39,23 @@ def get_records_by_similarity_search(
     record_id: str,
     att_filter: Optional[List[Dict[str, Any]]] = None,
     record_sub_key: Optional[int] = None,
+    limit: Optional[int] = None,
 ) -> ExtendedSearch:
+    if not limit:
+        limit = 100
     record_ids = neural_search_connector.request_most_similar_record_ids(
-        project_id, embedding_id, record_id, 100, att_filter, record_sub_key
+        project_id,
+        embedding_id,
+        record_id,
+        min(limit, SIMILARITY_SEARCH_MAX_LIMIT),
+        att_filter,
+        record_sub_key,
     )
     if not len(record_ids):
         record_ids = [record_id]
-    filter_data = [
-        {
-            "RELATION": "NONE",
-            "NEGATION": False,
-            "TARGET_TABLE": "RECORD",
-            "TARGET_COLUMN": "ID",
-            "OPERATOR": "IN",
-            "VALUES": record_ids,
-        }
-    ]
-    extended_search = get_records_by_extended_search(
-        project_id, user_id, filter_data, 100, 0
-    )
-    # sort record list in extended search in the same ordes as the record_ids returned by the neural search
-    extended_search.record_list.sort(key=lambda x: record_ids.index(str(x["id"])))
-
-    # to ensure the same order of the labeling session
-    user_session.set_record_ids(
-        project_id, extended_search.session_id, record_ids, with_commit=True
-    )
-
-    return extended_search
+    # ids can repeat for records with multiple embedded parts, the first hit counts
+    record_ids = list(dict.fromkeys(record_ids))
+    return search.resolve_records_by_similarity(project_id, user_id, record_ids)
 
 
 def get_records_by_composite_keys(
@@ -101,9 +92,10 @@ def get_records_by_extended_search(
     filter_data: List[Dict[str, Any]],
     limit: int,
     offset: int,
+    continuation_token: Optional[str] = None,
 ) -> ExtendedSearch:
     return search.resolve_extended_search(
-        project_id, user_id, filter_data, limit, offset
+        project_id, user_id, filter_data, limit, offset, continuation_token
     )
 
 
@@ -25,6 +25,7 @@ from controller.knowledge_term import manager as term_manager
 from controller.information_source import manager as information_source_manager
 from controller.payload import manager as payload_manager
 from controller.embedding import manager as embedding_manager
+from service.search import label_summary
 
 
 def get_last_annotated_record_id(
@@ -135,6 +136,7 @@ def create_manual_classification_label(
     update_is_relevant_manual_label(
         project_id, labeling_task_id, record_id, with_commit=True
     )
+    label_summary.refresh_records([record_id])
     if not as_gold_star:
         label_ids = [str(row.id) for row in label_ids.all()]
         daemon.run_without_db_token(
@@ -210,6 +212,7 @@ def create_manual_extraction_label(
     update_is_relevant_manual_label(
         project_id, labeling_task_id, record_id, with_commit=True
     )
+    label_summary.refresh_records([record_id])
     if label_source_type == enums.LabelSource.MANUAL.value:
         term_manager.create_term_in_named_knowledge_base(
             project_id, label_item.name, value
@@ -267,6 +270,7 @@ def create_gold_star_association(
     update_is_relevant_manual_label(
         project_id, labeling_task_id, record_id, with_commit=True
     )
+    label_summary.refresh_records([record_id])
     daemon.run_with_db_token(
         __update_label_payloads_for_neural_search,
         project_id,
@@ -295,6 +299,7 @@ def delete_record_label_association(
     for task_id in task_ids:
         update_is_relevant_manual_label(project_id, task_id, record_id)
     general.commit()
+    label_summary.refresh_records([record_id])
     if source_ids:
         for s_id in source_ids:
             update_annotator_progress(project_id, s_id, user_id)
@@ -315,6 +320,7 @@ def delete_gold_star_association(
     update_is_relevant_manual_label(
         project_id, labeling_task_id, record_id, with_commit=True
     )
+    label_summary.refresh_records([record_id])
     daemon.run_with_db_token(
         __update_label_payloads_for_neural_search,
         project_id,
@@ -1,4 +1,4 @@
-from typing import Tuple, List, Union, Dict
+from typing import Tuple, List, Set, Union, Dict
 from controller.auth import manager as auth_manager
 from controller.misc.config_service import get_config_value
 
@@ -128,6 +128,61 @@ def run_checks(df: pd.DataFrame, project_id, user_id) -> None:
         raise Exception(str(errors))
 
 
+def check_composite_key_duplicates(
+    df: pd.DataFrame, seen_keys: Set[int], project_id, user_id
+) -> None:
+    # duplicates across the chunks of an upload, run_checks covers a single chunk
+    primary_key_names = [
+        attribute_item.name
+        for attribute_item in attribute.get_primary_keys(project_id)
+        if attribute_item.name in df.columns
+    ]
+    if not primary_key_names:
+        return
+    concatenated_primary_keys = df[primary_key_names].astype(str).apply("-".join, axis=1)
+    key_hashes = set(pd.util.hash_array(concatenated_primary_keys.to_numpy()).tolist())
+    if not seen_keys.isdisjoint(key_hashes):
+        notification = create_notification(
+            NotificationType.DUPLICATED_COMPOSITE_KEY, user_id, project_id
+        )
+        errors = {"DuplicatedCompositeKeys": notification.message}
+        logger.error(errors)
+        raise Exception(str(errors))
+    seen_keys.update(key_hashes)
+
+
+def run_total_checks(row_count: int, update_count: int, project_id, user_id) -> None:
+    # row limits for the whole upload, run_limit_checks covers a single chunk
+    org = auth_manager.get_organization_by_user_id(user_id)
+    errors = {}
+    if row_count > org.max_rows:
+        notification = create_notification(
+            NotificationType.NEW_ROWS_EXCEED_MAXIMUM_LIMIT,
+            user_id,
+            project_id,
+            row_count,
+            org.max_rows,
+        )
+        errors["MaxRows"] = notification.message
+    else:
+        count_current_records = record.count(project_id)
+        if (
+            count_current_records
+            and count_current_records - update_count + row_count > org.max_rows
+        ):
+            notification = create_notification(
+                NotificationType.TOTAL_ROWS_EXCEED_MAXIMUM_LIMIT,
+                user_id,
+                project_id,
+                count_current_records - update_count + row_count,
+                org.max_rows,
+            )
+            errors["MaxRows"] = notification.message
+    if errors:
+        logger.error(errors)
+        raise Exception(str(errors))
+
+
 def run_limit_checks(df: pd.DataFrame, project_id, user_id) -> None:
     org = auth_manager.get_organization_by_user_id(user_id)
     guard = False
@@ -1,17 +1,24 @@
 # function to be delted after full merge
 
 
-from typing import Any, Dict, List, Optional, Tuple, Union
-from submodules.model.business_objects import attribute, general, project, data_slice
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from submodules.model.business_objects import attribute, project, data_slice
 
+import io
+import os
 import pandas as pd
 import numpy as np
+from openpyxl import Workbook
+from zipfile import ZipFile, ZIP_DEFLATED
 from submodules.model.business_objects.export import OUTSIDE_CONSTANT
 from submodules.model import enums
 from submodules.model.models import LabelingTask
 from util.miscellaneous_functions import first_item, get_max_length_of_task_labels
 
-from util.sql_helper import parse_sql_text
+from util import file, sql_helper
+
+# rows fetched from the server side cursor and written per step
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "10000"))
 
 
 def parse(
@@ -20,34 +27,141 @@ def parse(
     mapping_dict: Dict[str, str],
     extraction_appends: Dict[str, Union[str, Dict[str, str]]],
     export_options: Dict[str, Any],
-):
-    df = pd.read_sql(parse_sql_text(final_query), con=general.get_bind())
-    df.rename(columns=mapping_dict, inplace=True)
+    key: Optional[str] = None,
+) -> Tuple[str, str]:
+    """Writes the export as zip file to tmp/ and returns path & name of the zip.
 
+    Rows are read & written in chunks, so memory only depends on the chunk size.
+    Without password json & csv are compressed while writing. Password protected
+    zips (pyminizip) and xlsx need a finished file, they're zipped afterwards.
+    """
     export_format = export_options.get("format")
-    if export_format == enums.RecordExportFormats.DEFAULT.value:
-        df = parse_dataframe_data(df, extraction_appends)
-        for col in df.columns:
-            if str(col).endswith("__created_by"):
-                df.drop(col, axis="columns", inplace=True)
-    else:
+    if export_format != enums.RecordExportFormats.DEFAULT.value:
         message = f"Format {export_format} not supported."
         raise Exception(message)
 
     file_type = export_options.get("file_type")
     file_name = infer_file_name(project_id, export_options, export_format)
     file_path = f"tmp/{file_name}"
+    chunks = pin_dtypes(__parse_chunks(final_query, mapping_dict, extraction_appends))
+
+    if key or file_type == enums.RecordExportFileTypes.XLSX.value:
+        if file_type == enums.RecordExportFileTypes.XLSX.value:
+            __write_xlsx(file_path, chunks)
+        else:
+            with open(file_path, "wb") as export_file:
+                __write_chunks(export_file, file_type, chunks)
+        try:
+            return file.file_to_zip(file_path, key)
+        finally:
+            os.remove(file_path)
+
+    zip_path = f"{file_path}.zip"
+    with ZipFile(zip_path, "w", compression=ZIP_DEFLATED) as zip_file:
+        with zip_file.open(file_name, "w", force_zip64=True) as entry:
+            __write_chunks(entry, file_type, chunks)
+    return zip_path, f"{file_name}.zip"
+
+
+def __parse_chunks(
+    final_query: str,
+    mapping_dict: Dict[str, str],
+    extraction_appends: Dict[str, Union[str, Dict[str, str]]],
+) -> Iterator[pd.DataFrame]:
+    for df in sql_helper.read_sql_chunks(final_query, EXPORT_CHUNK_SIZE):
+        df.rename(columns=mapping_dict, inplace=True)
+        df = parse_dataframe_data(df, extraction_appends)
+        for col in df.columns:
+            if str(col).endswith("__created_by"):
+                df.drop(col, axis="columns", inplace=True)
+        yield df
+
+
+def pin_dtypes(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    dtypes = None
+    for df in chunks:
+        if dtypes is None:
+            dtypes = __get_pinned_dtypes(df)
+        yield __apply_dtypes(df, dtypes)
+
+
+def __get_pinned_dtypes(df: pd.DataFrame) -> Dict[str, Any]:
+    # types are inferred per chunk, e.g. an integer column with a null in a later
+    # chunk would turn into floats ("1.0") there. The first chunk decides the format,
+    # integers are nullable so later nulls fit
+    dtypes = {}
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_integer_dtype(dtype):
+            dtypes[col] = "Int64"
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[col] = dtype
+    return dtypes
+
+
+def __apply_dtypes(df: pd.DataFrame, dtypes: Dict[str, Any]) -> pd.DataFrame:
+    for col, dtype in dtypes.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        try:
+            df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            # e.g. text in a column that only had numbers so far, keeps the
+            # inferred type
+            pass
+    return df
+
+
+def __write_chunks(
+    stream: BinaryIO, file_type: str, chunks: Iterator[pd.DataFrame]
+) -> None:
     if file_type == enums.RecordExportFileTypes.JSON.value:
-        with open(file_path, "w", encoding="utf-8") as file:
-            df.to_json(file, orient="records", force_ascii=False)
+        # one json array like DataFrame.to_json(orient="records")
+        stream.write(b"[")
+        is_first = True
+        for df in chunks:
+            records = df.to_json(orient="records", force_ascii=False)[1:-1]
+            if not records:
+                continue
+            if not is_first:
+                stream.write(b",")
+            stream.write(records.encode("utf-8"))
+            is_first = False
+        stream.write(b"]")
     elif file_type == enums.RecordExportFileTypes.CSV.value:
-        df.to_csv(file_path, index=False)
-    elif file_type == enums.RecordExportFileTypes.XLSX.value:
-        df.to_excel(file_path)
+        text_stream = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        for idx, df in enumerate(chunks):
+            df.to_csv(text_stream, index=False, header=idx == 0)
+        text_stream.flush()
+        # the underlying stream is closed by the caller
+        text_stream.detach()
     else:
         message = f"File type {file_type} not supported."
         raise Exception(message)
-    return file_path, file_name
+
+
+def __write_xlsx(file_path: str, chunks: Iterator[pd.DataFrame]) -> None:
+    # write only workbooks keep rows on disk instead of building the full sheet
+    # layout matches DataFrame.to_excel (index column, "Sheet1")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    row_idx = 0
+    for idx, df in enumerate(chunks):
+        if idx == 0:
+            sheet.append([None] + [str(col) for col in df.columns])
+        for row in df.itertuples(index=False, name=None):
+            sheet.append([row_idx] + [__to_excel_value(value) for value in row])
+            row_idx += 1
+    workbook.save(file_path)
+
+
+def __to_excel_value(value: Any) -> Any:
+    if isinstance(value, (list, dict, np.ndarray)):
+        return str(value)
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if pd.isna(value):
+        return None
+    return value
 
 
 def infer_file_name(
@@ -96,49 +210,103 @@ def parse_dataframe_data(
         base_name = extraction_appends["EX_QUERIES"][key]["base_name"]
 
         final_name = base_name
-        df[final_name] = df.apply(
-            lambda row: __parse_pandas_row_current(
-                row, base_name, task_add_info[task.id]["MAX_LEN"]
-            ),
-            axis=1,
-        )
         has_confidence = enums.LabelSource.MANUAL.value not in base_name
+        tags, confidences = build_token_tag_arrays(
+            df[base_name + "__task_data"],
+            df[base_name + "__token_info"],
+            task_add_info[task.id]["MAX_LEN"],
+            has_confidence,
+        )
+        df[final_name] = tags
         if has_confidence:
-            df[final_name + "__confidence"] = df.apply(
-                lambda row: __parse_pandas_row_current_confidence(row, base_name),
-                axis=1,
-            )
+            df[final_name + "__confidence"] = confidences
 
         df.drop(base_name + "__token_info", axis="columns", inplace=True)
         df.drop(base_name + "__task_data", axis="columns", inplace=True)
     return df
 
 
-def __parse_pandas_row_current(
-    row: pd.Series, data_col_base_name: str, max_string_size: str
-):
-    record_data = row[data_col_base_name + "__task_data"]
-    if not record_data:
-        return None
-    token_count = row[data_col_base_name + "__token_info"]["token_count"]
-    arr = np.full(token_count, OUTSIDE_CONSTANT, dtype="<U" + max_string_size)
-    for rla in record_data:
-        for idx, token in enumerate(rla["rla_data"]["token"]):
-            if idx == 0:
-                arr[token] = "B-" + rla["rla_data"]["label_name"]
-            else:
-                arr[token] = "I-" + rla["rla_data"]["label_name"]
-    return arr
-
-
-def __parse_pandas_row_current_confidence(row: pd.Series, data_col_base_name: str):
-    record_data = row[data_col_base_name + "__task_data"]
-    if not record_data:
-        return None
-    token_count = row[data_col_base_name + "__token_info"]["token_count"]
-    arr_confidence = np.full(token_count, 0, dtype=np.float16)
-    for rla in record_data:
-        for token in rla["rla_data"]["token"]:
-            arr_confidence[token] = rla["rla_data"]["confidence"]
+def build_token_tag_arrays(
+    task_data: pd.Series,
+    token_info: pd.Series,
+    max_string_size: str,
+    with_confidence: bool,
+) -> Tuple[List[Optional[np.ndarray]], Optional[List[Optional[np.ndarray]]]]:
+    """BIO tags (and confidences) per token for all rows of one extraction column.
+
+    The spans of all rows are flattened into one position array, written into a
+    single tag array at once and split into one view per row afterwards. Rows
+    without spans get None. If spans overlap, the later one wins (like the previous
+    row by row implementation). Token indices outside of their row raise an
+    IndexError.
+    """
+    has_data = [bool(record_data) for record_data in task_data]
+    token_counts = [
+        info["token_count"] if row_has_data else 0
+        for info, row_has_data in zip(token_info, has_data)
+    ]
+    # plain ints, numpy scalars are slow in the python loop below
+    offsets = [0] + np.cumsum(token_counts, dtype=np.int64).tolist()
+
+    positions, tags, confidences = [], [], []
+    for offset, token_count, record_data, row_has_data in zip(
+        offsets, token_counts, task_data, has_data
+    ):
+        if not row_has_data:
+            continue
+        for rla in record_data:
+            rla_data = rla["rla_data"]
+            tokens = rla_data["token"]
+            if not tokens:
+                continue
+            # positions are flat, an unchecked index would land in another row
+            first_token, last_token = min(tokens), max(tokens)
+            for token in [first_token, last_token]:
+                if not -token_count <= token < token_count:
+                    raise IndexError(
+                        f"token index {token} out of range for a record with "
+                        f"{token_count} tokens"
+                    )
+            if first_token < 0:
+                # negative indices count from the end of the row like numpy's
+                tokens = [token % token_count for token in tokens]
+            positions.extend(offset + token for token in tokens)
+            tags.append("B-" + rla_data["label_name"])
+            tags.extend(["I-" + rla_data["label_name"]] * (len(tokens) - 1))
+            if with_confidence:
+                confidences.extend([rla_data["confidence"]] * len(tokens))
+
+    positions = np.array(positions, dtype=np.int64)
+    last_written = __last_occurrences(positions)
+    positions = positions[last_written]
+
+    # np.full is considerably slower than fill for string dtypes
+    tag_array = np.empty(offsets[-1], dtype="<U" + max_string_size)
+    tag_array.fill(OUTSIDE_CONSTANT)
+    tag_array[positions] = np.array(tags, dtype=tag_array.dtype)[last_written]
+    tag_rows = __split_rows(tag_array, offsets, has_data)
+    if not with_confidence:
+        return tag_rows, None
+    confidence_array = np.zeros(offsets[-1], dtype=np.float16)
+    confidence_array[positions] = np.array(confidences, dtype=np.float16)[
+        last_written
+    ]
+    return tag_rows, __split_rows(confidence_array, offsets, has_data)
+
+
+def __last_occurrences(positions: np.ndarray) -> np.ndarray:
+    # index of the last write per position, fancy index assignment with duplicates
+    # doesn't guarantee an order
+    _, reversed_idx = np.unique(positions[::-1], return_index=True)
+    return len(positions) - 1 - reversed_idx
+
+
+def __split_rows(
+    array: np.ndarray, offsets: List[int], has_data: List[bool]
+) -> List[Optional[np.ndarray]]:
+    return [
+        array[start:end] if row_has_data else None
+        for start, end, row_has_data in zip(offsets, offsets[1:], has_data)
+    ]
+
 
-    return arr_confidence
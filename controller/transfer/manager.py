@@ -1,8 +1,9 @@
 import os
 import logging
 import json
+import itertools
 import traceback
-from typing import Any, List, Optional, Dict
+from typing import Any, Iterator, List, Optional, Dict
 
 from controller.transfer import export_parser
 from controller.transfer.knowledge_base_transfer_manager import (
@@ -30,8 +31,7 @@ from controller.upload_task import manager as upload_task_manager
 from submodules.s3 import controller as s3
 import pandas as pd
 from datetime import datetime
-from util import notification, security, file
-from sqlalchemy.sql import text as sql_text
+from util import notification, security, file, sql_helper
 from controller.labeling_task import manager as labeling_task_manager
 from controller.labeling_task_label import manager as labeling_task_label_manager
 from submodules.model.business_objects import record_label_association as rla
@@ -162,22 +162,41 @@ def export_records(
     project_id: str,
     num_samples: Optional[int] = None,
     user_session_id: Optional[str] = None,
-) -> str:
+) -> Optional[Iterator[str]]:
     attributes = attribute.get_all_ordered(project_id, True)
     if not attributes:
         print("no attributes in project --> cancel")
         return None
 
     final_sql = build_full_record_sql_export(project_id, attributes, user_session_id)
+    chunks = export_parser.pin_dtypes(sql_helper.read_sql_chunks(final_sql))
+    # runs the query, so its errors are raised before a response is started
+    first_chunk = next(chunks)
+    return __stream_records_as_json(
+        itertools.chain([first_chunk], chunks),
+        int(num_samples) if num_samples is not None else None,
+    )
 
-    sql_df = pd.read_sql(sql_text(final_sql), con=general.get_bind())
-    if num_samples is not None:
-        sql_df = sql_df.head(int(num_samples))
-    export_as_csv = False
-    if export_as_csv:
-        return sql_df.to_csv(index=False)
-    else:
-        return sql_df.to_json(orient="records")
+
+def __stream_records_as_json(
+    chunks: Iterator[pd.DataFrame], num_samples: Optional[int]
+) -> Iterator[str]:
+    # pieces of one json array (DataFrame.to_json(orient="records")), the server side
+    # cursor stops fetching once num_samples rows are read
+    yield "["
+    remaining = num_samples
+    is_first = True
+    for sql_df in chunks:
+        if remaining is not None:
+            sql_df = sql_df.head(remaining)
+            remaining -= len(sql_df)
+        records = sql_df.to_json(orient="records")[1:-1]
+        if records:
+            yield records if is_first else "," + records
+            is_first = False
+        if remaining is not None and remaining <= 0:
+            break
+    yield "]"
 
 
 def prepare_record_export(
@@ -194,10 +213,14 @@ def prepare_record_export(
     mapping_dict = records_by_options_query_data.get("mapping_dict")
     extraction_appends = records_by_options_query_data.get("extraction_appends")
 
-    file_path, file_name = export_parser.parse(
-        project_id, final_query, mapping_dict, extraction_appends, export_options
+    zip_path, file_name = export_parser.parse(
+        project_id,
+        final_query,
+        mapping_dict,
+        extraction_appends,
+        export_options,
+        key,
     )
-    zip_path, file_name = file.file_to_zip(file_path, key)
     org_id = organization.get_id_by_project_id(project_id)
     prefixed_path = f"{project_id}/download/{user_id}/record_export_"
     file_name_download = prefixed_path + file_name
@@ -206,11 +229,10 @@ def prepare_record_export(
     for old_export_file in old_export_files:
         s3.delete_object(org_id, old_export_file)
 
+    # large files are uploaded as multipart by the s3 client
     s3.upload_object(org_id, file_name_download, zip_path)
     notification.send_organization_update(project_id, f"record_export:{user_id}")
 
-    if os.path.exists(file_path):
-        os.remove(file_path)
     if os.path.exists(zip_path):
         os.remove(zip_path)
 
@@ -1,6 +1,11 @@
 import json
+import uuid
+import queue
 import logging
-from typing import Dict, Any, Optional, Tuple, List
+import datetime
+import traceback
+from threading import Event, Thread
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple, List
 
 import pandas as pd
 
@@ -14,35 +19,113 @@ from submodules.model.business_objects import (
     labeling_task,
     organization,
     project,
-    record,
-    record_label_association,
     upload_task,
 )
 from controller.user import manager as user_manager
 from controller.upload_task import manager as upload_task_manager
-from controller.tokenization import manager as token_manager
-from util import file, security
+from controller.tokenization import tokenization_service
+from util import file, security, sql_helper
 from submodules.s3 import controller as s3
-from submodules.model import enums, events, UploadTask, Attribute
+from submodules.model import daemon, enums, events, UploadTask, Attribute
 from util import category
+from service.search import text_index
 from util import notification
-from controller.transfer.util import convert_to_record_dict
+from controller.transfer.util import (
+    convert_to_record_dict_chunks,
+    validate_file_in_chunks,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 import os
 
+# records per import step, each step is written with one COPY per staging table
+RECORD_IMPORT_CHUNK_SIZE = int(os.getenv("RECORD_IMPORT_CHUNK_SIZE", 5000))
+# parsed file chunks waiting to be written, bounds the memory of the read ahead
+IMPORT_QUEUE_SIZE = int(os.getenv("IMPORT_QUEUE_SIZE", 2))
+# records tokenized one by one while the import is still running so the first ones
+# are usable right away, the project tokenization afterwards covers the rest
+IMPORT_TOKENIZE_RECORD_LIMIT = int(os.getenv("IMPORT_TOKENIZE_RECORD_LIMIT", 1000))
+# seconds to wait for the reader & tokenize threads once the import is done
+IMPORT_WORKER_JOIN_TIMEOUT = int(os.getenv("IMPORT_WORKER_JOIN_TIMEOUT", 30))
+
 
 def import_records_and_rlas(
     project_id: str,
     user_id: str,
-    data: List,
+    data_chunks: Iterable[List],
+    total_count: int,
     upload_task: Optional[UploadTask] = None,
     record_category: str = enums.RecordCategory.SCALE.value,
 ):
-    CHUNK_SIZE = 500
-    chunks = [data[x : x + CHUNK_SIZE] for x in range(0, len(data), CHUNK_SIZE)]
-    chunks_count = len(chunks)
+    # data_chunks can be a generator, it's consumed by a reader thread so parsing the
+    # next chunks overlaps with writing the current one
+    import_done = Event()
+    chunk_queue = queue.Queue(maxsize=IMPORT_QUEUE_SIZE)
+    # plain threads so they can be joined, the reader opens its own db session
+    workers = [
+        Thread(
+            target=__read_import_chunks,
+            args=(data_chunks, chunk_queue, import_done),
+            daemon=True,
+        )
+    ]
+    tokenize_queue = queue.Queue()
+    tokenize_budget = IMPORT_TOKENIZE_RECORD_LIMIT
+    if tokenize_budget > 0:
+        workers.append(
+            Thread(
+                target=__tokenize_imported_records,
+                args=(project_id, tokenize_queue, import_done),
+                daemon=True,
+            )
+        )
+    for worker in workers:
+        worker.start()
+    try:
+        __import_queued_chunks(
+            project_id,
+            user_id,
+            chunk_queue,
+            tokenize_queue,
+            tokenize_budget,
+            total_count,
+            upload_task,
+            record_category,
+        )
+    finally:
+        import_done.set()
+        # unblocks the reader if the import failed
+        __drain_queue(chunk_queue)
+        __join_workers(workers)
+
+
+def __join_workers(workers: List[Thread]) -> None:
+    for worker in workers:
+        worker.join(IMPORT_WORKER_JOIN_TIMEOUT)
+        if worker.is_alive():
+            logger.warning(
+                f"import worker {worker.name} still running after "
+                f"{IMPORT_WORKER_JOIN_TIMEOUT} seconds"
+            )
+
+
+def __import_queued_chunks(
+    project_id: str,
+    user_id: str,
+    chunk_queue: queue.Queue,
+    tokenize_queue: queue.Queue,
+    tokenize_budget: int,
+    total_count: int,
+    upload_task: Optional[UploadTask],
+    record_category: str,
+) -> None:
+    chunks = (
+        data[x : x + RECORD_IMPORT_CHUNK_SIZE]
+        for data in __get_queued_chunks(chunk_queue)
+        for x in range(0, len(data), RECORD_IMPORT_CHUNK_SIZE)
+    )
+    imported_count = 0
     for idx, chunk in enumerate(chunks):
         if upload_task is not None:
             logger.debug(
@@ -65,7 +148,7 @@ def import_records_and_rlas(
         import_labeling_tasks_and_labels_pipeline(
             project_id=project_id, tasks_data=tasks_data
         )
-        import_records_and_rlas_pipeline(
+        record_ids = import_records_and_rlas_pipeline(
             user_id=user_id,
             project_id=project_id,
             records_data=records_data,
@@ -73,14 +156,74 @@ def import_records_and_rlas(
             category=record_category,
             primary_keys=primary_keys,
         )
+        for record_id in record_ids[: max(tokenize_budget, 0)]:
+            tokenize_queue.put(record_id)
+        tokenize_budget -= len(record_ids)
 
+        imported_count += len(chunk)
         if upload_task is not None:
-            progress = ((idx + 1) / chunks_count) * 100
+            progress = (imported_count / max(total_count, 1)) * 100
             upload_task_manager.update_task(
                 project_id, upload_task.id, progress=progress
             )
 
 
+def __read_import_chunks(
+    data_chunks: Iterable[List], chunk_queue: queue.Queue, import_done: Event
+) -> None:
+    # errors are handed to the importing thread, None marks the end of the file
+    # parsing sends notifications (e.g. unknown data types), so the thread needs its
+    # own session like the ones started with daemon.run_with_db_token
+    ctx_token = general.get_ctx_token()
+    end = None
+    try:
+        for data in data_chunks:
+            chunk_queue.put(data)
+            if import_done.is_set():
+                return
+    except Exception as e:
+        end = e
+    finally:
+        # sent however the reader stops, the importing thread waits for it otherwise
+        # nobody reads anymore once the import is done
+        if not import_done.is_set():
+            chunk_queue.put(end)
+        general.remove_and_refresh_session(ctx_token)
+
+
+def __get_queued_chunks(chunk_queue: queue.Queue) -> Iterator[List]:
+    while True:
+        data = chunk_queue.get()
+        if data is None:
+            return
+        if isinstance(data, Exception):
+            raise data
+        yield data
+
+
+def __drain_queue(chunk_queue: queue.Queue) -> None:
+    while True:
+        try:
+            chunk_queue.get_nowait()
+        except queue.Empty:
+            return
+
+
+def __tokenize_imported_records(
+    project_id: str, tokenize_queue: queue.Queue, import_done: Event
+) -> None:
+    # stops with the import, the project tokenization queued afterwards takes over
+    while not import_done.is_set():
+        try:
+            record_id = tokenize_queue.get(timeout=1)
+        except queue.Empty:
+            continue
+        try:
+            tokenization_service.request_tokenize_record(project_id, record_id)
+        except Exception:
+            print(traceback.format_exc(), flush=True)
+
+
 def download_file(project_id: str, task: UploadTask) -> str:
     # TODO is copied from import_file and can be refactored because atm its duplicated code
     upload_task_manager.update_task(
@@ -121,24 +264,44 @@ def import_file(project_id: str, upload_task: UploadTask) -> None:
         # basic implementations without change of column type
         column_mappings = json.loads(column_mappings)
         column_mappings = column_mappings.get("columns")
-    data, added_col = convert_to_record_dict(
-        file_type,
-        tmp_file_name,
-        upload_task.user_id,
-        upload_task.file_import_options,
-        project_id,
-        column_mappings,
-    )
-    number_records = len(data)
-    import_records_and_rlas(
-        project_id, upload_task.user_id, data, upload_task, record_category
-    )
+    # the file is read twice in chunks, all checks pass before anything is written
+    try:
+        number_records, added_col, column_types = validate_file_in_chunks(
+            file_type,
+            tmp_file_name,
+            upload_task.user_id,
+            upload_task.file_import_options,
+            project_id,
+            column_mappings,
+        )
+        data_chunks = convert_to_record_dict_chunks(
+            file_type,
+            tmp_file_name,
+            upload_task.user_id,
+            upload_task.file_import_options,
+            project_id,
+            column_mappings,
+            added_col,
+            column_types,
+        )
+        import_records_and_rlas(
+            project_id,
+            upload_task.user_id,
+            data_chunks,
+            number_records,
+            upload_task,
+            record_category,
+        )
+    finally:
+        if os.path.exists(tmp_file_name):
+            os.remove(tmp_file_name)
     if added_col:
         attribute_item = attribute.get_by_name(project_id, added_col)
         attribute_item.relative_position = 0
         attribute_item.is_primary_key = True
         attribute_item.state = enums.AttributeState.AUTOMATICALLY_CREATED.value
         general.commit()
+    daemon.run_without_db_token(text_index.sync_text_indexes)
     upload_task_manager.update_upload_task_to_finished(upload_task)
 
     user = user_manager.get_or_create_user(upload_task.user_id)
@@ -176,79 +339,207 @@ def import_records_and_rlas_pipeline(
     labels_data: List[Dict[str, Any]],
     category: str,
     primary_keys: List[Attribute],
-):
-    if primary_keys:
-        records_data, labels_data = update_records_and_labels(
-            user_id=user_id,
-            project_id=project_id,
-            records_data=records_data,
-            labels_data=labels_data,
-            primary_keys=primary_keys,
-            category=category,
-        )
-    create_records_and_labels(
+) -> List[str]:
+    return upsert_records_and_labels(
         user_id=user_id,
         project_id=project_id,
         records_data=records_data,
         labels_data=labels_data,
         category=category,
+        primary_keys=primary_keys,
     )
 
 
-def update_records_and_labels(
+def upsert_records_and_labels(
     user_id: str,
     project_id: str,
     records_data: List[Dict[str, Any]],
     labels_data: List[Dict[str, Any]],
-    primary_keys: List[Attribute],
     category: str,
-) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    existing_records_by_key = record.get_existing_records_by_composite_key(
-        project_id=project_id,
-        records_data=records_data,
-        primary_keys=primary_keys,
-        category=category,
-    )
-    if not existing_records_by_key:
-        return records_data, labels_data
-
-    (
-        remaining_records_data,
-        remaining_labels_data,
-        updated_records,
-        labels_data_of_updated_records,
-    ) = record.update_records(
-        records_data=records_data,
-        labels_data=labels_data,
-        existing_records_by_key=existing_records_by_key,
-        primary_keys=primary_keys,
-    )
-    record_label_association.update_record_label_associations(
-        user_id=user_id,
-        project_id=project_id,
-        records=updated_records,
-        labels_data=labels_data_of_updated_records,
-    )
-    token_manager.delete_token_statistics(updated_records)
-    token_manager.delete_docbins(project_id, updated_records)
-    return remaining_records_data, remaining_labels_data
+    primary_keys: Optional[List[Attribute]] = None,
+) -> List[str]:
+    """Bulk loads records and their manual labels.
+
+    Both are copied into staging tables and merged into record and
+    record_label_association set based. With primary keys, records matching an
+    existing one on the composite key update it instead. Only records whose data
+    actually changed lose their docbins & token statistics.
+    Labels are resolved by task & label name within the merge, unknown names are
+    skipped.
+
+    Returns the ids of the created and changed records.
+    """
+    if not records_data:
+        return []
+    # the loader runs on its own connection, tasks & labels have to be visible to it
+    general.commit()
+    record_ids = [str(uuid.uuid4()) for _ in records_data]
+    with sql_helper.raw_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            CREATE TEMP TABLE tmp_record_import (
+                id UUID,
+                existing_id UUID,
+                data JSONB
+            ) ON COMMIT DROP;
+            CREATE TEMP TABLE tmp_record_label_import (
+                id UUID,
+                record_id UUID,
+                task_name TEXT,
+                label_name TEXT
+            ) ON COMMIT DROP;"""
+        )
+        sql_helper.copy_rows(
+            cursor,
+            "tmp_record_import",
+            ["id", "data"],
+            (
+                (record_id, json.dumps(record_data))
+                for record_id, record_data in zip(record_ids, records_data)
+            ),
+        )
+        label_count = sql_helper.copy_rows(
+            cursor,
+            "tmp_record_label_import",
+            ["id", "record_id", "task_name", "label_name"],
+            (
+                (str(uuid.uuid4()), record_id, task_name, label_name)
+                for record_id, label_data in zip(record_ids, labels_data)
+                for task_name, label_name in label_data.items()
+            ),
+        )
+        changed_record_ids = []
+        if primary_keys:
+            changed_record_ids = __merge_existing_records(
+                cursor, user_id, project_id, category, primary_keys
+            )
+        created_at = datetime.datetime.now()
+        cursor.execute(
+            """
+            INSERT INTO record (id, project_id, data, category, created_at)
+            SELECT id, %s, data, %s, %s
+            FROM tmp_record_import
+            WHERE existing_id IS NULL
+            RETURNING id""",
+            (project_id, category, created_at),
+        )
+        created_record_ids = [str(row[0]) for row in cursor.fetchall()]
+        if label_count:
+            __merge_record_label_import(cursor, user_id, project_id, created_at)
+    return created_record_ids + changed_record_ids
 
 
-def create_records_and_labels(
+def __merge_existing_records(
+    cursor: Any,
     user_id: str,
     project_id: str,
-    records_data: List[Dict[str, Any]],
-    labels_data: List[Dict[str, Any]],
     category: str,
-):
-    created_records = record.create_records(
-        project_id=project_id, records_data=records_data, category=category
+    primary_keys: List[Attribute],
+) -> List[str]:
+    key_parameters = {f"key_{idx}": key.name for idx, key in enumerate(primary_keys)}
+    key_condition = " AND ".join(
+        f"r.data ->> %({name})s = s.data ->> %({name})s" for name in key_parameters
     )
-    record_label_association.create_record_label_associations(
-        records=created_records,
-        labels_data=labels_data,
-        project_id=project_id,
-        user_id=user_id,
+    cursor.execute(
+        f"""
+        UPDATE tmp_record_import s
+        SET existing_id = r.id
+        FROM record r
+        WHERE r.project_id = %(project_id)s
+            AND r.category = %(category)s
+            AND {key_condition}""",
+        {"project_id": project_id, "category": category, **key_parameters},
+    )
+    # attributes missing in the upload are kept, unchanged records aren't touched
+    cursor.execute(
+        """
+        UPDATE record r
+        SET data = r.data || s.data
+        FROM tmp_record_import s
+        WHERE r.id = s.existing_id
+            AND r.data IS DISTINCT FROM r.data || s.data
+        RETURNING r.id"""
+    )
+    changed_record_ids = [str(row[0]) for row in cursor.fetchall()]
+    cursor.execute(
+        """
+        UPDATE tmp_record_label_import l
+        SET record_id = s.existing_id
+        FROM tmp_record_import s
+        WHERE l.record_id = s.id
+            AND s.existing_id IS NOT NULL"""
+    )
+    # manual labels of the importing user that the upload replaces within a task
+    cursor.execute(
+        """
+        DELETE FROM record_label_association rla
+        USING tmp_record_label_import l, labeling_task lt, labeling_task_label ltl
+        WHERE lt.project_id = %(project_id)s
+            AND lt.name = l.task_name
+            AND ltl.labeling_task_id = lt.id
+            AND ltl.name != l.label_name
+            AND rla.record_id = l.record_id
+            AND rla.labeling_task_label_id = ltl.id
+            AND rla.source_type = %(source_type)s
+            AND rla.created_by = %(user_id)s""",
+        {
+            "project_id": project_id,
+            "source_type": enums.LabelSource.MANUAL.value,
+            "user_id": user_id,
+        },
+    )
+    if changed_record_ids:
+        for table_name in ["record_tokenized", "record_attribute_token_statistics"]:
+            cursor.execute(
+                f"""
+                DELETE FROM {table_name}
+                WHERE project_id = %s AND record_id = ANY(%s::UUID[])""",
+                (project_id, changed_record_ids),
+            )
+    return changed_record_ids
+
+
+def __merge_record_label_import(
+    cursor: Any, user_id: str, project_id: str, created_at: datetime.datetime
+) -> None:
+    # a single insert, so the label summary trigger queues the records once per chunk
+    cursor.execute(
+        """
+        INSERT INTO record_label_association (
+            id,
+            project_id,
+            record_id,
+            labeling_task_label_id,
+            source_type,
+            return_type,
+            created_by,
+            created_at,
+            is_gold_star,
+            is_valid_manual_label
+        )
+        SELECT s.id, %(project_id)s, s.record_id, ltl.id, %(source_type)s,
+            %(return_type)s, %(user_id)s, %(created_at)s, FALSE, TRUE
+        FROM tmp_record_label_import s
+        INNER JOIN labeling_task lt
+            ON lt.project_id = %(project_id)s AND lt.name = s.task_name
+        INNER JOIN labeling_task_label ltl
+            ON ltl.labeling_task_id = lt.id AND ltl.name = s.label_name
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM record_label_association rla
+            WHERE rla.record_id = s.record_id
+                AND rla.labeling_task_label_id = ltl.id
+                AND rla.source_type = %(source_type)s
+                AND rla.created_by = %(user_id)s
+        )""",
+        {
+            "project_id": project_id,
+            "source_type": enums.LabelSource.MANUAL.value,
+            "return_type": enums.InformationSourceReturnType.RETURN.value,
+            "user_id": user_id,
+            "created_at": created_at,
+        },
     )
 
 
@@ -299,28 +590,35 @@ def split_record_data_and_label_data(
 def create_attributes_and_get_text_attributes(
     project_id: str, records_data: List[Dict[str, Any]]
 ) -> List[Attribute]:
+    # one read of the existing attributes & one flush for all new ones, queries in
+    # between would flush every created attribute on its own
+    existing_attributes = attribute.get_all(project_id, state_filter=[])
+    existing_names = {attribute_item.name for attribute_item in existing_attributes}
+    keys = dict.fromkeys(key for record_data in records_data for key in record_data)
+    new_keys = [key for key in keys if key not in existing_names]
+    if not new_keys:
+        return []
+
+    data_types = category.infer_category_enums(
+        pd.DataFrame.from_records(records_data, columns=new_keys)
+    )
+    relative_position = max(
+        (
+            attribute_item.relative_position
+            for attribute_item in existing_attributes
+            if attribute_item.relative_position is not None
+        ),
+        default=0,
+    )
     text_attributes = []
-    created_something = False
-    df_check = pd.DataFrame(records_data)
-    for key in df_check.columns:
-        if attribute.get_by_name(project_id, key) is None:
-            relative_position = attribute.get_relative_position(project_id)
-            if relative_position is None:
-                relative_position = 1
-            else:
-                relative_position += 1
-            attribute_item = attribute.create(
-                project_id,
-                key,
-                relative_position,
-                category.infer_category_enum(df_check, key),
-                False,
-            )
-            created_something = True
-            if attribute_item.data_type == enums.DataTypes.TEXT.value:
-                text_attributes.append(attribute_item)
+    for key in new_keys:
+        relative_position += 1
+        attribute_item = attribute.create(
+            project_id, key, relative_position, data_types[key], False
+        )
+        if attribute_item.data_type == enums.DataTypes.TEXT.value:
+            text_attributes.append(attribute_item)
     general.flush()
-    if created_something:
-        notification.send_organization_update(project_id, f"attributes_updated")
+    notification.send_organization_update(project_id, f"attributes_updated")
 
     return text_attributes
@@ -1,9 +1,20 @@
 import datetime
 import json
-from typing import Any, List, Dict, Tuple, Union, Optional
+from itertools import islice
+from typing import Any, Iterator, List, Dict, Tuple, Union, Optional
+
+import ijson
+from openpyxl import load_workbook
 
 from submodules.model import enums
-from .checks import check_argument_allowed, run_checks, run_limit_checks
+from .checks import (
+    check_argument_allowed,
+    check_composite_key_duplicates,
+    run_checks,
+    run_limit_checks,
+    run_total_checks,
+    get_update_amount,
+)
 from submodules.model.models import UploadTask
 import pandas as pd
 from submodules.model.enums import NotificationType
@@ -17,6 +28,9 @@ from util import notification
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# rows of an upload that are held in memory at once during the import
+IMPORT_READ_CHUNK_SIZE = int(os.getenv("IMPORT_READ_CHUNK_SIZE", "10000"))
+
 
 def get_upload_task_message(
     task: UploadTask,
@@ -129,6 +143,260 @@ def convert_to_record_dict(
     return df.to_dict("records"), added_col
 
 
+def validate_file_in_chunks(
+    file_type: str,
+    file_name: str,
+    user_id: str,
+    file_import_options: str,
+    project_id: str,
+    column_mapping: Optional[Dict[str, str]] = None,
+) -> Tuple[int, Optional[str], Dict[str, str]]:
+    """First pass over an upload, runs the checks of convert_to_record_dict chunk by
+    chunk so nothing is written for invalid files.
+
+    Returns the row count, the name of the running id column that the import
+    adds (decided on the first chunk), if any, and the column dtypes of the whole
+    file (see convert_to_record_dict_chunks).
+    """
+    __check_file_type_given(file_type, file_name, user_id, project_id)
+    row_count = 0
+    update_count = 0
+    has_records = record.get_one(project_id) is not None
+    seen_keys = set()
+    added_col = None
+    column_types = {}
+    for df in read_file_in_chunks(
+        file_type, file_name, user_id, file_import_options, project_id
+    ):
+        if column_mapping:
+            df.rename(columns=column_mapping, inplace=True)
+        __merge_column_types(column_types, df, row_count == 0)
+        run_limit_checks(df, project_id, user_id)
+        run_checks(df, project_id, user_id)
+        check_composite_key_duplicates(df, seen_keys, project_id, user_id)
+        if has_records:
+            update_count += get_update_amount(df, project_id)
+        if row_count == 0:
+            added_col = add_running_id_if_not_present(df, project_id)
+        row_count += df.shape[0]
+    run_total_checks(row_count, update_count, project_id, user_id)
+    return row_count, added_col, column_types
+
+
+def convert_to_record_dict_chunks(
+    file_type: str,
+    file_name: str,
+    user_id: str,
+    file_import_options: str,
+    project_id: str,
+    column_mapping: Optional[Dict[str, str]] = None,
+    added_col: Optional[str] = None,
+    column_types: Optional[Dict[str, str]] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    # second pass, same conversion as convert_to_record_dict for each chunk
+    # chunks are read with their own dtypes (e.g. only some contain missing values),
+    # the types of the whole file are applied so an attribute gets values of one type
+    unknown_keys = None
+    for df in read_file_in_chunks(
+        file_type, file_name, user_id, file_import_options, project_id
+    ):
+        if column_mapping:
+            df.rename(columns=column_mapping, inplace=True)
+        if column_types:
+            df = __apply_column_types(df, column_types)
+        if unknown_keys is None:
+            # the types are the same for every chunk, checked & notified once
+            unknown_keys = check_and_convert_category_for_unknown(
+                df, project_id, user_id
+            )
+        else:
+            for key in unknown_keys:
+                df[key] = df[key].astype(str)
+        covert_nested_attributes_to_text(df)
+        if added_col:
+            # chunks keep the row numbers of the file as index
+            df[added_col] = df.index
+        yield df.to_dict("records")
+
+
+def __merge_column_types(
+    column_types: Dict[str, str], df: pd.DataFrame, is_first_chunk: bool
+) -> None:
+    # dtype a single read of the file would have chosen, missing values are filled
+    # with " " so columns missing in a chunk or of different types become object
+    chunk_types = {key: dtype.name for key, dtype in df.dtypes.items()}
+    for key in column_types:
+        if key not in chunk_types:
+            column_types[key] = "object"
+    for key, type_name in chunk_types.items():
+        if key not in column_types:
+            column_types[key] = type_name if is_first_chunk else "object"
+        elif column_types[key] != type_name:
+            if {column_types[key], type_name} == {"int64", "float64"}:
+                column_types[key] = "float64"
+            else:
+                column_types[key] = "object"
+
+
+def __apply_column_types(
+    df: pd.DataFrame, column_types: Dict[str, str]
+) -> pd.DataFrame:
+    df = df.reindex(columns=list(column_types), fill_value=" ")
+    for key, type_name in column_types.items():
+        if df[key].dtype.name != type_name:
+            df[key] = df[key].astype(type_name)
+    return df
+
+
+def read_file_in_chunks(
+    file_type: str,
+    file_path: str,
+    user_id: str,
+    file_import_options: str,
+    project_id: str,
+    chunk_size: int = IMPORT_READ_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Reads an upload as data frames of up to chunk_size rows, indexed by the row
+    number in the file.
+
+    CSV, JSON lines, JSON arrays and XLSX (without import options) are streamed,
+    other formats are read at once and split.
+    """
+    if not os.path.exists(file_path):
+        raise Exception("Couldn't locate file")
+
+    original_file_type = file_type.lower()
+    file_type = original_file_type
+    if file_type in ["xls", "xlsm", "xlsb", "odf", "ods", "odt"]:
+        file_type = "xlsx"
+
+    file_import_options = (
+        string_to_import_option_dict(file_import_options, user_id, project_id)
+        if file_import_options
+        else {}
+    )
+    try:
+        if file_type in ["csv", "txt", "text"]:
+            chunks = pd.read_csv(file_path, chunksize=chunk_size, **file_import_options)
+        elif original_file_type == "xlsx" and not file_import_options:
+            chunks = __read_xlsx_in_chunks(file_path, chunk_size)
+        elif (
+            file_type == "json"
+            and str(file_import_options.get("lines")).lower() == "true"
+        ):
+            file_import_options["lines"] = True
+            chunks = pd.read_json(
+                file_path, chunksize=chunk_size, **file_import_options
+            )
+        elif (
+            file_type == "json"
+            and not file_import_options
+            and __first_character(file_path) == "["
+        ):
+            chunks = __read_json_array_in_chunks(file_path, chunk_size)
+        elif file_type == "xlsx":
+            chunks = __split_df(
+                pd.read_excel(file_path, **file_import_options), chunk_size
+            )
+        elif file_type == "json":
+            chunks = __split_df(
+                pd.read_json(file_path, **file_import_options), chunk_size
+            )
+        else:
+            notification.create_notification(
+                NotificationType.INVALID_FILE_TYPE,
+                user_id,
+                project_id,
+                file_type,
+            )
+            raise Exception("Upload conversion error", "Upload ran into errors")
+        for df in chunks:
+            # ensure useable columns dont break the import
+            df = df.replace("\u0000", " ", regex=True)
+            df.fillna(" ", inplace=True)
+            yield df
+    except Exception as e:
+        logger.error(traceback.format_exc())
+        notification.create_notification(
+            NotificationType.UPLOAD_CONVERSION_FAILED,
+            user_id,
+            project_id,
+            str(e),
+        )
+        raise Exception("Upload conversion error", "Upload ran into errors")
+
+
+def __read_xlsx_in_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    # first sheet, first row as header (defaults of read_excel)
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [
+            str(name) if name is not None else f"Unnamed: {idx}"
+            for idx, name in enumerate(header)
+        ]
+        offset = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield pd.DataFrame(
+                chunk,
+                columns=columns,
+                index=pd.RangeIndex(offset, offset + len(chunk)),
+            )
+            offset += len(chunk)
+    finally:
+        workbook.close()
+
+
+def __read_json_array_in_chunks(
+    file_path: str, chunk_size: int
+) -> Iterator[pd.DataFrame]:
+    with open(file_path, "rb") as f:
+        items = ijson.items(f, "item", use_float=True)
+        offset = 0
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                return
+            yield pd.DataFrame(
+                chunk, index=pd.RangeIndex(offset, offset + len(chunk))
+            )
+            offset += len(chunk)
+
+
+def __split_df(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, df.shape[0], chunk_size):
+        yield df.iloc[start : start + chunk_size].copy()
+
+
+def __first_character(file_path: str) -> str:
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        while True:
+            character = f.read(1)
+            if not character or not character.isspace():
+                return character
+
+
+def __check_file_type_given(
+    file_type: str, file_name: str, user_id: str, project_id: str
+) -> None:
+    if file_type:
+        return
+    notification.create_notification(
+        NotificationType.FILE_TYPE_NOT_GIVEN,
+        user_id,
+        project_id,
+    )
+    if os.path.exists(file_name):
+        os.remove(file_name)
+    raise Exception("Upload conversion error", "Upload ran into errors")
+
+
 def add_running_id_if_not_present(df: pd.DataFrame, project_id: str) -> Optional[str]:
     record_item = record.get_one(project_id)
     if record_item:
@@ -151,7 +419,7 @@ def add_running_id_if_not_present(df: pd.DataFrame, project_id: str) -> Optional
 
 def check_and_convert_category_for_unknown(
     df_check: pd.DataFrame, project_id: str, user_id: str
-) -> None:
+) -> List[str]:
     changed_keys = []
     for key in df_check.columns:
         if category.infer_category_enum(df_check, key) == enums.DataTypes.UNKNOWN.value:
@@ -164,6 +432,7 @@ def check_and_convert_category_for_unknown(
             project_id,
             ", ".join(changed_keys),
         )
+    return changed_keys
 
 
 def covert_nested_attributes_to_text(df: pd.DataFrame) -> pd.DataFrame:
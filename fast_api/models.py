@@ -27,12 +27,14 @@ class SearchRecordsBySimilarityBody(BaseModel):
     recordId: StrictStr
     attFilter: Any = None
     recordSubKey: Any = None
+    limit: Optional[StrictInt] = None
 
 
 class SearchRecordsExtendedBody(BaseModel):
     filterData: Any = None
     offset: StrictInt
     limit: StrictInt
+    continuationToken: Optional[StrictStr] = None
 
 
 class RecordsByStaticSliceBody(BaseModel):
@@ -72,6 +74,7 @@ class AvailableLinksBody(BaseModel):
 class HuddleDataBody(BaseModel):
     huddleId: Optional[StrictStr] = None
     huddleType: Optional[StrictStr] = None
+    position: Optional[StrictInt] = None
 
 
 class WarningDataBody(BaseModel):
@@ -1,6 +1,12 @@
 import json
-from typing import Any, Optional
-from fastapi.responses import JSONResponse, PlainTextResponse, Response
+import orjson
+from typing import Any, Dict, List, Optional
+from fastapi.responses import (
+    JSONResponse,
+    ORJSONResponse,
+    PlainTextResponse,
+    Response,
+)
 from fastapi import status
 from sqlalchemy.engine.row import Row
 from submodules.model.models import Base
@@ -30,6 +36,34 @@ def pack_json_result(
         )
 
 
+def pack_orjson_result(
+    content: Any,
+    status_code: Optional[int] = None,
+    wrap_for_frontend: bool = True,
+):
+    # same as pack_json_result but encoded with orjson, for large responses
+    if wrap_for_frontend:
+        content = wrap_content_for_frontend(content)
+    return ORJSONResponse(
+        status_code=status_code or status.HTTP_200_OK,
+        content=content,
+    )
+
+
+def to_record_data_list(
+    record_list: Any, with_typename: bool = True
+) -> List[Dict[str, str]]:
+    """Serializes the (frontend converted) records of the data browser to the
+    recordData strings of the responses.
+    """
+    if with_typename:
+        return [
+            {"recordData": orjson.dumps(item).decode(), "__typename": "ExtendedRecord"}
+            for item in record_list
+        ]
+    return [{"recordData": orjson.dumps(item).decode()} for item in record_list]
+
+
 def wrap_content_for_frontend(content: Any):
     if not content:
         return content
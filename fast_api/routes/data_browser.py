@@ -14,7 +14,11 @@ from fast_api.models import (
     SearchRecordsExtendedBody,
     UpdateDataSliceBody,
 )
-from fast_api.routes.client_response import pack_json_result
+from fast_api.routes.client_response import (
+    pack_json_result,
+    pack_orjson_result,
+    to_record_data_list,
+)
 from service.search.search import resolve_extended_search
 from submodules.model.business_objects import general
 from util import notification
@@ -63,25 +67,24 @@ def search_records_extended(
     user_id = auth_manager.get_user_id_by_info(request.state.info)
 
     results = manager.get_records_by_extended_search(
-        project_id, user_id, filter_data, limit, offset
+        project_id, user_id, filter_data, limit, offset, body.continuationToken
     )
 
     record_list = sql_alchemy_to_dict(results.record_list, for_frontend=False)
     record_list = to_frontend_obj_raw(record_list)
-    record_list_pop = [
-        {"recordData": json.dumps(item), "__typename": "ExtendedRecord"}
-        for item in record_list
-    ]
+    record_list_pop = to_record_data_list(record_list)
 
     data = {
         "recordList": record_list_pop,
         "queryLimit": results.query_limit,
         "queryOffset": results.query_offset,
         "fullCount": results.full_count,
+        "fullCountIsApproximate": results.full_count_is_approximate,
         "sessionId": results.session_id,
+        "continuationToken": results.continuation_token,
     }
 
-    return pack_json_result({"data": {"searchRecordsExtended": data}})
+    return pack_orjson_result({"data": {"searchRecordsExtended": data}})
 
 
 @router.post(
@@ -99,21 +102,25 @@ def search_records_extended_cog(
 
     user_id = auth_manager.get_user_id_by_info(request.state.info)
 
-    results = resolve_extended_search(project_id, user_id, filter_data, limit, offset)
+    results = resolve_extended_search(
+        project_id, user_id, filter_data, limit, offset, body.continuationToken
+    )
 
     record_list = sql_alchemy_to_dict(results.record_list, for_frontend=False)
     record_list = to_frontend_obj_raw(record_list)
-    record_list_pop = [{"recordData": json.dumps(item)} for item in record_list]
+    record_list_pop = to_record_data_list(record_list, with_typename=False)
 
     data = {
         "queryLimit": results.query_limit,
         "queryOffset": results.query_offset,
         "fullCount": results.full_count,
+        "fullCountIsApproximate": results.full_count_is_approximate,
         "sessionId": str(results.session_id),
+        "continuationToken": results.continuation_token,
         "recordList": record_list_pop,
     }
 
-    return pack_json_result({"data": {"searchRecordsExtended": data}})
+    return pack_orjson_result({"data": {"searchRecordsExtended": data}})
 
 
 @router.post(
@@ -170,20 +177,18 @@ def get_records_by_static_slice(
 
     record_list = sql_alchemy_to_dict(results.record_list, for_frontend=False)
     record_list = to_frontend_obj_raw(record_list)
-    record_list_pop = [
-        {"recordData": json.dumps(item), "__typename": "ExtendedRecord"}
-        for item in record_list
-    ]
+    record_list_pop = to_record_data_list(record_list)
 
     data = {
         "recordList": record_list_pop,
         "queryLimit": results.query_limit,
         "queryOffset": results.query_offset,
         "fullCount": results.full_count,
+        "fullCountIsApproximate": results.full_count_is_approximate,
         "sessionId": results.session_id,
     }
 
-    return pack_json_result({"data": {"recordsByStaticSlice": data}})
+    return pack_orjson_result({"data": {"recordsByStaticSlice": data}})
 
 
 @router.post(
@@ -239,24 +244,28 @@ def get_search_records_by_similarity(
 
     user_id = auth_manager.get_user_by_info(request.state.info).id
     results = manager.get_records_by_similarity_search(
-        project_id, user_id, embedding_id, record_id, att_filter, record_sub_key
+        project_id,
+        user_id,
+        embedding_id,
+        record_id,
+        att_filter,
+        record_sub_key,
+        body.limit,
     )
     record_list = sql_alchemy_to_dict(results.record_list, for_frontend=False)
     record_list = to_frontend_obj_raw(record_list)
-    record_list_pop = [
-        {"recordData": json.dumps(item), "__typename": "ExtendedRecord"}
-        for item in record_list
-    ]
+    record_list_pop = to_record_data_list(record_list)
 
     data = {
         "recordList": record_list_pop,
         "queryLimit": results.query_limit,
         "queryOffset": results.query_offset,
         "fullCount": results.full_count,
+        "fullCountIsApproximate": results.full_count_is_approximate,
         "sessionId": results.session_id,
     }
 
-    return pack_json_result({"data": {"searchRecordsBySimilarity": data}})
+    return pack_orjson_result({"data": {"searchRecordsBySimilarity": data}})
 
 
 @router.post(
@@ -111,12 +111,14 @@ def get_huddle_data(
     user_id = str(auth_manager.get_user_by_info(request.state.info).id)
 
     huddle_data = project_manager.resolve_request_huddle_data(
-        project_id, user_id, huddle_id, huddle_type
+        project_id, user_id, huddle_id, huddle_type, body.position
     )
 
     data = {
         "huddleId": huddle_data.huddle_id,
         "recordIds": huddle_data.record_ids,
+        "recordOffset": huddle_data.record_offset,
+        "recordCount": huddle_data.record_count,
         "huddleType": huddle_type,
         "startPos": huddle_data.start_pos,
         "allowedTask": huddle_data.allowed_task,
@@ -391,6 +393,8 @@ def get_record_label_associations(
     last_name = names.get("last", "")
 
     edges = []
+    # labels, tasks, attributes & sources repeat over the associations of a record
+    information_sources, labels, tasks, attributes = {}, {}, {}, {}
     rla = record.record_label_associations
     for r in rla:
 
@@ -409,9 +413,13 @@ def get_record_label_associations(
             token_end_idx = r.tokens[-1].token_index
 
         if source_id:
-            information_source = information_source_manager.get_information_source(
-                project_id, source_id
-            )
+            if source_id not in information_sources:
+                information_sources[source_id] = (
+                    information_source_manager.get_information_source(
+                        project_id, source_id
+                    )
+                )
+            information_source = information_sources[source_id]
             if information_source:
                 informationSourceDict = {
                     "type": information_source.type,
@@ -422,9 +430,10 @@ def get_record_label_associations(
                     "createdBy": information_source.created_by,
                 }
 
-        labelingTaskLabel = label_manager.get_label(
-            project_id, str(r.labeling_task_label_id)
-        )
+        label_id = str(r.labeling_task_label_id)
+        if label_id not in labels:
+            labels[label_id] = label_manager.get_label(project_id, label_id)
+        labelingTaskLabel = labels[label_id]
 
         if labelingTaskLabel:
             labelingTaskLabelDict = {
@@ -433,9 +442,10 @@ def get_record_label_associations(
                 "color": labelingTaskLabel.color,
             }
 
-            labelingTask = task_manager.get_labeling_task(
-                project_id, labelingTaskLabel.labeling_task_id
-            )
+            task_id = labelingTaskLabel.labeling_task_id
+            if task_id not in tasks:
+                tasks[task_id] = task_manager.get_labeling_task(project_id, task_id)
+            labelingTask = tasks[task_id]
             if labelingTask:
                 labelingTaskDict = {
                     "id": str(labelingTask.id),
@@ -443,9 +453,12 @@ def get_record_label_associations(
                 }
                 labelingTaskLabelDict["labeling_task"] = labelingTaskDict
 
-                attribute = attribute_manager.get_attribute(
-                    project_id, labelingTask.attribute_id
-                )
+                attribute_id = labelingTask.attribute_id
+                if attribute_id not in attributes:
+                    attributes[attribute_id] = attribute_manager.get_attribute(
+                        project_id, attribute_id
+                    )
+                attribute = attributes[attribute_id]
                 if attribute:
                     attributeDict = {
                         "id": str(labelingTask.attribute_id),
@@ -15,6 +15,7 @@ from controller.auth import manager as auth
 from controller.misc import manager
 from controller.misc import manager as misc
 from controller.monitor import manager as controller_manager
+from controller.payload import run_scheduler
 from controller.model_provider import manager as model_provider_manager
 from controller.task_master import manager as task_master_manager
 from submodules.model import enums
@@ -149,6 +150,13 @@ def cancel_task(
     return pack_json_result({"data": {"cancelTask": {"ok": True}}})
 
 
+@router.get("/run-queue")
+def get_run_queue(request: Request, org_id: Optional[str] = None) -> Dict:
+    auth.check_admin_access(request.state.info)
+    data = run_scheduler.get_queue_stats(org_id)
+    return pack_json_result({"data": {"runQueue": data}})
+
+
 @router.post("/cancel-all-running-tasks")
 def cancel_all_running_tasks(request: Request):
     auth.check_admin_access(request.state.info)
@@ -34,6 +34,8 @@ class ExtendedSearch:
         full_count: int = None,
         session_id: UUID = None,
         record_list: List[ExtendedRecord] = None,
+        continuation_token: str = None,
+        full_count_is_approximate: bool = False,
     ):
         self.sql = sql
         self.query_limit = query_limit
@@ -41,6 +43,10 @@ class ExtendedSearch:
         self.full_count = full_count
         self.session_id = session_id
         self.record_list = record_list if record_list is not None else []
+        # opaque, fetches the next page when passed to the next search
+        self.continuation_token = continuation_token
+        # planner estimate instead of an exact count for very large results
+        self.full_count_is_approximate = full_count_is_approximate
 
 
 class ToolTip:
@@ -129,9 +135,14 @@ class HuddleData:
         allowed_task: str = None,
         can_edit: bool = None,
         checked_at: datetime = None,
+        record_offset: int = 0,
+        record_count: int = None,
     ):
         self.huddle_id = huddle_id
         self.record_ids = record_ids if record_ids is not None else []
+        # position of record_ids in the full list of the huddle
+        self.record_offset = record_offset
+        self.record_count = record_count
         self.huddle_type = huddle_type
         self.start_pos = start_pos
         self.allowed_task = allowed_task
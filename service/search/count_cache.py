@@ -0,0 +1,101 @@
+from typing import Any, List, Optional, Tuple
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+
+from submodules.model.business_objects import general
+from util import sql_helper
+from .search_helper import execute_prepared, render_sql
+
+# number of count results kept in memory over all projects
+SEARCH_COUNT_CACHE_SIZE = int(os.getenv("SEARCH_COUNT_CACHE_SIZE", "1000"))
+# above this planner estimate the estimate is returned instead of an exact count
+# (flagged as approximate), 0 always counts exactly
+SEARCH_APPROXIMATE_COUNT_THRESHOLD = int(
+    os.getenv("SEARCH_APPROXIMATE_COUNT_THRESHOLD", "0")
+)
+
+# change log rows kept per project, older ones are removed when counting
+SEARCH_COUNT_CHANGE_LOG_SIZE = int(os.getenv("SEARCH_COUNT_CHANGE_LOG_SIZE", "1000"))
+
+__count_cache = OrderedDict()  # {(project_id, sql_hash): (version, count, approx)}
+__THREAD_LOCK = Lock()
+
+
+def get_count(
+    project_id: str,
+    count_sql: str,
+    params: Optional[List[Any]] = None,
+    estimate_sql: Optional[str] = None,
+) -> Tuple[int, bool]:
+    """Returns the count of a count statement and whether it's only an estimate.
+
+    The count statement is the normalized form of the filter, results are reused
+    until the project data changes. With params the statement runs prepared.
+    Estimates are only considered if a row statement (estimate_sql) is given.
+    """
+    project_id = str(project_id)
+    rendered_sql = render_sql(count_sql, params)
+    key = (project_id, hashlib.sha256(rendered_sql.encode("utf-8")).hexdigest())
+    version = __data_version(project_id)
+    if version[0] > SEARCH_COUNT_CHANGE_LOG_SIZE:
+        __prune_change_log(project_id, version[1])
+        version = __data_version(project_id)
+    with __THREAD_LOCK:
+        entry = __count_cache.get(key)
+        if entry and entry[0] == version:
+            __count_cache.move_to_end(key)
+            return entry[1], entry[2]
+
+    count, is_approximate = None, False
+    if estimate_sql and SEARCH_APPROXIMATE_COUNT_THRESHOLD > 0:
+        estimate = __estimate_row_count(estimate_sql)
+        if estimate > SEARCH_APPROXIMATE_COUNT_THRESHOLD:
+            count, is_approximate = estimate, True
+    if count is None and params is not None:
+        count = execute_prepared(count_sql, params, project_id)[0][0]
+    elif count is None:
+        count = general.execute_distinct_count(count_sql)
+
+    with __THREAD_LOCK:
+        # the version was taken before counting, so changes made in the meantime
+        # lead to a recount with the next request
+        __count_cache[key] = (version, count, is_approximate)
+        while len(__count_cache) > SEARCH_COUNT_CACHE_SIZE:
+            __count_cache.popitem(last=False)
+    return count, is_approximate
+
+
+def __data_version(project_id: str) -> Tuple[int, int]:
+    # triggers on the tables the filters read from log every write statement of a
+    # project. The row count changes with every commit, the maximum alone would miss
+    # a transaction that took its id earlier but committed later
+    sql = f"""
+    SELECT COUNT(*), COALESCE(MAX(id), 0)
+    FROM project_data_change
+    WHERE project_id = '{project_id}'
+    """
+    change_count, last_change = general.execute_first(sql)
+    return int(change_count), int(last_change)
+
+
+def __prune_change_log(project_id: str, last_change: int) -> None:
+    # own transaction, the caller's session isn't committed
+    with sql_helper.raw_connection() as connection:
+        connection.cursor().execute(
+            """
+            DELETE FROM project_data_change
+            WHERE project_id = %(project_id)s AND id < %(last_change)s
+            """,
+            {"project_id": project_id, "last_change": last_change},
+        )
+
+
+def __estimate_row_count(sql: str) -> int:
+    plan = general.execute_first(f"EXPLAIN (FORMAT JSON) {sql}")[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
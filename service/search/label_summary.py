@@ -0,0 +1,83 @@
+from typing import List
+
+import os
+import traceback
+from time import sleep
+
+from submodules.model import daemon
+from util import sql_helper
+
+# the record_label_association triggers only queue changed records, the summary rows
+# (search filters & ordering) are refreshed here in short separate transactions
+# manual labels are refreshed right away, other writers (imports, weak supervision,
+# label functions) are visible to the filters within about one interval
+LABEL_SUMMARY_REFRESH_INTERVAL = float(
+    os.getenv("LABEL_SUMMARY_REFRESH_INTERVAL", "1")
+)  # seconds
+LABEL_SUMMARY_REFRESH_BATCH = int(os.getenv("LABEL_SUMMARY_REFRESH_BATCH", "5000"))
+
+
+def start_refresh_thread() -> None:
+    daemon.run_without_db_token(__refresh_loop)
+
+
+def refresh_records(record_ids: List[str]) -> None:
+    """Refreshes the summary of the given records right away, e.g. after a manual
+    label so the user's next search already sees it.
+
+    Own short transaction, call it after the label change is committed.
+    """
+    if not record_ids:
+        return
+    with sql_helper.raw_connection() as connection:
+        connection.cursor().execute(
+            "SELECT refresh_record_label_summary(%s::UUID[])",
+            ([str(record_id) for record_id in __sorted_unique(record_ids)],),
+        )
+
+
+def refresh_queued_records() -> int:
+    """Refreshes the summary of up to LABEL_SUMMARY_REFRESH_BATCH queued records and
+    returns the number of queue entries processed.
+
+    Entries still written by open transactions aren't visible yet and entries taken by
+    other workers are skipped, so gateway instances can refresh side by side.
+    """
+    with sql_helper.raw_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            DELETE FROM record_label_summary_dirty
+            WHERE id IN (
+                SELECT id
+                FROM record_label_summary_dirty
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING record_id""",
+            (LABEL_SUMMARY_REFRESH_BATCH,),
+        )
+        queued = [str(row[0]) for row in cursor.fetchall()]
+        if queued:
+            cursor.execute(
+                "SELECT refresh_record_label_summary(%s::UUID[])",
+                (__sorted_unique(queued),),
+            )
+    return len(queued)
+
+
+def __refresh_loop() -> None:
+    while True:
+        sleep(LABEL_SUMMARY_REFRESH_INTERVAL)
+        try:
+            # a full batch means there is probably more queued already
+            while refresh_queued_records() == LABEL_SUMMARY_REFRESH_BATCH:
+                pass
+        except Exception:
+            print(traceback.format_exc(), flush=True)
+
+
+def __sorted_unique(record_ids: List[str]) -> List[str]:
+    # lock order of the summary rows, see refresh_record_label_summary
+    return sorted(set(record_ids))
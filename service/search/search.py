@@ -1,6 +1,11 @@
 from dataclasses import dataclass
+import os
+import json
 import zlib
-from typing import Tuple, Dict, List, Any, Optional, Union
+import base64
+import hashlib
+import uuid
+from typing import Tuple, Dict, List, Any, Optional
 
 from fast_api.types import ExtendedSearch
 from submodules.model import UserSessions
@@ -11,6 +16,7 @@ from submodules.model.enums import (
     Tablenames,
     RecordCategory,
 )
+from . import count_cache
 from .search_enum import (
     FilterDataDictKeys,
     SearchQueryTemplate,
@@ -23,6 +29,10 @@ from .search_helper import (
     build_order_by_table_select,
     get_query_template,
     build_search_condition,
+    build_keyset_column,
+    build_keyset_condition,
+    execute_prepared,
+    render_sql,
 )
 
 
@@ -44,6 +54,11 @@ class UserSessionData:
     random_seed: float
 
 
+# record ids of a labeling session returned per request, around the current position
+SESSION_RECORD_WINDOW = int(os.getenv("SESSION_RECORD_WINDOW", "1000"))
+# records of a labeling session, the rest of the filter result isn't part of it
+SESSION_RECORD_LIMIT = int(os.getenv("SESSION_RECORD_LIMIT", "100000"))
+
 __seed_number = None
 
 
@@ -58,6 +73,28 @@ def generate_data_slice_record_associations_insert_statement(
     return sql_insert_statement
 
 
+def generate_record_id_batch_sql(
+    project_id: str,
+    filter_data: List[Dict[str, Any]],
+    after_record_id: Optional[str],
+    limit: int,
+) -> str:
+    # ids of the filter in record id order, consecutive batches continue after the
+    # last id of the previous one
+    filter_data = [
+        filter_element
+        for filter_element in filter_data
+        if FilterDataDictKeys.ORDER_BY.value not in filter_element
+    ]
+    keyset_columns = [
+        {"EXPRESSION": "r.id", "RESULT_COLUMN": "record_id", "DIRECTION": "ASC"}
+    ]
+    after_values = [after_record_id] if after_record_id else None
+    return generate_select_sql(
+        project_id, filter_data, limit, 0, True, keyset_columns, after_values
+    )
+
+
 def resolve_records_by_static_slice(
     user_id: str,
     project_id: str,
@@ -126,58 +163,199 @@ def resolve_records_by_static_slice(
     return extended_search
 
 
+def resolve_records_by_similarity(
+    project_id: str, user_id: str, record_ids: List[str]
+) -> ExtendedSearch:
+    """Records and label data of the given ids in the given (similarity) order,
+    fetched by primary key in one statement.
+    """
+    # the ids come from the neural search, formatting them validates them as well
+    id_list = ", ".join(f"'{uuid.UUID(str(record_id))}'" for record_id in record_ids)
+    ranked_records = f"""FROM UNNEST(ARRAY[{id_list}]::UUID[]) WITH ORDINALITY ranked(record_id, db_order)
+        INNER JOIN record r
+            ON r.project_id = '{project_id}' AND r.id = ranked.record_id"""
+    sql = f"""
+        SELECT r.*, r.id record_id, ranked.db_order, data_grabber.rla_data
+        {ranked_records}
+        {__join_label_data(project_id, "r.id")}
+        ORDER BY ranked.db_order
+        """
+    extended_search = ExtendedSearch(
+        sql=sql,
+        query_limit=len(record_ids),
+        query_offset=0,
+    )
+    extended_search.record_list = [record for record in general.execute_all(sql)]
+    extended_search.full_count = len(extended_search.record_list)
+
+    # the labeling session keeps the similarity order as well
+    id_sql_statement = f"""
+        SELECT r.id record_id
+        {ranked_records}
+        ORDER BY ranked.db_order
+        """
+    count_sql = f"""
+        SELECT COUNT(*) distinct_count
+        FROM ( {id_sql_statement} ) id_grabber
+        """
+    user_session_data = __create_static_user_session_object(
+        project_id,
+        user_id,
+        id_sql_statement,
+        count_sql,
+        extended_search.full_count,
+        None,
+    )
+    extended_search.session_id = __write_user_session_entry(user_session_data)
+    return extended_search
+
+
 def resolve_extended_search(
     project_id: str,
     user_id: str,
     filter_data: List[Dict[str, Any]],
     limit: int,
     offset: int,
+    continuation_token: Optional[str] = None,
 ) -> ExtendedSearch:
+    """Pages are fetched by seeking after the last record of the previous page if
+    its continuation token is given (offset is ignored then), by offset otherwise.
+    """
     global __seed_number
     local_seed = None
 
-    __ensure_text(filter_data)
-    sql_statement_count = generate_count_sql(project_id, filter_data)
-
-    count = general.execute_distinct_count(sql_statement_count)
+    count_sql, count_params = __compile_count_sql(project_id, filter_data)
+    count, count_is_approximate = count_cache.get_count(
+        project_id,
+        count_sql,
+        count_params,
+        __generate_estimate_sql(project_id, filter_data),
+    )
 
-    sql_statement_normal = generate_select_sql(project_id, filter_data, limit, offset)
+    keyset_columns = __get_keyset_columns(filter_data, project_id)
+    after_values = None
+    if keyset_columns:
+        after_values = __parse_continuation_token(
+            continuation_token, filter_data, keyset_columns
+        )
+    select_sql, select_params = __compile_select_sql(
+        project_id,
+        filter_data,
+        limit,
+        offset,
+        keyset_columns=keyset_columns,
+        after_values=after_values,
+    )
 
     extended_search = ExtendedSearch(
-        sql=sql_statement_normal,
+        sql=render_sql(select_sql, select_params),
         query_limit=limit,
         query_offset=offset,
         full_count=count,
+        full_count_is_approximate=count_is_approximate,
     )
     if __seed_number:
         local_seed = __seed_number
         __seed_number = None
         general.execute(f"SELECT setseed({local_seed});")
     extended_search.record_list = [
-        record for record in general.execute_all(sql_statement_normal)
+        record
+        for record in execute_prepared(select_sql, select_params, project_id)
     ]
+    if keyset_columns and limit and len(extended_search.record_list) == limit:
+        extended_search.continuation_token = __build_continuation_token(
+            filter_data, keyset_columns, extended_search.record_list[-1]
+        )
 
     user_session_data = __create_default_user_session_object(
-        project_id, user_id, filter_data, sql_statement_count, count, local_seed
+        project_id,
+        user_id,
+        filter_data,
+        render_sql(count_sql, count_params),
+        # an estimate would report changed amounts that never happened
+        -1 if count_is_approximate else count,
+        local_seed,
+        keyset_columns,
     )
 
     extended_search.session_id = __write_user_session_entry(user_session_data)
     return extended_search
 
 
-def __ensure_text(filter_data: List[Union[str, Dict[str, Any]]]) -> None:
-    for idx, element in enumerate(filter_data):
-        if isinstance(element, str):
-            filter_data[idx] = element.replace("'", "''")
-            continue
-        if isinstance(element, dict):
-            for key in element:
-                if isinstance(element[key], str):
-                    element[key] = element[key].replace("'", "''")
-                    continue
-                if isinstance(element[key], list):
-                    __ensure_text(element[key])
-                    continue
+def __get_keyset_columns(
+    filter_data: List[Dict[str, Any]], project_id: str
+) -> Optional[List[Dict[str, str]]]:
+    # the active sort columns + record id as tiebreaker
+    # None if the order can't be continued (random order)
+    keyset_columns = []
+    for filter_element in filter_data:
+        if FilterDataDictKeys.ORDER_BY.value in filter_element:
+            for column, direction in zip(
+                filter_element[FilterDataDictKeys.ORDER_BY.value],
+                filter_element[FilterDataDictKeys.ORDER_DIRECTION.value],
+            ):
+                if column == "RANDOM":
+                    return None
+                keyset_columns.append(
+                    build_keyset_column(project_id, column, direction)
+                )
+            break
+    if not keyset_columns:
+        # pages without explicit order, roughly the insertion order but stable
+        keyset_columns.append(
+            {
+                "EXPRESSION": "r.created_at",
+                "RESULT_COLUMN": "created_at",
+                "DIRECTION": "ASC",
+            }
+        )
+    keyset_columns.append(
+        {"EXPRESSION": "r.id", "RESULT_COLUMN": "record_id", "DIRECTION": "ASC"}
+    )
+    return keyset_columns
+
+
+def __build_continuation_token(
+    filter_data: List[Dict[str, Any]],
+    keyset_columns: List[Dict[str, str]],
+    last_record: Any,
+) -> str:
+    token = {
+        "filter": __filter_fingerprint(filter_data),
+        "values": [last_record[c["RESULT_COLUMN"]] for c in keyset_columns],
+    }
+    return base64.urlsafe_b64encode(
+        json.dumps(token, default=str).encode("utf-8")
+    ).decode("utf-8")
+
+
+def __parse_continuation_token(
+    continuation_token: Optional[str],
+    filter_data: List[Dict[str, Any]],
+    keyset_columns: List[Dict[str, str]],
+) -> Optional[List[Any]]:
+    # tokens of a different filter or order are ignored, the page is fetched by
+    # offset then
+    if not continuation_token:
+        return None
+    try:
+        token = json.loads(base64.urlsafe_b64decode(continuation_token.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(token, dict) or token.get(
+        "filter"
+    ) != __filter_fingerprint(filter_data):
+        return None
+    values = token.get("values")
+    if not isinstance(values, list) or len(values) != len(keyset_columns):
+        return None
+    return values
+
+
+def __filter_fingerprint(filter_data: List[Dict[str, Any]]) -> str:
+    return hashlib.sha256(
+        json.dumps(filter_data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
 
 
 def resolve_labeling_session(
@@ -185,8 +363,7 @@ def resolve_labeling_session(
 ) -> UserSessions:
 
     user_session = __collect_user_session_data_from_db(project_id, session_id, user_id)
-    attr = getattr(user_session, "session_record_ids", None)
-    if not attr and user_session:
+    if user_session and __get_session_record_count(user_session.id) is None:
         user_session.temp_session = False
         general.commit()
         collect_user_session_record_ids(user_session, project_id)
@@ -194,13 +371,45 @@ def resolve_labeling_session(
     return user_session
 
 
+def get_session_record_window(
+    session_id: str, position: Optional[int] = None, size: int = SESSION_RECORD_WINDOW
+) -> Tuple[List[str], int, int]:
+    """Returns the record ids of a collected session around the position (centered),
+    the offset of the first returned id and the record count of the session.
+    """
+    record_count = __get_session_record_count(session_id) or 0
+    offset = 0
+    if position:
+        offset = max(0, min(position - size // 2, record_count - size))
+    record_ids = [
+        row[0]
+        for row in general.execute_all(
+            f"""
+            SELECT record_id::TEXT
+            FROM user_session_record
+            WHERE session_id = '{session_id}'
+                AND position BETWEEN {offset + 1} AND {offset + size}
+            ORDER BY position
+            """
+        )
+    ]
+    return record_ids, offset, record_count
+
+
+def __get_session_record_count(session_id: str) -> Optional[int]:
+    # None if the record ids weren't collected yet
+    row = general.execute_first(
+        f"SELECT record_count FROM user_sessions WHERE id = '{session_id}'"
+    )
+    return row[0] if row else None
+
+
 def collect_user_session_record_ids(
     user_session: UserSessions, project_id: str
 ) -> None:
-    # currently fixed values. In the future this might be changed to a dynamic value
-    limit = 1000
-    offset = 0
-    current_count = general.execute_distinct_count(user_session.count_sql_statement)
+    current_count, _ = count_cache.get_count(
+        project_id, user_session.count_sql_statement
+    )
     if current_count != user_session.last_count and user_session.last_count != -1:
         create_notification(
             NotificationType.SESSION_RECORD_AMOUNT_CHANGED,
@@ -209,16 +418,8 @@ def collect_user_session_record_ids(
         )
     user_session.last_count = current_count
 
-    if current_count > limit:
-        create_notification(
-            NotificationType.SESSION_INFO,
-            user_session.created_by,
-            project_id,
-            limit,
-        )
-
     update_query = __build_record_session_update_query(
-        user_session.id_sql_statement, limit, offset, user_session.id
+        user_session.id_sql_statement, user_session.id
     )
     if user_session.random_seed:
         general.execute(f"SELECT setseed({user_session.random_seed});")
@@ -247,20 +448,23 @@ def __create_default_user_session_object(
     count_sql_statement: str,
     last_count: int,
     random_seed: int,
+    keyset_columns: Optional[List[Dict[str, str]]] = None,
 ) -> UserSessionData:
-    id_sql_statement = ""
+    # same records & order as the pages of the search
+    params = []
+    inner_sql = __build_inner_query(
+        filter_data, project_id, params, 0, 0, False, keyset_columns
+    )
+    id_sql_statement = __build_final_query(inner_sql, project_id, False, True)
+    id_sql_statement = render_sql(id_sql_statement, params)
+    order_extension = __get_order_by(filter_data, project_id)
 
-    if len(filter_data) == 0:
-        id_sql_statement = __basic_id_query(project_id)
+    if order_extension != "":
+        id_sql_statement += order_extension
+        if keyset_columns:
+            id_sql_statement += ", id_grabber.record_id"
     else:
-        inner_sql = __build_inner_query(filter_data, project_id, 0, 0, False)
-        id_sql_statement = __build_final_query(inner_sql, project_id, False, True)
-        order_extension = __get_order_by(filter_data, project_id)
-
-        if order_extension != "":
-            id_sql_statement += order_extension
-        else:
-            id_sql_statement += "ORDER BY db_order"
+        id_sql_statement += "ORDER BY db_order"
     return UserSessionData(
         project_id,
         id_sql_statement,
@@ -296,18 +500,37 @@ def __write_user_session_entry(user_session_data: UserSessionData) -> str:
 
 
 def generate_count_sql(project_id: str, filter_data: List[Dict[str, Any]]) -> str:
+    return render_sql(*__compile_count_sql(project_id, filter_data))
+
 
+def __compile_count_sql(
+    project_id: str, filter_data: List[Dict[str, Any]]
+) -> Tuple[str, List[Any]]:
+    params = []
     if len(filter_data) == 0:
-        return f"""
+        sql = f"""
         SELECT COUNT(*) distinct_count
         FROM record
         WHERE project_id = '{project_id}'
         AND category = '{RecordCategory.SCALE.value}'
         """
+        return sql, params
     # no limit or offset since we want to count all
-    inner_sql = __build_inner_query(filter_data, project_id, 0, 0, True)
+    inner_sql = __build_inner_query(filter_data, project_id, params, 0, 0, True)
     final_sql = __build_final_query(inner_sql, project_id, True, False)
-    return final_sql
+    return final_sql, params
+
+
+def __generate_estimate_sql(
+    project_id: str, filter_data: List[Dict[str, Any]]
+) -> str:
+    # rows of the count statement, the planner estimate of this is used for
+    # approximate counts
+    if len(filter_data) == 0:
+        return __basic_id_query(project_id)
+    params = []
+    inner_sql = __build_inner_query(filter_data, project_id, params, 0, 0, True)
+    return render_sql(inner_sql, params)
 
 
 def generate_select_sql(
@@ -316,66 +539,132 @@ def generate_select_sql(
     limit,
     offset,
     for_id: Optional[bool] = False,
+    keyset_columns: Optional[List[Dict[str, str]]] = None,
+    after_values: Optional[List[Any]] = None,
 ) -> str:
+    return render_sql(
+        *__compile_select_sql(
+            project_id,
+            filter_data,
+            limit,
+            offset,
+            for_id,
+            keyset_columns,
+            after_values,
+        )
+    )
 
-    if len(filter_data) == 0:
-        return __basic_query(project_id, limit, offset)
 
-    inner_sql = __build_inner_query(filter_data, project_id, limit, offset, False)
+def __compile_select_sql(
+    project_id: str,
+    filter_data: List[Dict[str, Any]],
+    limit,
+    offset,
+    for_id: Optional[bool] = False,
+    keyset_columns: Optional[List[Dict[str, str]]] = None,
+    after_values: Optional[List[Any]] = None,
+) -> Tuple[str, List[Any]]:
+    # filter values are returned as parameters ($n placeholders in the statement)
+    # with keyset_columns the order is deterministic (record id as tiebreaker), with
+    # after_values the page starts after these values instead of at offset
+    params = []
+    if len(filter_data) == 0 and not keyset_columns:
+        return __basic_query(project_id, limit, offset), params
+
+    if after_values is not None:
+        offset = 0
+    inner_sql = __build_inner_query(
+        filter_data,
+        project_id,
+        params,
+        limit,
+        offset,
+        False,
+        keyset_columns,
+        after_values,
+    )
     final_sql = __build_final_query(inner_sql, project_id, False, for_id)
 
     order_extension = __get_order_by(filter_data, project_id)
 
     if order_extension != "":
         final_sql += order_extension
+        if keyset_columns:
+            final_sql += ", id_grabber.record_id"
     else:
         final_sql += "ORDER BY db_order"
-    return final_sql
+    return final_sql, params
 
 
 def __build_inner_query(
     filter_data: List[Dict[str, Any]],
     project_id: str,
+    params: List[Any],
     limit: int,
     offset: int,
     for_count: bool,
+    keyset_columns: Optional[List[Dict[str, str]]] = None,
+    after_values: Optional[List[Any]] = None,
 ) -> str:
-    sql = __build_base_query(filter_data, project_id, for_count)
+    sql = __build_base_query(
+        filter_data, project_id, params, for_count, keyset_columns, after_values
+    )
     sql = __add_limit_and_offset(sql, limit, offset)
     return sql
 
 
 def __build_base_query(
-    filter_data: List[Dict[str, Any]], project_id: str, for_count: bool
+    filter_data: List[Dict[str, Any]],
+    project_id: str,
+    params: List[Any],
+    for_count: bool,
+    keyset_columns: Optional[List[Dict[str, str]]] = None,
+    after_values: Optional[List[Any]] = None,
 ) -> str:
     select_add = ""
     from_add = ""
     where_add = ""
     if for_count:
         order_by_add = ""
+        keyset_columns = None
     else:
         order_by_add = __get_order_by(filter_data, project_id)
+    has_order_by = order_by_add != ""
+    if keyset_columns:
+        if has_order_by:
+            order_by_add += ", r.id"
+        else:
+            # created_at for pages, record id order for slice batches
+            order_by_add = f"ORDER BY {__build_keyset_order(keyset_columns)}"
 
-    where_add = __build_where_add(project_id, filter_data)
+    where_add = __build_where_add(project_id, filter_data, params)
+    if not filter_data:
+        # like __basic_query, unfiltered searches only cover the scale records
+        where_add += f"\n    AND r.category = '{RecordCategory.SCALE.value}'"
+    if keyset_columns and after_values is not None:
+        where_add += build_keyset_condition(keyset_columns, after_values, params)
 
     tmp_selection_add, tmp_from_add = __build_subquery_data(
-        filter_data, project_id, "WHITELIST"
+        filter_data, project_id, params, "WHITELIST"
     )
     select_add += tmp_selection_add
     from_add += tmp_from_add
 
     tmp_where_add, tmp_from_add = __build_subquery_data(
-        filter_data, project_id, "BLACKLIST"
+        filter_data, project_id, params, "BLACKLIST"
     )
     where_add += tmp_where_add
     from_add += tmp_from_add
 
-    if order_by_add != "":
+    if has_order_by:
         tmp_selection_add, tmp_from_add = __get_order_by_subquery(
             filter_data, project_id
         )
         select_add += tmp_selection_add
         from_add += tmp_from_add
+    elif keyset_columns:
+        keyset_order = __build_keyset_order(keyset_columns)
+        select_add += f", ROW_NUMBER() OVER(ORDER BY {keyset_order}) db_order"
     else:
         select_add += ", ROW_NUMBER() OVER() db_order"
 
@@ -395,8 +684,21 @@ def __build_base_query(
     return base_sql
 
 
+def __build_keyset_order(keyset_columns: List[Dict[str, str]]) -> str:
+    # null placement as expected by build_keyset_condition
+    return ", ".join(
+        f"{c['EXPRESSION']} ASC NULLS FIRST"
+        if c["DIRECTION"] == "ASC"
+        else f"{c['EXPRESSION']} DESC NULLS LAST"
+        for c in keyset_columns
+    )
+
+
 def __build_subquery_data(
-    filter_data: List[Dict[str, Any]], project_id: str, type_key: str
+    filter_data: List[Dict[str, Any]],
+    project_id: str,
+    params: List[Any],
+    type_key: str,
 ) -> Tuple[str, str]:
     c = 1
     select_add = ""
@@ -406,7 +708,7 @@ def __build_subquery_data(
     queries = __get_subqueries(filter_data, type_key)
     for query in queries:
         alias = type_key[0] + "L_" + str(c)
-        query_text = __build_subquery(query, project_id, 1)
+        query_text = __build_subquery(query, project_id, params, 1)
         if type_key == "WHITELIST":
             select_add += f", {alias}.*"
             from_add += f"""
@@ -426,7 +728,7 @@ LEFT JOIN ( {query_text} ) {alias}
 
 
 def __build_subquery(
-    query_data: List[Dict[str, Any]], project_id: str, depth: int
+    query_data: List[Dict[str, Any]], project_id: str, params: List[Any], depth: int
 ) -> str:
 
     final_query = ""
@@ -439,6 +741,7 @@ def __build_subquery(
             query_template_key,
             filter_element[FilterDataDictKeys.VALUES.value],
             project_id,
+            params,
         )
         if final_query != "":
             final_query += "\nUNION "
@@ -450,24 +753,33 @@ def __build_subquery(
 
 
 def __build_where_add(
-    project_id: str, filter_data: List[Dict[str, Any]], outer: Optional[bool] = True
+    project_id: str,
+    filter_data: List[Dict[str, Any]],
+    params: List[Any],
+    outer: Optional[bool] = True,
 ) -> str:
     current_condition = ""
     for filter_element in filter_data:
         ret = ""
         if FilterDataDictKeys.OPERATOR.value in filter_element:
-            ret = build_search_condition(project_id, filter_element)
+            ret = build_search_condition(project_id, filter_element, params)
 
         if FilterDataDictKeys.FILTER.value in filter_element:
             ret = __build_where_add(
-                project_id, filter_element[FilterDataDictKeys.FILTER.value], False
+                project_id,
+                filter_element[FilterDataDictKeys.FILTER.value],
+                params,
+                False,
             )
             if ret != "":
                 ret = f"( {ret} )"
         if ret != "" and filter_element[FilterDataDictKeys.NEGATION.value]:
             ret = f" NOT ( {ret} )"
         if ret != "" and filter_element[FilterDataDictKeys.RELATION.value] != "NONE":
-            ret = f" {filter_element[FilterDataDictKeys.RELATION.value]} {ret} "
+            relation = filter_element[FilterDataDictKeys.RELATION.value]
+            if relation not in ["AND", "OR"]:
+                raise ValueError(f"Invalid filter relation: {relation}")
+            ret = f" {relation} {ret} "
         current_condition += ret
 
     if current_condition != "" and outer:
@@ -599,29 +911,23 @@ def __build_final_query(
         INNER JOIN record r
             ON r.id = id_grabber.record_id 
             AND r.project_id = id_grabber.project_id 
-        LEFT JOIN (
-            SELECT project_id data_pID, record_id data_rID, json_agg(row_to_json(record_label_association)) rla_data
-            FROM record_label_association
-            WHERE project_id = '{project_id}'
-            GROUP BY project_id, record_id
-        ) data_grabber
-            ON id_grabber.record_id = data_grabber.data_rID 
-            AND id_grabber.project_id = data_grabber.data_pID
+        {__join_label_data(project_id, "id_grabber.record_id")}
         WHERE r.project_id = '{project_id}'
         """
 
 
-def __build_record_session_update_query(
-    inner_select: str, limit: int, offset: int, session_id: str
-) -> str:
-    if limit != 0:
-        inner_select += f"\n LIMIT {limit}"
-        if offset != 0:
-            inner_select += f" OFFSET {offset}"
-
+def __build_record_session_update_query(inner_select: str, session_id: str) -> str:
     return f"""
-UPDATE user_sessions SET session_record_ids = (SELECT json_agg(record_id) 
-FROM ( {inner_select} ) r) WHERE id = '{session_id}' """
+DELETE FROM user_session_record WHERE session_id = '{session_id}';
+WITH session_record AS (
+    INSERT INTO user_session_record (session_id, position, record_id)
+    SELECT '{session_id}', ROW_NUMBER() OVER (), r.record_id
+    FROM ( {inner_select} LIMIT {SESSION_RECORD_LIMIT} ) r
+    RETURNING 1
+)
+UPDATE user_sessions
+SET record_count = (SELECT COUNT(*) FROM session_record)
+WHERE id = '{session_id}' """
 
 
 def __basic_query(
@@ -646,18 +952,23 @@ def __select_full_extended_search(project_id: str, sql: str, order_by: str) -> s
     return f"""
     SELECT r.*,data_grabber.rla_data
     FROM ({sql}) r
-    LEFT JOIN (
-        SELECT project_id data_pID, record_id data_rID, json_agg(row_to_json(record_label_association)) rla_data
-        FROM record_label_association
-        WHERE project_id = '{project_id}'
-        GROUP BY project_id, record_id
-    ) data_grabber
-        ON r.id = data_grabber.data_rID 
-        AND r.project_id = data_grabber.data_pID
+    {__join_label_data(project_id, "r.id")}
     {order_by}
     """
 
 
+def __join_label_data(project_id: str, record_id_column: str) -> str:
+    # lateral so only the associations of the records in the (limited) page are
+    # aggregated and not the ones of the whole project
+    return f"""LEFT JOIN LATERAL (
+            SELECT json_agg(row_to_json(rla)) rla_data
+            FROM record_label_association rla
+            WHERE rla.project_id = '{project_id}'
+                AND rla.record_id = {record_id_column}
+        ) data_grabber
+            ON TRUE"""
+
+
 def __select_record_data(
     project_id: str,
     slice_id: Optional[str] = None,
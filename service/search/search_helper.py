@@ -1,4 +1,13 @@
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import os
+import re
+import math
+import hashlib
+from collections import OrderedDict
+from contextvars import ContextVar
+from threading import Lock
+from sqlalchemy import event
 
 from .search_enum import (
     SearchOrderBy,
@@ -8,34 +17,158 @@ from .search_enum import (
     SearchQueryTemplate,
     SearchTargetTables,
 )
-from submodules.model.enums import LabelSource
-from submodules.model.business_objects import attribute
+from submodules.model.business_objects import attribute, general
 from submodules.model.enums import DataTypes
 
+# prepared search statements kept per database connection
+SEARCH_PREPARED_STATEMENT_LIMIT = int(
+    os.getenv("SEARCH_PREPARED_STATEMENT_LIMIT", "100")
+)
+
+# (name, sql) of the statement execute_prepared is about to run
+__pending_statement = ContextVar("search_pending_statement", default=None)
+# string literals and quoted identifiers are skipped, only $n outside is replaced
+__PLACEHOLDER_PATTERN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\$(\d+)")
+# LIMIT / OFFSET values outside of literals & quoted identifiers
+__PAGING_PATTERN = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\b(LIMIT|OFFSET)\s+(\d+)\b"
+)
+__THREAD_LOCK = Lock()
+
+
+def add_parameter(params: List[Any], value: Any) -> str:
+    # filter values never end up in the statement text, the same filter structure
+    # always results in the same statement (see execute_prepared)
+    params.append(value)
+    return f"${len(params)}"
+
+
+def render_sql(sql: str, params: List[Any]) -> str:
+    # inlines the parameters, for statements that are stored and run later on
+    # (user sessions, data slices, exports)
+    if not params:
+        return sql
+    return __PLACEHOLDER_PATTERN.sub(
+        lambda match: (
+            __to_sql_literal(params[int(match.group(1)) - 1])
+            if match.group(1)
+            else match.group(0)
+        ),
+        sql,
+    )
+
+
+def execute_prepared(
+    sql: str, params: List[Any], project_id: Optional[str] = None
+) -> List[Any]:
+    """Runs the statement as prepared statement of the current connection.
+
+    The name is derived from the statement text, so searches of the same structure
+    with other values reuse the parsed statement and (after a few runs) its plan.
+    The project id and LIMIT / OFFSET values are bound as parameters before that,
+    otherwise every project & page would prepare a statement of its own.
+    Statements are prepared once per connection, see __prepare_search_statement.
+    """
+    __register_prepare_listener()
+    sql, params = __bind_statement_values(sql, params, project_id)
+    name = "search_" + hashlib.sha256(sql.encode("utf-8")).hexdigest()[:24]
+    token = __pending_statement.set((name, sql))
+    try:
+        if not params:
+            return general.execute_all(f"EXECUTE {name}")
+        arguments = ", ".join(f":p_{idx}" for idx in range(len(params)))
+        return general.execute_all(
+            f"EXECUTE {name}({arguments})",
+            {f"p_{idx}": value for idx, value in enumerate(params)},
+        )
+    finally:
+        __pending_statement.reset(token)
+
+
+def __bind_statement_values(
+    sql: str, params: List[Any], project_id: Optional[str] = None
+) -> Tuple[str, List[Any]]:
+    # the project id literal (only compared to project_id columns, the parameter
+    # type is inferred from them) and the paging values become $n parameters
+    params = list(params)
+    project_literal = f"'{project_id}'" if project_id else None
+
+    def replace(match: re.Match) -> str:
+        if match.group(1):
+            return f"{match.group(1)} {add_parameter(params, int(match.group(2)))}"
+        if match.group(0) == project_literal:
+            return add_parameter(params, str(project_id))
+        return match.group(0)
+
+    return __PAGING_PATTERN.sub(replace, sql), params
+
+
+def __register_prepare_listener() -> None:
+    # only the engine of the app, other engines (e.g. of libraries) aren't touched
+    engine = general.get_bind()
+    if event.contains(engine, "before_cursor_execute", __prepare_search_statement):
+        return
+    with __THREAD_LOCK:
+        if not event.contains(
+            engine, "before_cursor_execute", __prepare_search_statement
+        ):
+            event.listen(
+                engine,
+                "before_cursor_execute",
+                __prepare_search_statement,
+                retval=True,
+            )
+
 
-def build_search_condition_value(target: SearchOperators, value) -> str:
+def __prepare_search_statement(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> Tuple[str, Any]:
+    # runs right before the EXECUTE of execute_prepared is sent. The names known to
+    # the connection are kept in its info dict (lives as long as the database
+    # connection), so only the first run per connection prepares the statement
+    pending = __pending_statement.get()
+    if not pending or not statement.startswith(f"EXECUTE {pending[0]}"):
+        return statement, parameters
+    name, sql = pending
+    prepared = conn.info.setdefault("search_statements", OrderedDict())
+    if name in prepared:
+        prepared.move_to_end(name)
+        return statement, parameters
+    if len(prepared) >= SEARCH_PREPARED_STATEMENT_LIMIT:
+        cursor.execute(f"DEALLOCATE {prepared.popitem(last=False)[0]}")
+    cursor.execute(f"PREPARE {name} AS {sql}")
+    prepared[name] = True
+    return statement, parameters
+
+
+def build_search_condition_value(
+    target: SearchOperators, value: Any, params: List[Any]
+) -> str:
     if target in __lookup_operator:
         operator = __lookup_operator[target]
         if target == SearchOperators.IN:
             all_in_values = ""
             if value:
-                all_in_values = ", ".join(
-                    [f"'{v}'" if isinstance(v, str) else str(v) for v in value]
-                )
+                all_in_values = ", ".join([add_parameter(params, v) for v in value])
             return operator.replace("@@VALUES@@", all_in_values)
         elif target == SearchOperators.BETWEEN:
-            value1 = f"'{value[0]}'" if isinstance(value[0], str) else str(value[0])
-            value2 = f"'{value[1]}'" if isinstance(value[1], str) else str(value[1])
+            value1 = add_parameter(params, value[0])
+            value2 = add_parameter(params, value[1])
             return operator.replace("@@VALUE1@@", value1).replace("@@VALUE2@@", value2)
         else:
-            if target not in __lookup_operator_has_quotes and isinstance(value, str):
-                value = "'" + value + "'"
-            return operator.replace("@@VALUE@@", str(value))
+            return operator.replace("@@VALUE@@", add_parameter(params, value))
     else:
         raise ValueError(target.value + " no operator info")
 
 
-def build_search_condition(project_id: str, filter_element: Dict[str, str]) -> str:
+def build_search_condition(
+    project_id: str, filter_element: Dict[str, str], params: List[Any]
+) -> str:
     table = SearchTargetTables[filter_element[FilterDataDictKeys.TARGET_TABLE.value]]
     column = SearchColumn[filter_element[FilterDataDictKeys.TARGET_COLUMN.value]]
     operator = SearchOperators[filter_element[FilterDataDictKeys.OPERATOR.value]]
@@ -52,7 +185,8 @@ def build_search_condition(project_id: str, filter_element: Dict[str, str]) -> s
         for value in filter_values[1:]:
             used_value = value.replace("*", "%").replace("?", "_")
             conditions.append(
-                search_column + build_search_condition_value(used_operator, used_value)
+                search_column
+                + build_search_condition_value(used_operator, used_value, params)
             )
         return " OR ".join(conditions)
     elif operator == SearchOperators.IN:
@@ -60,7 +194,9 @@ def build_search_condition(project_id: str, filter_element: Dict[str, str]) -> s
             filter_values = filter_values[1:]
             if not filter_values:
                 return ""
-        return search_column + build_search_condition_value(operator, filter_values)
+        return search_column + build_search_condition_value(
+            operator, filter_values, params
+        )
     elif operator == SearchOperators.BETWEEN:
         if table == SearchTargetTables.RECORD and column == SearchColumn.DATA:
             filter_values = filter_values[1:]
@@ -68,13 +204,15 @@ def build_search_condition(project_id: str, filter_element: Dict[str, str]) -> s
                 return ""
             elif not filter_values[0]:
                 return search_column + build_search_condition_value(
-                    SearchOperators.LESS_EQUAL, filter_values[1]
+                    SearchOperators.LESS_EQUAL, filter_values[1], params
                 )
             elif not filter_values[1]:
                 return search_column + build_search_condition_value(
-                    SearchOperators.GREATER_EQUAL, filter_values[0]
+                    SearchOperators.GREATER_EQUAL, filter_values[0], params
                 )
-        return search_column + build_search_condition_value(operator, filter_values)
+        return search_column + build_search_condition_value(
+            operator, filter_values, params
+        )
     else:
         if table == SearchTargetTables.RECORD and column == SearchColumn.DATA:
             filter_value = filter_values[1]
@@ -97,7 +235,9 @@ def build_search_condition(project_id: str, filter_element: Dict[str, str]) -> s
         else:
             filter_value = filter_values[0]
 
-        return search_column + build_search_condition_value(operator, filter_value)
+        return search_column + build_search_condition_value(
+            operator, filter_value, params
+        )
 
 
 def build_search_column(
@@ -109,7 +249,8 @@ def build_search_column(
         if operator not in __lookup_operator_has_quotes:
             attr_data_type = attribute.get_data_type(project_id, attr_name)
         sql_cast = __lookup_sql_cast_data_type[attr_data_type]
-        col_str = f"({table_alias}.\"data\" ->> '{attr_name}')::{sql_cast}"
+        json_field = __to_sql_literal(attr_name)
+        col_str = f"({table_alias}.\"data\" ->> {json_field})::{sql_cast}"
     else:
         col_str = f"{table_alias}.{column.value}"
     return col_str
@@ -118,17 +259,22 @@ def build_search_column(
 def build_order_column_record_data(order_by_col_text: str, data_type: str) -> str:
     json_field = order_by_col_text.split("@")[1]
 
-    text = f"r.\"data\" ->> '{json_field}'"
+    text = build_order_expression_record_data(json_field, data_type)
+    text += " " + __to_sql_identifier(f"order_{json_field}")
+    return text
+
+
+def build_order_expression_record_data(json_field: str, data_type: str) -> str:
+    text = f"r.\"data\" ->> {__to_sql_literal(json_field)}"
     if data_type == "INTEGER" or data_type == "FLOAT":
         text = f"CAST({text} AS {data_type})"
-
-    text += f' "order_{json_field}"'
     return text
 
 
 def build_order_by_record_data(order_by_col_text: str, direction: str) -> str:
+    __check_direction(direction)
     json_field = order_by_col_text.split("@")[1]
-    text = f'"order_{json_field}"'
+    text = __to_sql_identifier(f"order_{json_field}")
     if direction == "ASC":
         text = f"{text} {direction} NULLS FIRST"
     else:
@@ -137,7 +283,7 @@ def build_order_by_record_data(order_by_col_text: str, direction: str) -> str:
 
 
 def build_order_by_column(order_by_col_text: str, direction: str) -> str:
-
+    __check_direction(direction)
     order_by_col = SearchOrderBy[order_by_col_text]
     column = __lookup_order_by_column[order_by_col].value
 
@@ -154,8 +300,104 @@ def build_order_by_column(order_by_col_text: str, direction: str) -> str:
     return text
 
 
+def build_keyset_column(
+    project_id: str, order_by_col_text: str, direction: str
+) -> Dict[str, str]:
+    # EXPRESSION is usable in the where clause of the base query, RESULT_COLUMN is
+    # the name of the value in the final query result
+    if "@" in order_by_col_text:
+        json_field = order_by_col_text.split("@")[1]
+        data_type = attribute.get_data_type(project_id, json_field)
+        return {
+            "EXPRESSION": build_order_expression_record_data(json_field, data_type),
+            "RESULT_COLUMN": f"order_{json_field}",
+            "DIRECTION": direction,
+        }
+    order_by = SearchOrderBy[order_by_col_text]
+    column = __lookup_order_by_column[order_by].value
+    if __lookup_order_by_table[order_by] == SearchTargetTables.RECORD:
+        return {
+            "EXPRESSION": f"r.{column}",
+            "RESULT_COLUMN": column,
+            "DIRECTION": direction,
+        }
+    alias = f"min_{column}" if direction == "ASC" else f"max_{column}"
+    return {
+        "EXPRESSION": f"order_rla.{alias}",
+        "RESULT_COLUMN": alias,
+        "DIRECTION": direction,
+    }
+
+
+def build_keyset_condition(
+    keyset_columns: List[Dict[str, str]], values: List[Any], params: List[Any]
+) -> str:
+    # rows after the given values in ORDER BY order, ASC sorts NULLS FIRST and
+    # DESC NULLS LAST (see build_order_by_column)
+    conditions = []
+    for idx, keyset_column in enumerate(keyset_columns):
+        after = __build_keyset_after(keyset_column, values[idx], params)
+        if not after:
+            continue
+        parts = [
+            __build_keyset_equal(c["EXPRESSION"], v, params)
+            for c, v in zip(keyset_columns[:idx], values[:idx])
+        ]
+        conditions.append("(" + " AND ".join(parts + [after]) + ")")
+    if not conditions:
+        return "\n    AND FALSE"
+    return "\n    AND (" + " OR ".join(conditions) + ")"
+
+
+def __build_keyset_after(
+    keyset_column: Dict[str, str], value: Any, params: List[Any]
+) -> str:
+    expression = keyset_column["EXPRESSION"]
+    if keyset_column["DIRECTION"] == "ASC":
+        if value is None:
+            return f"{expression} IS NOT NULL"
+        return f"{expression} > {add_parameter(params, value)}"
+    if value is None:
+        # nulls are last, nothing comes after them
+        return ""
+    return f"({expression} < {add_parameter(params, value)} OR {expression} IS NULL)"
+
+
+def __build_keyset_equal(expression: str, value: Any, params: List[Any]) -> str:
+    if value is None:
+        return f"{expression} IS NULL"
+    return f"{expression} = {add_parameter(params, value)}"
+
+
+def __to_sql_literal(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and not math.isfinite(value):
+        # repr gives inf / nan, which aren't valid sql
+        if math.isnan(value):
+            return "'NaN'::FLOAT"
+        return "'Infinity'::FLOAT" if value > 0 else "'-Infinity'::FLOAT"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def __to_sql_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def __check_direction(direction: str) -> None:
+    if direction not in ["ASC", "DESC"]:
+        raise ValueError(f"Invalid order direction: {direction}")
+
+
 def build_query_template(
-    target: SearchQueryTemplate, filter_values: List[Any], project_id: str
+    target: SearchQueryTemplate,
+    filter_values: List[Any],
+    project_id: str,
+    params: List[Any],
 ) -> str:
     template = get_query_template(target)
     if target in [
@@ -163,35 +405,31 @@ def build_query_template(
         SearchQueryTemplate.SUBQUERY_RLA_LABEL,
         SearchQueryTemplate.SUBQUERY_RLA_NO_LABEL,
     ]:
-        template = template.replace("@@SOURCE_TYPE@@", filter_values[0])
-        in_values = ""
-        for v in filter_values[1:]:
-            part = v
-            if isinstance(v, str):
-                part = "'" + part + "'"
-            if in_values != "":
-                in_values += ", "
-            in_values += part
+        # keys of record_label_summary, "<source_type>:<label or source id>"
+        # manual labels are current, labels of imports, weak supervision & label
+        # functions can be up to LABEL_SUMMARY_REFRESH_INTERVAL old (label_summary.py)
+        source_type = filter_values[0]
+        in_values = ", ".join(
+            add_parameter(params, f"{source_type}:{v}") for v in filter_values[1:]
+        )
         template = template.replace("@@IN_VALUES@@", in_values)
     elif target in [
         SearchQueryTemplate.SUBQUERY_RLA_DIFFERENT_IS_CLASSIFICATION,
         SearchQueryTemplate.SUBQUERY_RLA_DIFFERENT_IS_EXTRACTION,
     ]:
-        template = template.replace("@@LABELING_TASK_ID@@", filter_values[0])
+        template = template.replace(
+            "@@LABELING_TASK_ID@@", add_parameter(params, filter_values[0])
+        )
     elif target in [
         SearchQueryTemplate.SUBQUERY_RLA_CONFIDENCE,
     ]:
         lower, upper = filter_values
-        if isinstance(lower, str):
-            lower = "'" + lower + "'"
-            upper = "'" + upper + "'"
-        else:
-            lower = str(lower)
-            upper = str(upper)
-        template = template.replace("@@VALUE1@@", lower)
-        template = template.replace("@@VALUE2@@", upper)
+        template = template.replace("@@VALUE1@@", add_parameter(params, lower))
+        template = template.replace("@@VALUE2@@", add_parameter(params, upper))
     elif target == SearchQueryTemplate.SUBQUERY_HAS_COMMENTS:
-        template = template.replace("@@USER_ID@@", filter_values[0])
+        template = template.replace(
+            "@@USER_ID@@", add_parameter(params, filter_values[0])
+        )
 
     template = template.replace("@@PROJECT_ID@@", project_id)
     return template
@@ -218,24 +456,14 @@ def build_order_by_table_select(
     if table == SearchTargetTables.RECORD:
         return "RECORD"  # already in base record no need to join
     if table == SearchTargetTables.RECORD_LABEL_ASSOCIATION:
+        # the aggregates are kept per record in record_label_summary (confidence
+        # only of weak supervision, up to LABEL_SUMMARY_REFRESH_INTERVAL old)
         column = __lookup_order_by_column[order_by].value
-        col_text = ""
-        alias = ""
-        if order_by == SearchOrderBy.WEAK_SUPERVISION_CONFIDENCE:
-            column = f"CASE WHEN source_type = '{LabelSource.WEAK_SUPERVISION.value}' THEN confidence ELSE null END"
-            alias = "min_confidence" if direction == "ASC" else "max_confidence"
-        if direction == "ASC":
-            if alias == "":
-                alias = f"min_{column}"
-            col_text = f"min({column}) {alias}"
-        else:
-            if alias == "":
-                alias = f"max_{column}"
-            col_text = f"max({column}) {alias}"
+        alias = f"min_{column}" if direction == "ASC" else f"max_{column}"
         return {
             "TABLE": table,
             "TEMPLATE_KEY": SearchQueryTemplate.ORDER_RLA,
-            "COL_TEXT": col_text,
+            "COL_TEXT": f"rls.{alias}",
             "SELECT_APPEND": alias,
         }
     else:
@@ -244,20 +472,20 @@ def build_order_by_table_select(
 
 __lookup_operator = {
     SearchOperators.EQUAL: " = @@VALUE@@",
-    SearchOperators.CONTAINS: " ILIKE '%@@VALUE@@%'",
-    SearchOperators.CONTAINS_CS: " LIKE '%@@VALUE@@%'",
-    SearchOperators.BEGINS_WITH: " ILIKE '@@VALUE@@%'",
-    SearchOperators.BEGINS_WITH_CS: " LIKE '@@VALUE@@%'",
-    SearchOperators.ENDS_WITH: " ILIKE '%@@VALUE@@'",
-    SearchOperators.ENDS_WITH_CS: " LIKE '%@@VALUE@@'",
+    SearchOperators.CONTAINS: " ILIKE ('%' || @@VALUE@@::TEXT || '%')",
+    SearchOperators.CONTAINS_CS: " LIKE ('%' || @@VALUE@@::TEXT || '%')",
+    SearchOperators.BEGINS_WITH: " ILIKE (@@VALUE@@::TEXT || '%')",
+    SearchOperators.BEGINS_WITH_CS: " LIKE (@@VALUE@@::TEXT || '%')",
+    SearchOperators.ENDS_WITH: " ILIKE ('%' || @@VALUE@@::TEXT)",
+    SearchOperators.ENDS_WITH_CS: " LIKE ('%' || @@VALUE@@::TEXT)",
     SearchOperators.IN: " IN (@@VALUES@@)",
     SearchOperators.BETWEEN: " BETWEEN @@VALUE1@@ AND @@VALUE2@@",
     SearchOperators.GREATER: " > @@VALUE@@",
     SearchOperators.GREATER_EQUAL: " >= @@VALUE@@",
     SearchOperators.LESS: " < @@VALUE@@",
     SearchOperators.LESS_EQUAL: " <= @@VALUE@@",
-    SearchOperators.LIKE: " LIKE '@@VALUE@@'",
-    SearchOperators.ILIKE: " ILIKE '@@VALUE@@'",
+    SearchOperators.LIKE: " LIKE @@VALUE@@",
+    SearchOperators.ILIKE: " ILIKE @@VALUE@@",
 }
 
 __lookup_operator_has_quotes = {
@@ -310,28 +538,22 @@ WHERE r.project_id = '@@PROJECT_ID@@'
 @@ORDER_BY_ADD@@ 
 """,
     SearchQueryTemplate.SUBQUERY_RLA_LABEL: """
-SELECT rla.project_id pID, rla.record_id rID
-FROM record_label_association rla
-WHERE rla.project_id = '@@PROJECT_ID@@'
-    AND rla.source_type = '@@SOURCE_TYPE@@'
-    AND rla.labeling_task_label_id IN (@@IN_VALUES@@)
-GROUP BY rla.project_id, rla.record_id """,
+SELECT rls.project_id pID, rls.record_id rID
+FROM record_label_summary rls
+WHERE rls.project_id = '@@PROJECT_ID@@'
+    AND rls.label_keys && ARRAY[@@IN_VALUES@@]::VARCHAR[] """,
     SearchQueryTemplate.SUBQUERY_RLA_NO_LABEL: """
 SELECT r.project_id pID, r.id rID
 FROM record r
-LEFT JOIN record_label_association rla
-    ON r.project_id = rla.project_id 
-    AND r.id = rla.record_id 
-    AND rla.source_type = '@@SOURCE_TYPE@@'
-    AND rla.labeling_task_label_id IN (@@IN_VALUES@@)
-WHERE r.project_id = '@@PROJECT_ID@@' AND rla.id IS NULL """,
+LEFT JOIN record_label_summary rls
+    ON r.id = rls.record_id
+    AND rls.label_keys && ARRAY[@@IN_VALUES@@]::VARCHAR[]
+WHERE r.project_id = '@@PROJECT_ID@@' AND rls.record_id IS NULL """,
     SearchQueryTemplate.SUBQUERY_RLA_INFORMATION_SOURCE: """
-SELECT rla.project_id pID, rla.record_id rID
-FROM record_label_association rla
-WHERE rla.project_id = '@@PROJECT_ID@@'
-    AND rla.source_type = '@@SOURCE_TYPE@@'
-    AND rla.source_id IN (@@IN_VALUES@@)
-GROUP BY rla.project_id, rla.record_id """,
+SELECT rls.project_id pID, rls.record_id rID
+FROM record_label_summary rls
+WHERE rls.project_id = '@@PROJECT_ID@@'
+    AND rls.source_keys && ARRAY[@@IN_VALUES@@]::VARCHAR[] """,
     SearchQueryTemplate.SUBQUERY_RLA_CONFIDENCE: """
 SELECT rla.project_id pID, rla.record_id rID
 FROM record_label_association rla
@@ -341,9 +563,8 @@ WHERE rla.project_id = '@@PROJECT_ID@@'
 GROUP BY rla.project_id, rla.record_id """,
     SearchQueryTemplate.ORDER_RLA: """
 LEFT JOIN (
-    SELECT rla.project_id pID, rla.record_id rID, @@ORDER_COLUMNS@@
-    FROM record_label_association rla
-    GROUP BY rla.project_id, rla.record_id ) order_rla
+    SELECT rls.project_id pID, rls.record_id rID, @@ORDER_COLUMNS@@
+    FROM record_label_summary rls ) order_rla
     ON r.project_id = order_rla.pID AND r.id = order_rla.rID """,
     SearchQueryTemplate.SUBQUERY_RLA_DIFFERENT_IS_CLASSIFICATION: """
 SELECT project_id pID, record_id rID, COUNT(*) different_versions,  SUM(CAST(full_count AS INT)) AS full_count 
@@ -353,7 +574,7 @@ FROM (
 	INNER JOIN labeling_task_label ltl
 		ON rla.labeling_task_label_id = ltl.id AND rla.project_id = ltl.project_id
 	WHERE rla.project_id = '@@PROJECT_ID@@' 
-	AND ltl.labeling_task_id = '@@LABELING_TASK_ID@@' 
+	AND ltl.labeling_task_id = @@LABELING_TASK_ID@@ 
 	AND rla.source_type = 'INFORMATION_SOURCE'
 	AND rla.return_type = 'RETURN'
 	GROUP BY rla.record_id,rla.project_id, rla.labeling_task_label_id ) base_select
@@ -378,7 +599,7 @@ FROM (
 	INNER JOIN labeling_task_label ltl
 		ON rla.labeling_task_label_id = ltl.id AND rla.project_id = ltl.project_id
 	WHERE rla.project_id = '@@PROJECT_ID@@' 
-	AND ltl.labeling_task_id = '@@LABELING_TASK_ID@@' 
+	AND ltl.labeling_task_id = @@LABELING_TASK_ID@@ 
 	AND rla.source_type = 'INFORMATION_SOURCE'
 	AND rla.return_type = 'YIELD'
 	GROUP BY rla.record_id,rla.project_id, rlat.label ) base_select
@@ -391,7 +612,7 @@ HAVING COUNT(*) >1
     FROM comment_data cd
     WHERE cd.project_id = '@@PROJECT_ID@@'
         AND cd.xftype = 'RECORD' 
-        AND (cd.is_private = false OR cd.created_by = '@@USER_ID@@')
+        AND (cd.is_private = false OR cd.created_by = @@USER_ID@@)
     GROUP BY cd.project_id, cd.xfkey
     """,
 }
@@ -0,0 +1,125 @@
+from typing import Any, Dict, Iterator, List
+
+import os
+import hashlib
+import traceback
+from contextlib import contextmanager
+from threading import Lock
+
+from submodules.model import daemon
+from submodules.model.enums import AttributeState, DataTypes
+from util import sql_helper
+
+# trigram indexes on the text attributes, they back the LIKE / ILIKE based operators
+# of the search (contains, begins & ends with, wildcards)
+SEARCH_TEXT_INDEX = os.getenv("SEARCH_TEXT_INDEX", "true").lower() == "true"
+# every index adds write cost to each record insert / update that has the field,
+# only the attribute names shared by the most projects are indexed
+SEARCH_TEXT_INDEX_LIMIT = int(os.getenv("SEARCH_TEXT_INDEX_LIMIT", "20"))
+
+__INDEX_PREFIX = "ix_record_trgm_"
+__INDEXED_STATES = [
+    AttributeState.UPLOADED.value,
+    AttributeState.USABLE.value,
+    AttributeState.AUTOMATICALLY_CREATED.value,
+]
+__THREAD_LOCK = Lock()
+
+
+def start_index_thread() -> None:
+    # creates the indexes of attributes that existed before the search mode
+    if not SEARCH_TEXT_INDEX:
+        return
+    daemon.run_without_db_token(sync_text_indexes)
+
+
+def sync_text_indexes() -> None:
+    """Creates one index per indexed text attribute name, shared by all projects
+    (project_id is the leading column), and drops the ones no project needs anymore.
+
+    Indexes are built concurrently (no write lock on record), so this is meant to run
+    in a background thread, e.g. after an attribute became usable.
+    """
+    if not SEARCH_TEXT_INDEX:
+        return
+    with __THREAD_LOCK, __connection() as connection:
+        wanted = {
+            __index_name(name): name for name in __get_text_attribute_names(connection)
+        }
+        existing = __get_indexes(connection, __INDEX_PREFIX)
+        for index_name, is_valid in existing.items():
+            # failed concurrent builds leave invalid indexes behind
+            if index_name not in wanted or not is_valid:
+                __drop_index(connection, index_name)
+        for index_name, attribute_name in wanted.items():
+            if existing.get(index_name):
+                continue
+            try:
+                __create_index(connection, index_name, attribute_name)
+            except Exception:
+                print(traceback.format_exc(), flush=True)
+
+
+def __get_text_attribute_names(connection: Any) -> List[str]:
+    state_list = ", ".join(f"'{state}'" for state in __INDEXED_STATES)
+    return [
+        row[0]
+        for row in connection.exec_driver_sql(
+            f"""
+            SELECT name
+            FROM attribute
+            WHERE data_type = '{DataTypes.TEXT.value}'
+                AND state IN ({state_list})
+            GROUP BY name
+            ORDER BY COUNT(DISTINCT project_id) DESC, name
+            LIMIT {SEARCH_TEXT_INDEX_LIMIT}
+            """
+        )
+    ]
+
+
+def __get_indexes(connection: Any, prefix: str) -> Dict[str, bool]:
+    # {index_name: is_valid}
+    return {
+        row[0]: row[1]
+        for row in connection.exec_driver_sql(
+            f"""
+            SELECT c.relname, i.indisvalid
+            FROM pg_index i
+            INNER JOIN pg_class c
+                ON c.oid = i.indexrelid
+            WHERE LEFT(c.relname, {len(prefix)}) = '{prefix}'
+            """
+        )
+    }
+
+
+def __create_index(connection: Any, index_name: str, attribute_name: str) -> None:
+    # the expression needs to match the search column (search_helper) exactly,
+    # project_id is indexed through btree_gin so one index serves every project
+    # records without the field aren't indexed (the LIKE operators imply NOT NULL)
+    json_field = attribute_name.replace("'", "''")
+    expression = f"((data ->> '{json_field}')::TEXT)"
+    connection.exec_driver_sql(
+        f"""
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name}
+        ON record USING gin (project_id, {expression} gin_trgm_ops)
+        WHERE {expression} IS NOT NULL
+        """
+    )
+
+
+def __drop_index(connection: Any, index_name: str) -> None:
+    connection.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+
+@contextmanager
+def __connection() -> Iterator[Any]:
+    with sql_helper.autocommit_connection() as connection:
+        # statements are sent as they are, without parameter interpolation
+        yield connection.execution_options(no_parameters=True)
+
+
+def __index_name(attribute_name: str) -> str:
+    attribute_hash = hashlib.md5(attribute_name.encode("utf-8")).hexdigest()[:16]
+    return __INDEX_PREFIX + attribute_hash
@@ -0,0 +1,124 @@
+from typing import Any, Dict, List, Optional
+
+import sys
+import random
+
+import numpy as np
+import pandas as pd
+
+from controller.transfer import export_parser
+from submodules.model.business_objects.export import OUTSIDE_CONSTANT
+from tests.benchmarks.util import measure
+
+LABELS = ["person", "organization", "location", "date"]
+MAX_LEN = str(max(len(label) for label in LABELS) + 2)
+BASE_NAME = "text__entities__WEAK_SUPERVISION"
+
+
+def run(record_count: int) -> None:
+    # data frame as returned by the export query of an extraction project, no
+    # database needed since only the parsing is measured
+    task_data, token_info = __synthetic_extraction_column(record_count)
+
+    legacy = {}
+    measure(
+        "row wise apply (tags + confidence)",
+        record_count,
+        lambda: legacy.update(__legacy_parse(task_data, token_info)),
+    )
+    current = {}
+    measure(
+        "flattened single pass (tags + confidence)",
+        record_count,
+        lambda: current.update(
+            zip(
+                ["tags", "confidences"],
+                export_parser.build_token_tag_arrays(
+                    task_data, token_info, MAX_LEN, True
+                ),
+            )
+        ),
+    )
+    __assert_equal(legacy["tags"], current["tags"])
+    __assert_equal(legacy["confidences"], current["confidences"])
+    print("results are identical", flush=True)
+
+
+def __synthetic_extraction_column(record_count: int) -> List[pd.Series]:
+    random.seed(42)
+    task_data, token_info = [], []
+    for _ in range(record_count):
+        token_count = random.randint(10, 120)
+        token_info.append({"token_count": token_count})
+        if random.random() < 0.2:
+            task_data.append(None)
+            continue
+        spans = []
+        for _ in range(random.randint(1, 5)):
+            start = random.randint(0, token_count - 1)
+            end = min(token_count, start + random.randint(1, 4))
+            spans.append(
+                {
+                    "rla_data": {
+                        "token": list(range(start, end)),
+                        "label_name": random.choice(LABELS),
+                        "confidence": random.random(),
+                    }
+                }
+            )
+        task_data.append(spans)
+    return [pd.Series(task_data), pd.Series(token_info)]
+
+
+def __legacy_parse(task_data: pd.Series, token_info: pd.Series) -> Dict[str, Any]:
+    # previous df.apply based implementation of parse_dataframe_data for comparison
+    df = pd.DataFrame(
+        {BASE_NAME + "__task_data": task_data, BASE_NAME + "__token_info": token_info}
+    )
+    return {
+        "tags": df.apply(__legacy_row_tags, axis=1).tolist(),
+        "confidences": df.apply(__legacy_row_confidence, axis=1).tolist(),
+    }
+
+
+def __legacy_row_tags(row: pd.Series) -> Optional[np.ndarray]:
+    record_data = row[BASE_NAME + "__task_data"]
+    if not record_data:
+        return None
+    token_count = row[BASE_NAME + "__token_info"]["token_count"]
+    arr = np.full(token_count, OUTSIDE_CONSTANT, dtype="<U" + MAX_LEN)
+    for rla in record_data:
+        for idx, token in enumerate(rla["rla_data"]["token"]):
+            if idx == 0:
+                arr[token] = "B-" + rla["rla_data"]["label_name"]
+            else:
+                arr[token] = "I-" + rla["rla_data"]["label_name"]
+    return arr
+
+
+def __legacy_row_confidence(row: pd.Series) -> Optional[np.ndarray]:
+    record_data = row[BASE_NAME + "__task_data"]
+    if not record_data:
+        return None
+    token_count = row[BASE_NAME + "__token_info"]["token_count"]
+    arr_confidence = np.full(token_count, 0, dtype=np.float16)
+    for rla in record_data:
+        for token in rla["rla_data"]["token"]:
+            arr_confidence[token] = rla["rla_data"]["confidence"]
+    return arr_confidence
+
+
+def __assert_equal(
+    expected: List[Optional[np.ndarray]], actual: List[Optional[np.ndarray]]
+) -> None:
+    assert len(expected) == len(actual)
+    for expected_row, actual_row in zip(expected, actual):
+        if expected_row is None:
+            assert actual_row is None
+        else:
+            assert expected_row.dtype == actual_row.dtype
+            assert np.array_equal(expected_row, actual_row)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,143 @@
+from typing import Any, Dict, List
+
+import sys
+
+from service.search import search, search_helper
+from submodules.model.business_objects import general
+from tests.benchmarks.util import (
+    benchmark_session,
+    create_manual_labels,
+    get_record_ids,
+    measure,
+    synthetic_project,
+)
+
+LABELS = ["positive", "negative", "neutral"]
+PAGE_SIZE = 20
+REPEATED_SEARCHES = 50
+
+# previous label data join, aggregates the associations of the whole project
+__LEGACY_LABEL_JOIN = """LEFT JOIN (
+            SELECT project_id data_pID, record_id data_rID, json_agg(row_to_json(record_label_association)) rla_data
+            FROM record_label_association
+            WHERE project_id = '{project_id}'
+            GROUP BY project_id, record_id
+        ) data_grabber
+            ON {record_id_column} = data_grabber.data_rID"""
+
+
+def run(record_count: int, labels_per_record: int) -> None:
+    with benchmark_session(), synthetic_project(record_count) as (
+        project_item,
+        user_id,
+    ):
+        project_id = str(project_item.id)
+        task_id = create_manual_labels(
+            project_id,
+            user_id,
+            get_record_ids(project_id),
+            LABELS,
+            labels_per_record,
+        )
+        general.execute("ANALYZE record_label_association")
+        general.commit()
+        association_count = record_count * labels_per_record
+        print(f"{association_count} record label associations", flush=True)
+
+        filter_data = [
+            {
+                "ORDER_BY": ["RECORD_CREATED_AT"],
+                "ORDER_DIRECTION": ["ASC"],
+            }
+        ]
+        page_sql = search.generate_select_sql(project_id, filter_data, PAGE_SIZE, 0)
+        measure(
+            "ordered page, project wide json_agg",
+            PAGE_SIZE,
+            lambda: general.execute_all(__to_legacy(page_sql, project_id)),
+        )
+        measure(
+            "ordered page, page restricted json_agg",
+            PAGE_SIZE,
+            lambda: general.execute_all(page_sql),
+        )
+
+        basic_sql = search.generate_select_sql(project_id, [], PAGE_SIZE, 0)
+        measure(
+            "unfiltered page, project wide json_agg",
+            PAGE_SIZE,
+            lambda: general.execute_all(__to_legacy(basic_sql, project_id)),
+        )
+        measure(
+            "unfiltered page, page restricted json_agg",
+            PAGE_SIZE,
+            lambda: general.execute_all(basic_sql),
+        )
+
+        # same filter structure with changing values, e.g. clicking through labels
+        label_ids = [
+            str(row[0])
+            for row in general.execute_all(
+                "SELECT id FROM labeling_task_label "
+                f"WHERE labeling_task_id = '{task_id}'"
+            )
+        ]
+        compiled = [
+            search.__compile_select_sql(
+                project_id,
+                __label_filter(label_ids[idx % len(label_ids)]),
+                PAGE_SIZE,
+                0,
+            )
+            for idx in range(REPEATED_SEARCHES)
+        ]
+        rendered = [search_helper.render_sql(sql, params) for sql, params in compiled]
+        measure(
+            "repeated label filter, inlined values",
+            PAGE_SIZE * REPEATED_SEARCHES,
+            lambda: [general.execute_all(sql) for sql in rendered],
+        )
+        measure(
+            "repeated label filter, prepared",
+            PAGE_SIZE * REPEATED_SEARCHES,
+            lambda: [
+                search_helper.execute_prepared(sql, params, project_id)
+                for sql, params in compiled
+            ],
+        )
+
+
+def __label_filter(label_id: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            "SUBQUERY_TYPE": "WHITELIST",
+            "SUBQUERIES": [
+                {
+                    "QUERY_TEMPLATE": "SUBQUERY_RLA_LABEL",
+                    "VALUES": ["MANUAL", label_id],
+                }
+            ],
+        },
+        {"ORDER_BY": ["RECORD_CREATED_AT"], "ORDER_DIRECTION": ["ASC"]},
+    ]
+
+
+def __to_legacy(sql: str, project_id: str) -> str:
+    # swaps the lateral join of the current query builder for the previous join
+    start = sql.index("LEFT JOIN LATERAL")
+    end = sql.index("ON TRUE", start) + len("ON TRUE")
+    record_id_column = sql[start:end].split("AND rla.record_id = ")[1].split()[0]
+    return (
+        sql[:start]
+        + __LEGACY_LABEL_JOIN.format(
+            project_id=project_id, record_id_column=record_id_column
+        )
+        + sql[end:]
+    )
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    )
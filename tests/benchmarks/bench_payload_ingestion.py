@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import sys
+
+from controller.payload import payload_scheduler
+from submodules.model import enums
+from submodules.model.business_objects import (
+    general,
+    information_source,
+    labeling_task,
+    labeling_task_label,
+    record_label_association,
+)
+from submodules.model.models import RecordLabelAssociation
+from tests.benchmarks.util import (
+    benchmark_session,
+    get_record_ids,
+    measure,
+    synthetic_project,
+)
+
+LABELS = ["positive", "negative", "neutral"]
+
+
+def run(record_count: int) -> None:
+    with benchmark_session(), synthetic_project(record_count) as (
+        project_item,
+        user_id,
+    ):
+        project_id = str(project_item.id)
+        task_item = labeling_task.create(
+            project_id,
+            None,
+            "benchmark_task",
+            enums.LabelingTaskTarget.ON_WHOLE_RECORD.value,
+            enums.LabelingTaskType.CLASSIFICATION.value,
+            with_commit=True,
+        )
+        task_id = str(task_item.id)
+        for label_name in LABELS:
+            labeling_task_label.create(project_id, label_name, task_id, "red")
+        source_item = information_source.create(
+            project_id=project_id,
+            name="benchmark_source",
+            labeling_task_id=task_id,
+            source_code="",
+            description="",
+            type=enums.InformationSourceType.LABELING_FUNCTION.value,
+            return_type=enums.InformationSourceReturnType.RETURN.value,
+            created_by=user_id,
+            with_commit=True,
+        )
+        payload_item = SimpleNamespace(
+            source_id=str(source_item.id), created_by=user_id
+        )
+        output_data = {
+            record_id: [0.9, LABELS[idx % len(LABELS)]]
+            for idx, record_id in enumerate(get_record_ids(project_id))
+        }
+
+        measure(
+            "orm add_all (per record label lookup)",
+            record_count,
+            lambda: __legacy_add_data_classification(
+                payload_item, project_id, task_id, output_data
+            ),
+        )
+        measure(
+            "COPY (label name map)",
+            record_count,
+            lambda: payload_scheduler.add_data_classification(
+                payload_item, project_id, task_id, [], output_data.items()
+            ),
+        )
+
+
+def __legacy_add_data_classification(
+    payload_item: Any, project_id: str, task_id: str, output_data: Dict[str, List]
+) -> None:
+    # previous implementation of add_data_classification for comparison
+    record_label_associations = []
+    for record_id, (confidence, label_name) in output_data.items():
+        label = labeling_task_label.get_by_name(project_id, task_id, label_name)
+        record_label_associations.append(
+            RecordLabelAssociation(
+                project_id=project_id,
+                record_id=record_id,
+                labeling_task_label_id=label.id,
+                source_type=enums.LabelSource.INFORMATION_SOURCE.value,
+                source_id=payload_item.source_id,
+                return_type=enums.InformationSourceReturnType.RETURN.value,
+                confidence=confidence,
+                created_by=payload_item.created_by,
+            )
+        )
+    record_label_association.delete_by_source_id(project_id, payload_item.source_id)
+    general.add_all(record_label_associations, with_commit=True)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Tuple
+
+import sys
+
+from controller.tokenization import manager as token_manager
+from controller.transfer import record_transfer_manager
+from submodules.model import enums
+from submodules.model.business_objects import (
+    attribute,
+    general,
+    record,
+    record_label_association,
+)
+from submodules.model.models import Attribute
+from tests.benchmarks.util import benchmark_session, measure, synthetic_project
+
+LABELS = ["positive", "negative", "neutral"]
+LEGACY_CHUNK_SIZE = 500
+# share of records changed by the re-upload
+CHANGED_SHARE = 0.1
+
+
+def run(record_count: int) -> None:
+    category = enums.RecordCategory.SCALE.value
+    with benchmark_session(), synthetic_project(0) as (
+        legacy_project,
+        user_id,
+    ), synthetic_project(0) as (bulk_project, _):
+        legacy_project_id = str(legacy_project.id)
+        bulk_project_id = str(bulk_project.id)
+        for project_id in [legacy_project_id, bulk_project_id]:
+            __prepare_project(project_id)
+        records_data, labels_data = __import_data(record_count, 0)
+        changed_count = int(record_count * CHANGED_SHARE)
+        reupload_records_data, reupload_labels_data = __import_data(
+            record_count, changed_count
+        )
+
+        measure(
+            "orm create (500 record chunks)",
+            record_count,
+            lambda: __legacy_import(
+                user_id, legacy_project_id, records_data, labels_data, category, []
+            ),
+        )
+        measure(
+            "COPY + merge",
+            record_count,
+            lambda: __bulk_import(
+                user_id, bulk_project_id, records_data, labels_data, category, []
+            ),
+        )
+
+        measure(
+            f"orm re-upload, {changed_count} changed",
+            record_count,
+            lambda: __legacy_import(
+                user_id,
+                legacy_project_id,
+                reupload_records_data,
+                reupload_labels_data,
+                category,
+                attribute.get_primary_keys(legacy_project_id),
+            ),
+        )
+        measure(
+            f"COPY + upsert re-upload, {changed_count} changed",
+            record_count,
+            lambda: __bulk_import(
+                user_id,
+                bulk_project_id,
+                reupload_records_data,
+                reupload_labels_data,
+                category,
+                attribute.get_primary_keys(bulk_project_id),
+            ),
+        )
+
+
+def __prepare_project(project_id: str) -> None:
+    attribute.create(project_id, "running_id", 1, enums.DataTypes.INTEGER.value, True)
+    record_transfer_manager.import_labeling_tasks_and_labels_pipeline(
+        project_id,
+        {"benchmark_task": {"attribute": None, "labels": LABELS}},
+    )
+    general.commit()
+
+
+def __bulk_import(
+    user_id: str,
+    project_id: str,
+    records_data: List[Dict[str, Any]],
+    labels_data: List[Dict[str, Any]],
+    category: str,
+    primary_keys: List[Attribute],
+) -> None:
+    chunk_size = record_transfer_manager.RECORD_IMPORT_CHUNK_SIZE
+    for x in range(0, len(records_data), chunk_size):
+        record_transfer_manager.upsert_records_and_labels(
+            user_id,
+            project_id,
+            records_data[x : x + chunk_size],
+            labels_data[x : x + chunk_size],
+            category,
+            primary_keys,
+        )
+
+
+def __legacy_import(
+    user_id: str,
+    project_id: str,
+    records_data: List[Dict[str, Any]],
+    labels_data: List[Dict[str, Any]],
+    category: str,
+    primary_keys: List[Attribute],
+) -> None:
+    # previous implementation of import_records_and_rlas_pipeline for comparison
+    for x in range(0, len(records_data), LEGACY_CHUNK_SIZE):
+        records_chunk = records_data[x : x + LEGACY_CHUNK_SIZE]
+        labels_chunk = labels_data[x : x + LEGACY_CHUNK_SIZE]
+        if primary_keys:
+            records_chunk, labels_chunk = __legacy_update_records_and_labels(
+                user_id, project_id, records_chunk, labels_chunk, primary_keys, category
+            )
+        created_records = record.create_records(
+            project_id=project_id, records_data=records_chunk, category=category
+        )
+        record_label_association.create_record_label_associations(
+            records=created_records,
+            labels_data=labels_chunk,
+            project_id=project_id,
+            user_id=user_id,
+        )
+        general.commit()
+
+
+def __legacy_update_records_and_labels(
+    user_id: str,
+    project_id: str,
+    records_data: List[Dict[str, Any]],
+    labels_data: List[Dict[str, Any]],
+    primary_keys: List[Attribute],
+    category: str,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    existing_records_by_key = record.get_existing_records_by_composite_key(
+        project_id=project_id,
+        records_data=records_data,
+        primary_keys=primary_keys,
+        category=category,
+    )
+    if not existing_records_by_key:
+        return records_data, labels_data
+    (
+        remaining_records_data,
+        remaining_labels_data,
+        updated_records,
+        labels_data_of_updated_records,
+    ) = record.update_records(
+        records_data=records_data,
+        labels_data=labels_data,
+        existing_records_by_key=existing_records_by_key,
+        primary_keys=primary_keys,
+    )
+    record_label_association.update_record_label_associations(
+        user_id=user_id,
+        project_id=project_id,
+        records=updated_records,
+        labels_data=labels_data_of_updated_records,
+    )
+    token_manager.delete_token_statistics(updated_records)
+    token_manager.delete_docbins(project_id, updated_records)
+    return remaining_records_data, remaining_labels_data
+
+
+def __import_data(
+    record_count: int, changed_count: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # the first changed_count records get a new text and label
+    records_data = [
+        {
+            "running_id": idx,
+            "headline": f"synthetic headline number {idx}",
+            "text": f"record {idx} with some text to search through and label"
+            + (" (corrected)" if idx < changed_count else ""),
+        }
+        for idx in range(record_count)
+    ]
+    labels_data = [
+        {"benchmark_task": LABELS[(idx + (idx < changed_count)) % len(LABELS)]}
+        for idx in range(record_count)
+    ]
+    return records_data, labels_data
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
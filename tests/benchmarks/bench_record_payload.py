@@ -0,0 +1,106 @@
+from typing import Any, Callable, Dict, List
+
+import sys
+import json
+import uuid
+import datetime
+import tracemalloc
+
+from fastapi.responses import JSONResponse
+
+from fast_api.routes.client_response import pack_orjson_result, to_record_data_list
+from tests.benchmarks.util import measure
+
+PAGE_SIZE = 1000
+REPETITIONS = 20
+
+
+def run(page_size: int, labels_per_record: int) -> None:
+    # records as they come out of to_frontend_obj_raw, the conversion itself is the
+    # same for both paths
+    record_list = [__record(idx, labels_per_record) for idx in range(page_size)]
+
+    def legacy() -> bytes:
+        record_list_pop = [
+            {"recordData": json.dumps(item), "__typename": "ExtendedRecord"}
+            for item in record_list
+        ]
+        return JSONResponse(content=__response(record_list_pop)).body
+
+    def fast() -> bytes:
+        record_list_pop = to_record_data_list(record_list)
+        return pack_orjson_result(
+            __response(record_list_pop), wrap_for_frontend=False
+        ).body
+
+    for name, fn in [("json.dumps + JSONResponse", legacy), ("orjson", fast)]:
+        measure(
+            f"{name}, {REPETITIONS} pages",
+            page_size * REPETITIONS,
+            lambda: [fn() for _ in range(REPETITIONS)],
+        )
+        print(f"{'':<40} peak allocation {__peak_allocation(fn) / 1024:>10.0f} KiB")
+
+
+def __response(record_list_pop: List[Dict[str, str]]) -> Dict[str, Any]:
+    return {
+        "data": {
+            "searchRecordsExtended": {
+                "recordList": record_list_pop,
+                "queryLimit": len(record_list_pop),
+                "queryOffset": 0,
+                "fullCount": len(record_list_pop),
+                "fullCountIsApproximate": False,
+                "sessionId": str(uuid.uuid4()),
+                "continuationToken": None,
+            }
+        }
+    }
+
+
+def __record(idx: int, labels_per_record: int) -> Dict[str, Any]:
+    record_id = str(uuid.uuid4())
+    created_at = str(datetime.datetime.now())
+    return {
+        "id": record_id,
+        "projectId": str(uuid.uuid4()),
+        "data": {
+            "running_id": idx,
+            "headline": f"synthetic headline number {idx}",
+            "text": f"record {idx} with some text to search through and label " * 8,
+        },
+        "category": "SCALE",
+        "createdAt": created_at,
+        "recordId": record_id,
+        "dbOrder": idx,
+        "rlaData": [
+            {
+                "id": str(uuid.uuid4()),
+                "record_id": record_id,
+                "labeling_task_label_id": str(uuid.uuid4()),
+                "source_type": "MANUAL",
+                "return_type": "RETURN",
+                "confidence": 1.0,
+                "created_at": created_at,
+                "is_gold_star": False,
+                "is_valid_manual_label": True,
+            }
+            for _ in range(labels_per_record)
+        ],
+    }
+
+
+def __peak_allocation(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else PAGE_SIZE,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    )
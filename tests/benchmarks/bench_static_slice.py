@@ -0,0 +1,65 @@
+from typing import Any, Dict, List
+
+import sys
+
+from controller.data_slice import manager as data_slice_manager
+from submodules.model import enums
+from submodules.model.business_objects import attribute, general
+from tests.benchmarks.util import benchmark_session, measure, synthetic_project
+
+
+def run(record_count: int) -> None:
+    with benchmark_session(), synthetic_project(record_count) as (
+        project_item,
+        user_id,
+    ):
+        project_id = str(project_item.id)
+        attribute.create(
+            project_id, "running_id", 0, enums.DataTypes.INTEGER.value, True
+        )
+        general.commit()
+
+        # static slice over all but the last tenth of the records
+        filter_data = __running_id_filter(0, record_count * 9 // 10)
+        data_slice_item = None
+
+        def create() -> None:
+            nonlocal data_slice_item
+            data_slice_item = data_slice_manager.create_data_slice(
+                project_id,
+                user_id,
+                "bench",
+                None,
+                filter_data,
+                True,
+                in_background=False,
+            )
+
+        measure("static slice, batched insert", record_count * 9 // 10, create)
+
+        # shifted by a tenth, only the delta at both ends is written
+        shifted = __running_id_filter(record_count // 10, record_count)
+        measure(
+            "static slice, incremental refresh",
+            record_count * 2 // 10,
+            lambda: data_slice_manager.__refresh_data_slice_record_associations(
+                project_id, str(data_slice_item.id), shifted, False
+            ),
+        )
+
+
+def __running_id_filter(lower: int, upper: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "RELATION": "NONE",
+            "NEGATION": False,
+            "TARGET_TABLE": "RECORD",
+            "TARGET_COLUMN": "DATA",
+            "OPERATOR": "BETWEEN",
+            "VALUES": ["running_id", lower, upper - 1],
+        }
+    ]
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
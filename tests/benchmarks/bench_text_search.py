@@ -0,0 +1,82 @@
+from typing import Any, Dict, List
+
+import sys
+
+from service.search import search, text_index
+from submodules.model import enums
+from submodules.model.business_objects import attribute, general
+from tests.benchmarks.util import (
+    benchmark_session,
+    create_records,
+    measure,
+    synthetic_project,
+)
+
+SEARCHES = ["number 4711", "headline number 99", "synthetic"]
+# share of the records inserted again to measure the write cost of the index
+INSERT_SHARE = 0.1
+
+
+def run(record_count: int) -> None:
+    insert_count = int(record_count * INSERT_SHARE)
+    with benchmark_session(), synthetic_project(record_count) as (project_item, _):
+        project_id = str(project_item.id)
+        attribute.create(project_id, "headline", 1, enums.DataTypes.TEXT.value, False)
+        general.commit()
+        general.execute("ANALYZE record")
+        general.commit()
+
+        count_sqls = [
+            search.generate_count_sql(project_id, __contains_filter(value))
+            for value in SEARCHES
+        ]
+        measure(
+            "contains filter, sequential scan",
+            record_count * len(SEARCHES),
+            lambda: [general.execute_first(sql) for sql in count_sqls],
+        )
+        measure(
+            "record insert, no trigram index",
+            insert_count,
+            lambda: create_records(project_id, insert_count, __record_data),
+        )
+        measure(
+            "trigram index build",
+            record_count,
+            lambda: text_index.sync_text_indexes(),
+        )
+        general.execute("ANALYZE record")
+        general.commit()
+        measure(
+            "contains filter, trigram index",
+            record_count * len(SEARCHES),
+            lambda: [general.execute_first(sql) for sql in count_sqls],
+        )
+        measure(
+            "record insert, trigram index",
+            insert_count,
+            lambda: create_records(project_id, insert_count, __record_data),
+        )
+    # drops the index again unless other projects have a headline attribute
+    text_index.sync_text_indexes()
+
+
+def __record_data(idx: int) -> Dict[str, Any]:
+    return {"headline": f"inserted headline number {idx}"}
+
+
+def __contains_filter(value: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            "RELATION": "NONE",
+            "NEGATION": False,
+            "TARGET_TABLE": "RECORD",
+            "TARGET_COLUMN": "DATA",
+            "OPERATOR": "CONTAINS",
+            "VALUES": ["headline", value],
+        }
+    ]
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
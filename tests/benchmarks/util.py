@@ -0,0 +1,172 @@
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import json
+import time
+import uuid
+import datetime
+from contextlib import contextmanager
+
+from submodules.model import enums
+from submodules.model.business_objects import (
+    labeling_task as labeling_task_bo,
+    labeling_task_label as labeling_task_label_bo,
+    organization as organization_bo,
+    user as user_bo,
+    project as project_bo,
+    general,
+)
+from submodules.model.models import Project
+from util import sql_helper
+
+# benchmarks aren't collected by pytest (bench_ prefix), they are run manually inside
+# the gateway container, e.g. python -m tests.benchmarks.bench_payload_ingestion
+
+
+@contextmanager
+def benchmark_session() -> Iterator[None]:
+    session_token = general.get_ctx_token()
+    try:
+        yield
+    finally:
+        general.remove_and_refresh_session(session_token)
+
+
+@contextmanager
+def synthetic_project(
+    record_count: int, data_factory: Callable[[int], Dict[str, Any]] = None
+) -> Iterator[Tuple[Project, str]]:
+    """Creates a throwaway project with record_count records and removes it afterwards.
+
+    Yields the project and the id of the creating user.
+    """
+    if not data_factory:
+        data_factory = __default_record_data
+    org_item = organization_bo.create(name=f"bench_{uuid.uuid4()}", with_commit=True)
+    user_item = user_bo.create(user_id=uuid.uuid4(), with_commit=True)
+    user_bo.update_organization(user_id=user_item.id, organization_id=org_item.id)
+    project_item = project_bo.create(
+        organization_id=org_item.id,
+        name="benchmark_project",
+        description="synthetic benchmark project",
+        created_by=user_item.id,
+        with_commit=True,
+    )
+    try:
+        create_records(str(project_item.id), record_count, data_factory)
+        yield project_item, str(user_item.id)
+    finally:
+        project_bo.delete(project_item.id, with_commit=True)
+        organization_bo.delete(org_item.id, with_commit=True)
+
+
+def create_records(
+    project_id: str, record_count: int, data_factory: Callable[[int], Dict[str, Any]]
+) -> List[str]:
+    record_ids = [str(uuid.uuid4()) for _ in range(record_count)]
+    now = datetime.datetime.now()
+    with sql_helper.raw_connection() as connection:
+        sql_helper.copy_rows(
+            connection.cursor(),
+            "record",
+            ["id", "project_id", "data", "category", "created_at"],
+            (
+                (
+                    record_id,
+                    project_id,
+                    json.dumps(data_factory(idx)),
+                    enums.RecordCategory.SCALE.value,
+                    now,
+                )
+                for idx, record_id in enumerate(record_ids)
+            ),
+        )
+    return record_ids
+
+
+def create_manual_labels(
+    project_id: str,
+    user_id: str,
+    record_ids: List[str],
+    labels: List[str],
+    labels_per_record: int = 1,
+) -> str:
+    """Creates a classification task with the given labels and labels_per_record
+    manual associations per record. Returns the task id.
+    """
+    task_item = labeling_task_bo.create(
+        project_id,
+        None,
+        "benchmark_task",
+        enums.LabelingTaskTarget.ON_WHOLE_RECORD.value,
+        enums.LabelingTaskType.CLASSIFICATION.value,
+        with_commit=True,
+    )
+    label_ids = [
+        str(labeling_task_label_bo.create(project_id, name, task_item.id, "red").id)
+        for name in labels
+    ]
+    general.commit()
+    now = datetime.datetime.now()
+    with sql_helper.raw_connection() as connection:
+        sql_helper.copy_rows(
+            connection.cursor(),
+            "record_label_association",
+            [
+                "id",
+                "project_id",
+                "record_id",
+                "labeling_task_label_id",
+                "source_type",
+                "return_type",
+                "created_by",
+                "created_at",
+                "is_gold_star",
+                "is_valid_manual_label",
+            ],
+            (
+                (
+                    str(uuid.uuid4()),
+                    project_id,
+                    record_id,
+                    label_ids[(idx + offset) % len(label_ids)],
+                    enums.LabelSource.MANUAL.value,
+                    enums.InformationSourceReturnType.RETURN.value,
+                    user_id,
+                    now,
+                    False,
+                    True,
+                )
+                for idx, record_id in enumerate(record_ids)
+                for offset in range(labels_per_record)
+            ),
+        )
+    return str(task_item.id)
+
+
+def get_record_ids(project_id: str) -> List[str]:
+    return [
+        str(row[0])
+        for row in general.execute_all(
+            f"SELECT id FROM record WHERE project_id = '{project_id}'"
+        )
+    ]
+
+
+def measure(name: str, row_count: int, fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    duration = time.perf_counter() - start
+    rows_per_sec = row_count / duration
+    print(
+        f"{name:<40} {row_count:>10} rows {duration:>8.2f}s {rows_per_sec:>12.0f} rows/sec",
+        flush=True,
+    )
+    return duration
+
+
+def __default_record_data(idx: int) -> Dict[str, Any]:
+    return {
+        "running_id": idx,
+        "headline": f"synthetic headline number {idx}",
+        "text": f"record {idx} with some text to search through and label",
+    }
@@ -0,0 +1,44 @@
+import threading
+
+from controller.data_slice import manager
+
+__slice_lock = getattr(manager, "__slice_lock")
+__slice_locks = getattr(manager, "__slice_locks")
+
+
+def test_slice_lock_is_evicted_after_last_refresh():
+    started, release = threading.Event(), threading.Event()
+
+    def refresh():
+        with __slice_lock("slice"):
+            started.set()
+            release.wait(5)
+
+    first = threading.Thread(target=refresh)
+    first.start()
+    started.wait(5)
+    assert "slice" in __slice_locks
+
+    release.set()
+    first.join(5)
+    assert "slice" not in __slice_locks
+
+
+def test_slice_lock_runs_refreshes_of_a_slice_in_sequence():
+    order = []
+    entered = threading.Event()
+
+    def refresh(name: str):
+        with __slice_lock("slice"):
+            order.append(f"{name} start")
+            entered.set()
+            order.append(f"{name} end")
+
+    with __slice_lock("slice"):
+        worker = threading.Thread(target=refresh, args=("second",))
+        worker.start()
+        assert not entered.wait(0.2)
+        order.append("first end")
+    worker.join(5)
+    assert order == ["first end", "second start", "second end"]
+    assert "slice" not in __slice_locks
@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+from unittest.mock import MagicMock
+
+from controller.knowledge_base import util
+
+
+class Cursor:
+    def __init__(self, stored_object_name: str, deleted: List[str]):
+        self.stored_object_name = stored_object_name
+        self.deleted = deleted
+        self.statements: List[Tuple[str, Dict[str, Any]]] = []
+        self.__result = []
+
+    def execute(self, statement: str, parameters: Dict[str, Any]) -> None:
+        self.statements.append((" ".join(statement.split()), parameters))
+        if statement.strip().startswith("SELECT"):
+            self.__result = [(self.stored_object_name,)]
+        elif statement.strip().startswith("DELETE"):
+            self.__result = [(name,) for name in self.deleted]
+
+    def fetchone(self) -> Tuple[str]:
+        return self.__result[0]
+
+    def fetchall(self) -> List[Tuple[str]]:
+        return self.__result
+
+
+def __run(monkeypatch: Any, cursor: Cursor) -> MagicMock:
+    @contextmanager
+    def raw_connection() -> Iterator[MagicMock]:
+        yield MagicMock(cursor=lambda: cursor)
+
+    s3 = MagicMock()
+    s3.object_exists.return_value = True
+    monkeypatch.setattr(util.sql_helper, "raw_connection", raw_connection)
+    monkeypatch.setattr(util, "s3", s3)
+    monkeypatch.setattr(util, "__get_cached_source", lambda p: ("source", "new"))
+    assert util.get_knowledge_base_object("org", "p") == "p/knowledge_base_new"
+    return s3
+
+
+def test_replaced_object_is_kept_for_queued_runs(monkeypatch):
+    cursor = Cursor("p/knowledge_base_old", [])
+    s3 = __run(monkeypatch, cursor)
+    s3.delete_object.assert_not_called()
+    superseded = [
+        parameters
+        for statement, parameters in cursor.statements
+        if statement.startswith("INSERT INTO knowledge_base_superseded_object")
+    ]
+    assert superseded[0]["previous_object_name"] == "p/knowledge_base_old"
+
+
+def test_only_expired_objects_are_deleted(monkeypatch):
+    # the current object is removed from the superseded ones but never deleted
+    cursor = Cursor(
+        "p/knowledge_base_new", ["p/knowledge_base_a", "p/knowledge_base_new"]
+    )
+    s3 = __run(monkeypatch, cursor)
+    assert [c.args[1] for c in s3.delete_object.call_args_list] == [
+        "p/knowledge_base_a"
+    ]
+    assert not any(
+        statement.startswith("INSERT INTO knowledge_base_superseded_object")
+        for statement, _ in cursor.statements
+    )
@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+from typing import Any, Iterator, List
+from unittest.mock import MagicMock
+
+import pytest
+
+from controller.payload import payload_scheduler
+from submodules.model import enums
+
+
+@pytest.fixture
+def s3(monkeypatch) -> MagicMock:
+    s3_mock = MagicMock()
+    s3_mock.create_access_link.side_effect = lambda org_id, name: f"link:{name}"
+    s3_mock.create_file_upload_link.side_effect = lambda org_id, name: f"up:{name}"
+    monkeypatch.setattr(payload_scheduler, "s3", s3_mock)
+    for name in ["project", "organization", "general", "knowledge_base", "record"]:
+        monkeypatch.setattr(payload_scheduler, name, MagicMock())
+    payload_scheduler.organization.get_id_by_project_id.return_value = "org"
+    payload_scheduler.knowledge_base.get_knowledge_base_object.return_value = "kb"
+    monkeypatch.setattr(payload_scheduler, "get_doc_bin_progress", lambda p: 1.0)
+    monkeypatch.setattr(payload_scheduler, "get_doc_bin_table_to_json", MagicMock())
+    monkeypatch.setattr(payload_scheduler, "set_payload_progress", MagicMock())
+    return s3_mock
+
+
+def __run(monkeypatch: Any, record_ids: Any, shards: Any) -> List[List[Any]]:
+    commands = []
+
+    @contextmanager
+    def run_slot(org_id: str, name: str) -> Iterator[None]:
+        yield
+
+    def stream(image: str, command: List[Any], volumes: Any) -> List[str]:
+        commands.append(command)
+        return []
+
+    monkeypatch.setattr(payload_scheduler, "__get_shards", lambda p, r: shards)
+    monkeypatch.setattr(payload_scheduler, "__stream_exec_env_output", stream)
+    monkeypatch.setattr(
+        payload_scheduler, "__consume_container_output", lambda *args: []
+    )
+    monkeypatch.setattr(payload_scheduler.run_scheduler, "run_slot", run_slot)
+    payload = MagicMock(id="payload")
+    output_objects = payload_scheduler.run_container(
+        payload,
+        "project",
+        "image",
+        enums.InformationSourceType.LABELING_FUNCTION.value,
+        "",
+        {},
+        record_ids,
+    )
+    assert output_objects == ["payload"]
+    return commands
+
+
+def test_run_container_full_run_uses_prepared_doc_bin(monkeypatch, s3):
+    commands = __run(monkeypatch, None, None)
+    assert commands[0][0] == "link:project/docbin_full"
+    assert commands[0][-1] == "up:project/payload"
+    payload_scheduler.get_doc_bin_table_to_json.assert_not_called()
+    deleted = [call.args[1] for call in s3.delete_object.call_args_list]
+    assert "project/docbin_full" not in deleted
+
+
+def test_run_container_incremental_run_uploads_changed_records(monkeypatch, s3):
+    commands = __run(monkeypatch, ["r1", "r2"], None)
+    assert commands[0][0] == "link:project/payload_doc_bin.json"
+    payload_scheduler.get_doc_bin_table_to_json.assert_called_once()
+    kwargs = payload_scheduler.get_doc_bin_table_to_json.call_args.kwargs
+    assert kwargs["record_ids"] == ["r1", "r2"]
@@ -0,0 +1,85 @@
+from typing import List
+
+import threading
+import time
+
+import pytest
+
+from controller.payload import run_scheduler
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(run_scheduler, "RUN_MAX_CONCURRENT", 2)
+    monkeypatch.setattr(run_scheduler, "RUN_MAX_CONCURRENT_PER_ORG", 1)
+    monkeypatch.setattr(run_scheduler, "RUN_INTERACTIVE_RESERVE", 1)
+
+
+def __start(
+    started: List[str], name: str, org_id: str, priority: int, release: threading.Event
+) -> threading.Thread:
+    def run() -> None:
+        with run_scheduler.run_slot(org_id, "test", priority):
+            started.append(name)
+            release.wait(5)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def __wait_for(condition, timeout: float = 2) -> None:
+    end = time.time() + timeout
+    while not condition():
+        assert time.time() < end, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_run_slot_respects_org_and_global_caps():
+    release = threading.Event()
+    started: List[str] = []
+    threads = [
+        __start(started, "a1", "a", run_scheduler.PRIORITY_BULK, release),
+        __start(started, "a2", "a", run_scheduler.PRIORITY_BULK, release),
+        __start(started, "b1", "b", run_scheduler.PRIORITY_BULK, release),
+        __start(started, "c1", "c", run_scheduler.PRIORITY_BULK, release),
+    ]
+    __wait_for(lambda: run_scheduler.get_queue_stats()["running"] == 2)
+    time.sleep(0.05)
+    # a2 waits for the org cap, c1 for the global cap
+    assert sorted(started) == ["a1", "b1"]
+    assert run_scheduler.get_queue_stats()["queued"] == 2
+    assert run_scheduler.get_queue_stats("a")["queued"] == 1
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert sorted(started) == ["a1", "a2", "b1", "c1"]
+    assert run_scheduler.get_queue_stats()["running"] == 0
+
+
+def test_run_slot_interactive_uses_reserve():
+    release = threading.Event()
+    started: List[str] = []
+    threads = [
+        __start(started, "a1", "a", run_scheduler.PRIORITY_BULK, release),
+        __start(started, "b1", "b", run_scheduler.PRIORITY_BULK, release),
+    ]
+    __wait_for(lambda: len(started) == 2)
+    threads.append(__start(started, "c1", "c", run_scheduler.PRIORITY_BULK, release))
+    threads.append(
+        __start(started, "a2", "a", run_scheduler.PRIORITY_INTERACTIVE, release)
+    )
+    __wait_for(lambda: "a2" in started)
+    time.sleep(0.05)
+    assert "c1" not in started
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert "c1" in started
+
+
+def test_run_slot_frees_slot_on_error():
+    with pytest.raises(ValueError):
+        with run_scheduler.run_slot("a", "test"):
+            raise ValueError("run failed")
+    assert run_scheduler.get_queue_stats()["running"] == 0
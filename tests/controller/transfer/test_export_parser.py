@@ -0,0 +1,139 @@
+from typing import Any, Dict, List, Optional
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from controller.transfer import export_parser
+
+LABELS = ["person", "location"]
+MAX_LEN = "10"
+
+
+def __span(tokens: List[int], label_name: str, confidence: float) -> Dict[str, Any]:
+    return {
+        "rla_data": {
+            "token": tokens,
+            "label_name": label_name,
+            "confidence": confidence,
+        }
+    }
+
+
+def __legacy_tags(
+    record_data: Optional[List[Dict[str, Any]]], token_count: int
+) -> Optional[np.ndarray]:
+    # row by row implementation the export used before
+    if not record_data:
+        return None
+    arr = np.full(token_count, export_parser.OUTSIDE_CONSTANT, dtype="<U" + MAX_LEN)
+    for rla in record_data:
+        for idx, token in enumerate(rla["rla_data"]["token"]):
+            prefix = "B-" if idx == 0 else "I-"
+            arr[token] = prefix + rla["rla_data"]["label_name"]
+    return arr
+
+
+def __legacy_confidences(
+    record_data: Optional[List[Dict[str, Any]]], token_count: int
+) -> Optional[np.ndarray]:
+    if not record_data:
+        return None
+    arr = np.full(token_count, 0, dtype=np.float16)
+    for rla in record_data:
+        for token in rla["rla_data"]["token"]:
+            arr[token] = rla["rla_data"]["confidence"]
+    return arr
+
+
+def __assert_rows_equal(
+    expected: List[Optional[np.ndarray]], actual: List[Optional[np.ndarray]]
+) -> None:
+    assert len(expected) == len(actual)
+    for expected_row, actual_row in zip(expected, actual):
+        if expected_row is None:
+            assert actual_row is None
+        else:
+            assert expected_row.dtype == actual_row.dtype
+            assert np.array_equal(expected_row, actual_row)
+
+
+def test_build_token_tag_arrays_matches_row_wise_output():
+    random.seed(7)
+    task_data, token_info = [], []
+    for _ in range(200):
+        token_count = random.randint(1, 30)
+        token_info.append({"token_count": token_count})
+        if random.random() < 0.2:
+            task_data.append(random.choice([None, []]))
+            continue
+        spans = []
+        for _ in range(random.randint(1, 4)):
+            start = random.randint(-token_count, token_count - 1)
+            end = min(start + random.randint(1, 3), 0 if start < 0 else token_count)
+            tokens = list(range(start, end)) or [start]
+            spans.append(
+                __span(tokens, random.choice(LABELS), round(random.random(), 2))
+            )
+        task_data.append(spans)
+
+    tags, confidences = export_parser.build_token_tag_arrays(
+        pd.Series(task_data), pd.Series(token_info), MAX_LEN, True
+    )
+
+    token_counts = [info["token_count"] for info in token_info]
+    __assert_rows_equal(
+        [__legacy_tags(d, n) for d, n in zip(task_data, token_counts)], tags
+    )
+    __assert_rows_equal(
+        [__legacy_confidences(d, n) for d, n in zip(task_data, token_counts)],
+        confidences,
+    )
+
+
+def test_build_token_tag_arrays_later_span_wins():
+    tags, confidences = export_parser.build_token_tag_arrays(
+        pd.Series([[__span([0, 1], "person", 0.5), __span([1], "location", 0.25)]]),
+        pd.Series([{"token_count": 3}]),
+        MAX_LEN,
+        False,
+    )
+    assert confidences is None
+    assert tags[0].tolist() == [
+        "B-person",
+        "B-location",
+        export_parser.OUTSIDE_CONSTANT,
+    ]
+
+
+@pytest.mark.parametrize("token", [2, -3])
+def test_build_token_tag_arrays_rejects_out_of_range_tokens(token: int):
+    # without the check index 2 would be written into the first token of row 2
+    with pytest.raises(IndexError):
+        export_parser.build_token_tag_arrays(
+            pd.Series([[__span([token], "person", 1.0)], [__span([0], "person", 1.0)]]),
+            pd.Series([{"token_count": 2}, {"token_count": 2}]),
+            MAX_LEN,
+            True,
+        )
+
+
+def test_pin_dtypes_keeps_format_of_first_chunk():
+    chunks = [
+        pd.DataFrame({"count": [1, 2], "score": [0.5, None], "text": ["a", "b"]}),
+        pd.DataFrame({"count": [3, None], "score": [1, 2], "text": [None, "c"]}),
+    ]
+    pinned = list(export_parser.pin_dtypes(iter(chunks)))
+    csv = "".join(
+        df.to_csv(index=False, header=idx == 0) for idx, df in enumerate(pinned)
+    )
+    assert csv == "count,score,text\n1,0.5,a\n2,,b\n3,1.0,\n,2.0,c\n"
+
+
+def test_pin_dtypes_keeps_inferred_type_on_mismatch():
+    chunks = [pd.DataFrame({"value": [1, 2]}), pd.DataFrame({"value": ["x", None]})]
+    pinned = list(export_parser.pin_dtypes(iter(chunks)))
+    assert pinned[1]["value"].dtype != "Int64"
+    assert pinned[1]["value"][0] == "x"
@@ -0,0 +1,67 @@
+from typing import Any, Iterator, List
+
+import queue
+import threading
+from contextlib import nullcontext
+
+import pytest
+
+from controller.transfer import record_transfer_manager
+
+__read_import_chunks = getattr(record_transfer_manager, "__read_import_chunks")
+__get_queued_chunks = getattr(record_transfer_manager, "__get_queued_chunks")
+
+
+def __chunks(error: BaseException) -> Iterator[List[Any]]:
+    yield [{"text": "a"}]
+    raise error
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+@pytest.mark.parametrize("error", [ValueError("broken file"), SystemExit()])
+def test_reader_always_ends_the_queue(error: BaseException):
+    chunk_queue = queue.Queue(maxsize=2)
+    reader = threading.Thread(
+        target=__read_import_chunks,
+        args=(__chunks(error), chunk_queue, threading.Event()),
+    )
+    reader.start()
+    reader.join(5)
+    assert not reader.is_alive()
+
+    received = []
+    # the error is handed over, a dying reader still ends the queue
+    expected = pytest.raises(ValueError) if isinstance(error, Exception) else None
+    with expected or nullcontext():
+        for data in __get_queued_chunks(chunk_queue):
+            received.append(data)
+    assert received == [[{"text": "a"}]]
+
+
+def test_failed_import_joins_workers(monkeypatch):
+    def fail(*args: Any) -> None:
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(record_transfer_manager, "__import_queued_chunks", fail)
+    monkeypatch.setattr(record_transfer_manager, "IMPORT_TOKENIZE_RECORD_LIMIT", 10)
+    before = threading.active_count()
+    with pytest.raises(RuntimeError):
+        record_transfer_manager.import_records_and_rlas(
+            "project", "user", ([{"text": str(idx)}] for idx in range(10)), 10
+        )
+    assert threading.active_count() == before
+
+
+
+def test_reader_runs_in_its_own_session(monkeypatch):
+    sessions = []
+    monkeypatch.setattr(
+        record_transfer_manager.general, "get_ctx_token", lambda: "token"
+    )
+    monkeypatch.setattr(
+        record_transfer_manager.general, "remove_and_refresh_session", sessions.append
+    )
+    chunk_queue = queue.Queue()
+    __read_import_chunks(iter([[{"text": "a"}]]), chunk_queue, threading.Event())
+    assert sessions == ["token"]
+    assert list(__get_queued_chunks(chunk_queue)) == [[{"text": "a"}]]
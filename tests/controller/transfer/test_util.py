@@ -0,0 +1,71 @@
+from typing import List
+
+import pandas as pd
+
+from controller.transfer import util
+
+__merge_column_types = getattr(util, "__merge_column_types")
+__WHEN = pd.to_datetime(["2024-01-01", "2024-01-02"])
+
+
+def __read_chunks() -> List[pd.DataFrame]:
+    # as read_file_in_chunks returns them, the missing value of the second chunk
+    # was filled with " " which turned the column into object
+    when = __WHEN
+    return [
+        pd.DataFrame({"score": [1.5, 2.5], "count": [1, 2], "when": when}),
+        pd.DataFrame(
+            {"score": [" ", 4.5], "count": [3.5, 4.0], "when": when, "late": ["x"] * 2},
+            index=pd.RangeIndex(2, 4),
+        ),
+    ]
+
+
+def test_merge_column_types_uses_type_of_whole_file():
+    column_types = {}
+    for idx, df in enumerate(__read_chunks()):
+        __merge_column_types(column_types, df, idx == 0)
+    assert column_types == {
+        "score": "object",
+        "count": "float64",
+        "when": __WHEN.dtype.name,
+        "late": "object",
+    }
+
+
+def test_convert_chunks_applies_column_types_and_notifies_once(monkeypatch):
+    notifications = []
+    monkeypatch.setattr(
+        util, "read_file_in_chunks", lambda *args: iter(__read_chunks())
+    )
+    monkeypatch.setattr(
+        util.notification,
+        "create_notification",
+        lambda *args: notifications.append(args),
+    )
+    column_types = {}
+    for idx, df in enumerate(__read_chunks()):
+        __merge_column_types(column_types, df, idx == 0)
+
+    chunks = list(
+        util.convert_to_record_dict_chunks(
+            "csv", "file.csv", "user", "", "project", column_types=column_types
+        )
+    )
+    assert [record["score"] for chunk in chunks for record in chunk] == [
+        1.5,
+        2.5,
+        " ",
+        4.5,
+    ]
+    assert [record["count"] for chunk in chunks for record in chunk] == [
+        1.0,
+        2.0,
+        3.5,
+        4.0,
+    ]
+    assert chunks[0][0]["late"] == " "
+    # unknown types are converted in every chunk
+    assert all(isinstance(record["when"], str) for chunk in chunks for record in chunk)
+    assert len(notifications) == 1
+    assert notifications[0][-1] == "when"
@@ -0,0 +1,91 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from service.search import search
+from service.search.search_helper import build_keyset_condition
+
+__build_token = getattr(search, "__build_continuation_token")
+__parse_token = getattr(search, "__parse_continuation_token")
+
+FILTER_DATA = [{"ORDER_BY": ["@headline"], "ORDER_DIRECTION": ["DESC"]}]
+KEYSET_COLUMNS = [
+    {
+        "EXPRESSION": "r.headline",
+        "RESULT_COLUMN": "order_headline",
+        "DIRECTION": "DESC",
+    },
+    {"EXPRESSION": "r.id", "RESULT_COLUMN": "record_id", "DIRECTION": "ASC"},
+]
+
+
+def __last_record() -> Dict[str, Any]:
+    return {"order_headline": "it's news", "record_id": "f0a7", "other": 1}
+
+
+def test_continuation_token_round_trip():
+    token = __build_token(FILTER_DATA, KEYSET_COLUMNS, __last_record())
+    assert __parse_token(token, FILTER_DATA, KEYSET_COLUMNS) == ["it's news", "f0a7"]
+
+
+@pytest.mark.parametrize(
+    "token",
+    [None, "", "not base64 !", "W10=", "eyJmaWx0ZXIiOiAxfQ=="],
+)
+def test_continuation_token_invalid_is_ignored(token: str):
+    assert __parse_token(token, FILTER_DATA, KEYSET_COLUMNS) is None
+
+
+def test_continuation_token_of_other_filter_is_ignored():
+    token = __build_token(FILTER_DATA, KEYSET_COLUMNS, __last_record())
+    other_filter = [{"ORDER_BY": ["@headline"], "ORDER_DIRECTION": ["ASC"]}]
+    assert __parse_token(token, other_filter, KEYSET_COLUMNS) is None
+    assert __parse_token(token, FILTER_DATA, KEYSET_COLUMNS[1:]) is None
+
+
+def test_keyset_columns_default_to_created_at_and_id():
+    keyset_columns = getattr(search, "__get_keyset_columns")([], "project")
+    assert [c["EXPRESSION"] for c in keyset_columns] == ["r.created_at", "r.id"]
+    random_order = [{"ORDER_BY": ["RANDOM"], "ORDER_DIRECTION": ["seed"]}]
+    assert getattr(search, "__get_keyset_columns")(random_order, "project") is None
+
+
+def test_keyset_condition_desc_then_asc():
+    params: List[Any] = []
+    condition = build_keyset_condition(KEYSET_COLUMNS, ["b", "f0a7"], params)
+    # DESC sorts nulls last, so they come after every value
+    assert condition == (
+        "\n    AND (((r.headline < $1 OR r.headline IS NULL))"
+        " OR (r.headline = $3 AND r.id > $2))"
+    )
+    assert params == ["b", "f0a7", "b"]
+
+
+def test_keyset_condition_with_nulls():
+    params: List[Any] = []
+    asc_columns = [
+        {
+            "EXPRESSION": "r.created_at",
+            "RESULT_COLUMN": "created_at",
+            "DIRECTION": "ASC",
+        },
+        KEYSET_COLUMNS[1],
+    ]
+    # ASC sorts nulls first, every value comes after them
+    condition = build_keyset_condition(asc_columns, [None, "f0a7"], params)
+    assert condition == (
+        "\n    AND ((r.created_at IS NOT NULL)"
+        " OR (r.created_at IS NULL AND r.id > $1))"
+    )
+    assert params == ["f0a7"]
+
+    params = []
+    # nothing comes after a null of a DESC column except equal rows
+    condition = build_keyset_condition(KEYSET_COLUMNS, [None, "f0a7"], params)
+    assert condition == "\n    AND ((r.headline IS NULL AND r.id > $1))"
+
+
+def test_keyset_condition_without_following_rows():
+    params: List[Any] = []
+    desc_columns = [dict(KEYSET_COLUMNS[0])]
+    assert build_keyset_condition(desc_columns, [None], params) == "\n    AND FALSE"
@@ -0,0 +1,62 @@
+from typing import Any, Iterator, List, Tuple
+
+from contextlib import contextmanager
+
+from service.search import label_summary
+
+
+class Cursor:
+    def __init__(self, queued: List[str]):
+        self.queued = queued
+        self.statements = []
+
+    def execute(self, statement: str, parameters: Tuple[Any, ...]) -> None:
+        self.statements.append((statement, parameters))
+
+    def fetchall(self) -> List[Tuple[str]]:
+        return [(record_id,) for record_id in self.queued]
+
+
+class Connection:
+    def __init__(self, cursor: Cursor):
+        self.__cursor = cursor
+
+    def cursor(self) -> Cursor:
+        return self.__cursor
+
+
+def __patch_connection(monkeypatch: Any, cursor: Cursor) -> None:
+    @contextmanager
+    def raw_connection() -> Iterator[Connection]:
+        yield Connection(cursor)
+
+    monkeypatch.setattr(label_summary.sql_helper, "raw_connection", raw_connection)
+
+
+def test_refresh_queued_records_locks_in_record_order(monkeypatch):
+    cursor = Cursor(["c", "a", "b", "a"])
+    __patch_connection(monkeypatch, cursor)
+
+    assert label_summary.refresh_queued_records() == 4
+    assert len(cursor.statements) == 2
+    assert cursor.statements[1][1] == (["a", "b", "c"],)
+
+
+def test_refresh_queued_records_skips_empty_queue(monkeypatch):
+    cursor = Cursor([])
+    __patch_connection(monkeypatch, cursor)
+
+    assert label_summary.refresh_queued_records() == 0
+    assert len(cursor.statements) == 1
+
+
+def test_refresh_records_refreshes_given_records(monkeypatch):
+    cursor = Cursor([])
+    __patch_connection(monkeypatch, cursor)
+
+    label_summary.refresh_records(["b", "a", "b"])
+    assert len(cursor.statements) == 1
+    assert cursor.statements[0][1] == (["a", "b"],)
+
+    label_summary.refresh_records([])
+    assert len(cursor.statements) == 1
@@ -0,0 +1,48 @@
+from typing import List, Optional
+
+import sqlite3
+from types import SimpleNamespace
+
+from service.search import search
+
+RECORD_COUNT = 25
+BATCH_SIZE = 10
+
+
+def __create_records() -> sqlite3.Connection:
+    # created_at descends while the ids ascend, so both orders differ
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        "CREATE TABLE record (project_id TEXT, id TEXT, created_at TEXT, category TEXT)"
+    )
+    connection.executemany(
+        "INSERT INTO record VALUES ('p', ?, ?, 'SCALE')",
+        [(f"id-{idx:03d}", f"2024-01-{31 - idx:02d}") for idx in range(RECORD_COUNT)],
+    )
+    return connection
+
+
+def test_record_id_batches_cover_every_record_in_id_order(monkeypatch):
+    monkeypatch.setattr(
+        search, "RecordCategory", SimpleNamespace(SCALE=SimpleNamespace(value="SCALE"))
+    )
+    connection = __create_records()
+    batches: List[List[str]] = []
+    after_record_id: Optional[str] = None
+    while True:
+        sql = search.generate_record_id_batch_sql("p", [], after_record_id, BATCH_SIZE)
+        batches.append([row[0] for row in connection.execute(sql)])
+        if len(batches[-1]) < BATCH_SIZE:
+            break
+        after_record_id = batches[-1][-1]
+
+    record_ids = [record_id for batch in batches for record_id in batch]
+    assert record_ids == [f"id-{idx:03d}" for idx in range(RECORD_COUNT)]
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+
+def test_record_id_batches_ignore_order_filters():
+    order_filter = [{"ORDER_BY": ["@headline"], "ORDER_DIRECTION": ["DESC"]}]
+    sql = search.generate_record_id_batch_sql("p", order_filter, None, BATCH_SIZE)
+    assert "ORDER BY r.id ASC NULLS FIRST" in sql
+    assert "created_at" not in sql
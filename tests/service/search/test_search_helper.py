@@ -0,0 +1,142 @@
+from typing import Any, List
+
+import pytest
+
+from service.search import search_helper
+from service.search.search_helper import add_parameter, render_sql
+
+__prepare_search_statement = getattr(search_helper, "__prepare_search_statement")
+__pending_statement = getattr(search_helper, "__pending_statement")
+__bind_statement_values = getattr(search_helper, "__bind_statement_values")
+__register_prepare_listener = getattr(search_helper, "__register_prepare_listener")
+
+
+def test_render_sql_inlines_parameters():
+    params: List[Any] = []
+    placeholders = [add_parameter(params, v) for v in ["it's", 3, 2.5, None, True]]
+    assert placeholders == ["$1", "$2", "$3", "$4", "$5"]
+    sql = "SELECT 1 WHERE a = $1 AND b IN ($2, $3) AND c = $4 AND d = $5"
+    assert render_sql(sql, params) == (
+        "SELECT 1 WHERE a = 'it''s' AND b IN (3, 2.5) AND c = NULL AND d = TRUE"
+    )
+
+
+def test_render_sql_skips_literals_and_identifiers():
+    params = ["x"]
+    sql = "SELECT '$1', \"$1\", $1, '$1'''"
+    assert render_sql(sql, params) == "SELECT '$1', \"$1\", 'x', '$1'''"
+    # without parameters the statement is returned as is
+    assert render_sql(sql, []) == sql
+
+
+@pytest.mark.parametrize(
+    "value, literal",
+    [
+        (float("nan"), "'NaN'::FLOAT"),
+        (float("inf"), "'Infinity'::FLOAT"),
+        (float("-inf"), "'-Infinity'::FLOAT"),
+        (1e16, "1e+16"),
+    ],
+)
+def test_render_sql_floats(value: float, literal: str):
+    assert render_sql("SELECT $1", [value]) == f"SELECT {literal}"
+
+
+class Connection:
+    def __init__(self):
+        self.info = {}
+
+
+class Cursor:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def execute(self, statement: str) -> None:
+        self.statements.append(statement)
+
+
+def __run(connection: Connection, cursor: Cursor, name: str) -> None:
+    token = __pending_statement.set((name, f"SELECT {name}"))
+    try:
+        statement = f"EXECUTE {name}(%(p_0)s)"
+        assert __prepare_search_statement(
+            connection, cursor, statement, {}, None, False
+        ) == (statement, {})
+    finally:
+        __pending_statement.reset(token)
+
+
+def test_prepare_search_statement_once_per_connection(monkeypatch):
+    monkeypatch.setattr(search_helper, "SEARCH_PREPARED_STATEMENT_LIMIT", 2)
+    connection, cursor = Connection(), Cursor()
+    __run(connection, cursor, "search_a")
+    __run(connection, cursor, "search_a")
+    assert cursor.statements == ["PREPARE search_a AS SELECT search_a"]
+
+    # a new connection doesn't know the statement yet
+    other_cursor = Cursor()
+    __run(Connection(), other_cursor, "search_a")
+    assert other_cursor.statements == ["PREPARE search_a AS SELECT search_a"]
+
+    # the least recently used statement is removed at the limit
+    __run(connection, cursor, "search_b")
+    __run(connection, cursor, "search_a")
+    __run(connection, cursor, "search_c")
+    assert cursor.statements[1:] == [
+        "PREPARE search_b AS SELECT search_b",
+        "DEALLOCATE search_b",
+        "PREPARE search_c AS SELECT search_c",
+    ]
+
+
+def test_prepare_search_statement_ignores_other_statements():
+    connection, cursor = Connection(), Cursor()
+    assert __prepare_search_statement(
+        connection, cursor, "SELECT 1", None, None, False
+    ) == ("SELECT 1", None)
+    assert cursor.statements == []
+    assert connection.info == {}
+
+
+def test_bind_statement_values_shares_statement_across_projects_and_pages():
+    sql = (
+        "SELECT 1 FROM record r WHERE r.project_id = '{project_id}' AND a = $1 "
+        "AND b = 'LIMIT 5' AND c = '{other_id}'\nLIMIT {limit} OFFSET {offset} "
+    )
+    statements = set()
+    for project_id, limit, offset in [("p1", 20, 40), ("p2", 50, 100)]:
+        bound_sql, params = __bind_statement_values(
+            sql.format(
+                project_id=project_id, other_id="o1", limit=limit, offset=offset
+            ),
+            ["x"],
+            project_id,
+        )
+        statements.add(bound_sql)
+        assert params == ["x", project_id, limit, offset]
+    assert statements == {
+        "SELECT 1 FROM record r WHERE r.project_id = $2 AND a = $1 "
+        "AND b = 'LIMIT 5' AND c = 'o1'\nLIMIT $3 OFFSET $4 "
+    }
+
+
+class Event:
+    def __init__(self):
+        self.listeners = []
+
+    def contains(self, target: Any, identifier: str, fn: Any) -> bool:
+        return (target, identifier, fn) in self.listeners
+
+    def listen(self, target: Any, identifier: str, fn: Any, **kwargs: Any) -> None:
+        self.listeners.append((target, identifier, fn))
+
+
+def test_register_prepare_listener_only_on_app_engine(monkeypatch):
+    engine, fake_event = object(), Event()
+    monkeypatch.setattr(search_helper, "event", fake_event)
+    monkeypatch.setattr(search_helper.general, "get_bind", lambda: engine)
+    __register_prepare_listener()
+    __register_prepare_listener()
+    assert fake_event.listeners == [
+        (engine, "before_cursor_execute", __prepare_search_statement)
+    ]
@@ -0,0 +1,49 @@
+from typing import Any, List, Optional, Tuple
+
+import re
+
+import pytest
+
+from service.search import search
+
+__build_update_query = getattr(search, "__build_record_session_update_query")
+
+
+def __patch_session(monkeypatch: Any, record_count: Optional[int]) -> List[str]:
+    statements = []
+
+    def execute_first(sql: str) -> Tuple[Optional[int]]:
+        return (record_count,)
+
+    def execute_all(sql: str) -> List[Tuple[str]]:
+        statements.append(sql)
+        return []
+
+    monkeypatch.setattr(search.general, "execute_first", execute_first)
+    monkeypatch.setattr(search.general, "execute_all", execute_all)
+    return statements
+
+
+@pytest.mark.parametrize(
+    "position, first, last",
+    [(None, 1, 10), (3, 1, 10), (50, 46, 55), (98, 91, 100)],
+)
+def test_session_record_window_stays_inside_session(
+    monkeypatch, position: Optional[int], first: int, last: int
+):
+    statements = __patch_session(monkeypatch, 100)
+    _, offset, record_count = search.get_session_record_window("s", position, 10)
+    assert (offset, record_count) == (first - 1, 100)
+    assert re.search(rf"BETWEEN {first} AND {last}\b", statements[0])
+
+
+def test_session_record_window_of_uncollected_session(monkeypatch):
+    __patch_session(monkeypatch, None)
+    assert search.get_session_record_window("s", 5, 10) == ([], 0, 0)
+
+
+def test_session_update_query_caps_records(monkeypatch):
+    monkeypatch.setattr(search, "SESSION_RECORD_LIMIT", 250)
+    sql = __build_update_query("SELECT record_id FROM record ORDER BY id", "s")
+    assert "ORDER BY id LIMIT 250 )" in sql
+    assert sql.index("DELETE FROM user_session_record") < sql.index("INSERT")
@@ -0,0 +1,79 @@
+import datetime
+
+import pandas as pd
+
+from submodules.model import enums
+from util import category
+
+
+def __legacy_category_enum(df: pd.DataFrame, df_col: str) -> str:
+    # column by column implementation the import used before
+    type_name = df[df_col].dtype.name
+    if type_name == "int64":
+        if df[df_col].apply(lambda x: x > 2_147_483_647).sum() > 0:
+            return enums.DataTypes.TEXT.value
+        return enums.DataTypes.INTEGER.value
+    elif type_name == "float64":
+        return enums.DataTypes.FLOAT.value
+    elif type_name == "bool":
+        return enums.DataTypes.BOOLEAN.value
+    elif type_name == "object":
+        if (
+            df[df_col].nunique() <= df[df_col].count() * 0.2
+            and df[df_col].str.len().max() < 50
+        ):
+            return enums.DataTypes.CATEGORY.value
+        return enums.DataTypes.TEXT.value
+    else:
+        return enums.DataTypes.UNKNOWN.value
+
+
+def __object_column(values: list) -> pd.Series:
+    return pd.Series(values, dtype="object")
+
+
+def __frame() -> pd.DataFrame:
+    row_count = 20
+    return pd.DataFrame(
+        {
+            "running_id": range(row_count),
+            "large_id": [2_147_483_648 + idx for idx in range(row_count)],
+            "score": [idx / 3 for idx in range(row_count)],
+            "flag": [idx % 2 == 0 for idx in range(row_count)],
+            "label": __object_column(["pos", "neg", None, "pos"] * 5),
+            "long_label": __object_column(["x" * 60, "y" * 60] * 10),
+            "text": __object_column([f"text number {idx}" for idx in range(20)]),
+            "mixed": __object_column([1, "a"] * 10),
+            "created": [datetime.datetime(2024, 1, 1)] * row_count,
+            # object columns without strings, e.g. from json or openpyxl
+            "huge_id": __object_column([2**64 + idx for idx in range(row_count)]),
+            "time": __object_column(
+                [datetime.time(idx % 24, idx) for idx in range(row_count)]
+            ),
+        }
+    )
+
+
+def test_infer_category_enums_matches_column_wise_output():
+    df = __frame()
+    data_types = category.infer_category_enums(df)
+    assert data_types == {key: __legacy_category_enum(df, key) for key in df.columns}
+    assert data_types["running_id"] == enums.DataTypes.INTEGER.value
+    assert data_types["large_id"] == enums.DataTypes.TEXT.value
+    assert data_types["label"] == enums.DataTypes.CATEGORY.value
+    assert data_types["long_label"] == enums.DataTypes.TEXT.value
+    assert data_types["created"] == enums.DataTypes.UNKNOWN.value
+    assert data_types["huge_id"] == enums.DataTypes.TEXT.value
+    assert data_types["time"] == enums.DataTypes.TEXT.value
+
+
+def test_infer_category_enum_delegates_to_frame_check():
+    df = __frame()
+    for key in df.columns:
+        assert category.infer_category_enum(df, key) == __legacy_category_enum(
+            df, key
+        )
+
+
+def test_infer_category_enums_without_columns():
+    assert category.infer_category_enums(pd.DataFrame(index=range(3))) == {}
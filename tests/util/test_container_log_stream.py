@@ -0,0 +1,90 @@
+from typing import Iterator, List
+
+import time
+
+import pytest
+
+from util import container_log_stream
+
+
+def __lines(*items) -> Iterator[str]:
+    # strings are yielded, numbers are pauses in seconds
+    for item in items:
+        if isinstance(item, str):
+            yield item
+        else:
+            time.sleep(item)
+
+
+def test_consume_output_returns_non_progress_lines():
+    progress: List[float] = []
+    logs = container_log_stream.consume_output(
+        __lines("t1 start", "t2 progress: 0.5", "t3 done"),
+        on_progress=progress.append,
+        on_logs=lambda _: None,
+        progress_interval=60,
+        log_flush_interval=60,
+    )
+    assert logs == ["t1 start", "t3 done"]
+    # the first progress is sent right away, nothing is pending at the end
+    assert progress == [0.5]
+
+
+def test_consume_output_coalesces_progress():
+    progress: List[float] = []
+    container_log_stream.consume_output(
+        __lines("t progress: 0.1", "t progress: 0.2", "t progress: 0.3"),
+        on_progress=progress.append,
+        on_logs=lambda _: None,
+        progress_interval=60,
+        log_flush_interval=60,
+    )
+    # latest value wins, pending progress is sent once the output ends
+    assert progress == [0.1, 0.3]
+
+
+def test_consume_output_flushes_while_container_is_silent():
+    flushed: List[List[str]] = []
+    progress: List[float] = []
+    flushed_during_pause = []
+
+    def lines() -> Iterator[str]:
+        yield "t progress: 0.1"
+        yield "t progress: 0.2"
+        yield "t first line"
+        time.sleep(0.5)
+        flushed_during_pause.extend([list(progress), list(flushed)])
+        yield "t last line"
+
+    logs = container_log_stream.consume_output(
+        lines(),
+        on_progress=progress.append,
+        on_logs=flushed.append,
+        progress_interval=0.1,
+        log_flush_interval=0.1,
+    )
+    assert logs == ["t first line", "t last line"]
+    assert flushed_during_pause == [[0.1, 0.2], [["t first line"]]]
+
+
+def test_consume_output_stops_early():
+    logs = container_log_stream.consume_output(
+        __lines("t first line", 5, "t never read"),
+        on_progress=lambda _: None,
+        on_logs=lambda _: None,
+        progress_interval=0.05,
+        log_flush_interval=0.05,
+        should_stop=lambda: True,
+    )
+    assert logs == ["t first line"]
+
+
+def test_consume_output_raises_reader_errors():
+    def lines() -> Iterator[str]:
+        yield "t first line"
+        raise ConnectionError("docker went away")
+
+    with pytest.raises(ConnectionError):
+        container_log_stream.consume_output(
+            lines(), on_progress=lambda _: None, on_logs=lambda _: None
+        )
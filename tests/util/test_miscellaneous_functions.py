@@ -0,0 +1,14 @@
+from util.miscellaneous_functions import chunk_items
+
+
+def test_chunk_items_splits_lazy_pairs():
+    pairs = ((f"record_{idx}", idx) for idx in range(5))
+    assert list(chunk_items(pairs, SIZE=2)) == [
+        {"record_0": 0, "record_1": 1},
+        {"record_2": 2, "record_3": 3},
+        {"record_4": 4},
+    ]
+
+
+def test_chunk_items_without_items():
+    assert list(chunk_items([])) == []
@@ -0,0 +1,43 @@
+from typing import Any, List, Tuple
+
+from util import sql_helper
+
+
+class CopyCursor:
+    def __init__(self) -> None:
+        self.copies: List[Tuple[str, str]] = []
+
+    def copy_expert(self, statement: str, buffer: Any) -> None:
+        self.copies.append((statement, buffer.read()))
+
+
+def test_copy_rows_writes_text_format():
+    cursor = CopyCursor()
+    count = sql_helper.copy_rows(
+        cursor,
+        "record",
+        ["id", "data", "flag"],
+        [("a", 'say "hi"\tnow\nback\\slash', True), ("b", None, False)],
+    )
+    assert count == 2
+    assert cursor.copies == [
+        (
+            'COPY record ("id", "data", "flag") FROM STDIN',
+            'a\tsay "hi"\\tnow\\nback\\\\slash\tt\nb\t\\N\tf\n',
+        )
+    ]
+
+
+def test_copy_rows_flushes_in_batches():
+    cursor = CopyCursor()
+    count = sql_helper.copy_rows(
+        cursor, "record", ["id"], ([str(idx)] for idx in range(5)), batch_size=2
+    )
+    assert count == 5
+    assert [content for _, content in cursor.copies] == ["0\n1\n", "2\n3\n", "4\n"]
+
+
+def test_copy_rows_without_rows_sends_nothing():
+    cursor = CopyCursor()
+    assert sql_helper.copy_rows(cursor, "record", ["id"], []) == 0
+    assert cursor.copies == []
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from submodules.model import enums
 import pandas as pd
 
@@ -12,28 +14,49 @@ def infer_category(file_name: str) -> str:
 
 
 def infer_category_enum(df: pd.DataFrame, df_col: str) -> str:
-    type_name = df[df_col].dtype.name
-    if type_name == "int64":
-        if df[df_col].apply(lambda x: x > 2_147_483_647).sum() > 0:
-            # doesn't fit in database INTEGER type
-            # check all values instead of sample since it a simple integer column
-            return enums.DataTypes.TEXT.value
-        return enums.DataTypes.INTEGER.value
-    elif type_name == "float64":
-        return enums.DataTypes.FLOAT.value
-    elif type_name == "bool":
-        return enums.DataTypes.BOOLEAN.value
-    elif type_name == "object":
-        # if the number of unique values is less than 20% of the number of rows
-        # & no value is longer than 50 characters then we assume category
-        if (
-            df[df_col].nunique() <= df[df_col].count() * 0.2
-            and df[df_col].str.len().max() < 50
-        ):
-            return enums.DataTypes.CATEGORY.value
-        return enums.DataTypes.TEXT.value
-    else:
-        return enums.DataTypes.UNKNOWN.value
+    return infer_category_enums(df[[df_col]])[df_col]
+
+
+def infer_category_enums(df: pd.DataFrame) -> Dict[str, str]:
+    # data types of all columns, the checks run once over the whole frame
+    type_names = {key: dtype.name for key, dtype in df.dtypes.items()}
+    int_cols = [key for key, name in type_names.items() if name == "int64"]
+    object_cols = [key for key, name in type_names.items() if name == "object"]
+    # doesn't fit in database INTEGER type
+    # check all values instead of sample since it a simple integer column
+    too_large = (df[int_cols] > 2_147_483_647).any() if int_cols else {}
+    if object_cols:
+        object_df = df[object_cols]
+        unique_counts = object_df.nunique()
+        value_counts = object_df.count()
+
+    data_types = {}
+    for key, type_name in type_names.items():
+        if type_name == "int64":
+            data_types[key] = (
+                enums.DataTypes.TEXT.value
+                if too_large[key]
+                else enums.DataTypes.INTEGER.value
+            )
+        elif type_name == "float64":
+            data_types[key] = enums.DataTypes.FLOAT.value
+        elif type_name == "bool":
+            data_types[key] = enums.DataTypes.BOOLEAN.value
+        elif type_name == "object":
+            # if the number of unique values is less than 20% of the number of rows
+            # & no value is longer than 50 characters then we assume category
+            # lengths only of columns passing the first check, columns without
+            # strings (e.g. huge integers, times) don't support .str
+            if (
+                unique_counts[key] <= value_counts[key] * 0.2
+                and df[key].str.len().max() < 50
+            ):
+                data_types[key] = enums.DataTypes.CATEGORY.value
+            else:
+                data_types[key] = enums.DataTypes.TEXT.value
+        else:
+            data_types[key] = enums.DataTypes.UNKNOWN.value
+    return data_types
 
 
 def infer_category_completeness(df: pd.DataFrame, df_col: str) -> bool:
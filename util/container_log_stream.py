@@ -0,0 +1,117 @@
+from typing import Any, Callable, Iterator, List, Optional
+
+import os
+import time
+import queue
+from threading import Thread
+
+# seconds between two progress updates, newer values in between replace older ones
+PROGRESS_INTERVAL = float(os.getenv("CONTAINER_PROGRESS_INTERVAL", "1"))
+# seconds between two persisted log batches
+LOG_FLUSH_INTERVAL = float(os.getenv("CONTAINER_LOG_FLUSH_INTERVAL", "5"))
+
+__NO_LINE = object()
+
+
+def follow_container_output(container: Any) -> Iterator[str]:
+    # lines are yielded as soon as docker sends them, ends once the container exits
+    buffer = b""
+    for chunk in container.logs(
+        stream=True, follow=True, stdout=True, stderr=True, timestamps=True
+    ):
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if len(line.strip()) > 0:
+                yield line.decode("utf-8")
+    if len(buffer.strip()) > 0:
+        yield buffer.decode("utf-8")
+
+
+def consume_output(
+    log_lines: Iterator[str],
+    on_progress: Callable[[float], None],
+    on_logs: Callable[[List[str]], None],
+    progress_interval: float = PROGRESS_INTERVAL,
+    log_flush_interval: float = LOG_FLUSH_INTERVAL,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> List[str]:
+    """Reads exec env output until it ends and returns all lines that aren't progress.
+
+    Progress lines ("progress: 0.5") are forwarded to on_progress at most every
+    progress_interval seconds (only the latest value is sent). Other lines are
+    handed to on_logs in batches every log_flush_interval seconds. Both run on a
+    timer, so pending values are also sent while the container is silent. Lines still
+    pending once the output ends aren't flushed since the caller persists the
+    returned list anyway.
+
+    should_stop is checked with every tick, if it returns True reading ends early
+    (the caller is responsible for stopping the container).
+    """
+    lines = queue.Queue()
+    Thread(target=__read_lines, args=(log_lines, lines), daemon=True).start()
+    tick = min(progress_interval, log_flush_interval)
+    logs = []
+    pending_logs = []
+    pending_progress = None
+    sent_progress = None
+    last_progress_sent = 0.0
+    last_log_flush = time.time()
+    last_stop_check = last_log_flush
+    while True:
+        try:
+            line = lines.get(timeout=tick)
+        except queue.Empty:
+            line = __NO_LINE
+        if line is None:
+            break
+        if isinstance(line, Exception):
+            raise line
+        if line is not __NO_LINE:
+            if "progress" in line:
+                progress = __parse_progress(line)
+                if progress is not None and progress != sent_progress:
+                    pending_progress = progress
+            else:
+                logs.append(line)
+                pending_logs.append(line)
+
+        now = time.time()
+        if (
+            pending_progress is not None
+            and now - last_progress_sent >= progress_interval
+        ):
+            on_progress(pending_progress)
+            sent_progress = pending_progress
+            pending_progress = None
+            last_progress_sent = now
+        if pending_logs and now - last_log_flush >= log_flush_interval:
+            on_logs(pending_logs)
+            pending_logs = []
+            last_log_flush = now
+        if should_stop and now - last_stop_check >= tick:
+            last_stop_check = now
+            if should_stop():
+                return logs
+
+    if pending_progress is not None:
+        on_progress(pending_progress)
+    return logs
+
+
+def __read_lines(log_lines: Iterator[str], lines: queue.Queue) -> None:
+    # None marks the end of the output, errors are re-raised by the consumer
+    try:
+        for line in log_lines:
+            lines.put(line)
+    except Exception as e:
+        lines.put(e)
+    finally:
+        lines.put(None)
+
+
+def __parse_progress(line: str) -> Optional[float]:
+    try:
+        return float(line.split("progress: ")[1].strip())
+    except (IndexError, ValueError):
+        return None
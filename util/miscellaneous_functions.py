@@ -1,5 +1,5 @@
 from itertools import islice
-from typing import Dict, Any, Iterator, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from submodules.model.business_objects.export import OUTSIDE_CONSTANT
 
 from submodules.model.models import LabelingTask
@@ -11,6 +11,15 @@ def chunk_dict(data: Dict, SIZE: int = 1000) -> Iterator[Dict[str, Any]]:
         yield {k: data[k] for k in islice(it, SIZE)}
 
 
+def chunk_items(
+    items: Iterable[Tuple[str, Any]], SIZE: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    # like chunk_dict but for (lazy) key value pairs, only one chunk is held at a time
+    it = iter(items)
+    while chunk := dict(islice(it, SIZE)):
+        yield chunk
+
+
 def chunk_list(list: List, SIZE: int = 1000) -> Iterator[List[Any]]:
     return (list[pos : pos + SIZE] for pos in range(0, len(list), SIZE))
 
@@ -1,5 +1,107 @@
+from typing import Any, Iterable, Iterator, List, Sequence
+
+import io
+import pandas as pd
+from contextlib import contextmanager
 from sqlalchemy.sql import text as sql_text
 
+from submodules.model.business_objects import general
+
+COPY_BATCH_SIZE = 50000
+READ_CHUNK_SIZE = 10000
+
 
 def parse_sql_text(sql: str) -> str:
     return sql_text(sql)
+
+
+def read_sql_chunks(
+    sql: str, chunk_size: int = READ_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    # server side cursor, only chunk_size rows are fetched & held in memory at once
+    # the connection stays open until the generator is exhausted or closed
+    # empty results still yield one empty frame, callers need the columns (headers)
+    with general.get_bind().connect().execution_options(
+        stream_results=True
+    ) as connection:
+        result = connection.execute(parse_sql_text(sql))
+        columns = list(result.keys())
+        has_rows = False
+        while True:
+            rows = result.fetchmany(chunk_size)
+            if not rows and has_rows:
+                break
+            # same conversion pd.read_sql uses
+            yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+            if not rows:
+                break
+            has_rows = True
+
+
+@contextmanager
+def raw_connection() -> Iterator[Any]:
+    # plain driver connection for features the orm doesn't offer (e.g. COPY)
+    # caution: runs in its own transaction, independent of the request session
+    connection = general.get_bind().raw_connection()
+    try:
+        yield connection
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+@contextmanager
+def autocommit_connection() -> Iterator[Any]:
+    # for statements that can't run inside a transaction block
+    # (e.g. CREATE INDEX CONCURRENTLY)
+    with general.get_bind().connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as connection:
+        yield connection
+
+
+def copy_rows(
+    cursor: Any,
+    table_name: str,
+    columns: List[str],
+    rows: Iterable[Sequence[Any]],
+    batch_size: int = COPY_BATCH_SIZE,
+) -> int:
+    # json values need to be dumped by the caller
+    column_str = ", ".join(f'"{c}"' for c in columns)
+    statement = f"COPY {table_name} ({column_str}) FROM STDIN"
+    count = 0
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(__to_copy_value(value) for value in row))
+        buffer.write("\n")
+        count += 1
+        if count % batch_size == 0:
+            __flush_copy_buffer(cursor, statement, buffer)
+            buffer = io.StringIO()
+    if count % batch_size != 0:
+        __flush_copy_buffer(cursor, statement, buffer)
+    return count
+
+
+def __to_copy_value(value: Any) -> str:
+    # COPY text format, see https://www.postgresql.org/docs/current/sql-copy.html
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def __flush_copy_buffer(cursor: Any, statement: str, buffer: io.StringIO) -> None:
+    buffer.seek(0)
+    cursor.copy_expert(statement, buffer)